@@ -0,0 +1,283 @@
+"""
+Overload benchmark for admission control (mindpulse_admission).
+
+For each target it starts the server twice, with admission control off (the
+default: every request queues) and on (limits set explicitly, see
+_start_server), measures the server's capacity with a short closed-loop run
+of --concurrency clients, then offers an open-loop arrival rate of 2x and 5x
+that capacity. Latency is measured from each request's scheduled send time,
+so client-side backlog counts as latency too.
+
+The predict targets send single-row POST /predict, as real clients do, so
+the Flask micro-batcher (--max-batch-size PREDICT_BATCH) is in play; the
+closed-loop concurrency is at least one full batch.
+
+Reported per run:
+  goodput/s   200 responses within --slo-ms per second
+  p50/p99 ms  latency of the 200 responses
+  shed        503 responses (with Retry-After) per second
+  failed      timeouts, connection errors and other statuses
+  fast p99    p99 latency of a fast-lane probe (/health or /status) polled
+              every 20 ms during the run
+
+Targets:
+  flask-predict    `mindpulse_service.py --serve --workers 1`, POST /predict
+  fastapi-predict  `uvicorn main:app`, POST /predict
+  fastapi-timers   `uvicorn main:app`, POST /start/batch (probe: /status/<id>)
+
+Runs offline: unless --model-dir holds exported NumPy weights, the
+bench_suite fixture model is used. Client and server share the machine; on
+few cores the client's own CPU use caps how much overload it can offer.
+
+Usage:
+  python bench_overload.py
+  python bench_overload.py --targets flask-predict --factors 2 5 --duration 10
+  python bench_overload.py --switch-interval-ms 0.2   # both runs, admission off and on
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+import mindpulse_inference as inference
+from bench_serve import SAMPLE_PAYLOAD, _free_port, _wait_healthy
+from bench_suite import write_fixture
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TARGETS = ["flask-predict", "fastapi-predict", "fastapi-timers"]
+PREDICT_BATCH = 32  # Flask --max-batch-size (its default), and the least closed-loop concurrency
+PREDICT_THREADS = 4  # FastAPI MINDPULSE_PREDICT_THREADS (its default)
+TIMER_ROWS = 1000  # timers per /start/batch request: main.MAX_BATCH_TIMERS
+TIMER_CONCURRENCY = 32
+CLIENT_TIMEOUT = 30.0
+PROBE_INTERVAL = 0.02
+
+
+def _request(port: int, method: str, path: str, body: Optional[bytes] = None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=CLIENT_TIMEOUT)
+    try:
+        conn.request(method, path, body=body, headers={"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        data = resp.read()
+        return resp.status, data
+    finally:
+        conn.close()
+
+
+# ---------------------------
+# Servers
+# ---------------------------
+def _start_server(target: str, root: str, admission: bool, switch_interval_ms: float) -> (subprocess.Popen, int):
+    """Every limit is passed explicitly; admission on = one full batch (Flask) / one slot per predict thread."""
+    port = _free_port()
+    env = dict(os.environ, PYTHONPATH=HERE)
+    if target == "flask-predict":
+        cmd = [sys.executable, os.path.join(HERE, "mindpulse_service.py"), "--serve", "--workers", "1",
+               "--host", "127.0.0.1", "--port", str(port), "--backend", "numpy",
+               "--max-batch-size", str(PREDICT_BATCH), "--max-concurrency", str(PREDICT_BATCH if admission else 0),
+               "--switch-interval-ms", str(switch_interval_ms)]
+    else:
+        cmd = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+               "--log-level", "warning", "--no-access-log"]
+        env.update(MINDPULSE_BACKEND="numpy", MINDPULSE_PREDICT_THREADS=str(PREDICT_THREADS),
+                   MINDPULSE_PREDICT_CONCURRENCY=str(PREDICT_THREADS if admission else 0),
+                   MINDPULSE_TIMER_CONCURRENCY=str(TIMER_CONCURRENCY if admission else 0),
+                   MINDPULSE_SWITCH_INTERVAL_MS=str(switch_interval_ms))
+    proc = subprocess.Popen(cmd, cwd=root, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    _wait_healthy(port)
+    return proc, port
+
+
+def _stop(proc: subprocess.Popen) -> None:
+    proc.terminate()
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def _workload(target: str, port: int):
+    """(path, body, fast-lane probe path) for a target."""
+    if target == "fastapi-timers":
+        body = json.dumps([{"minutes": 60}] * TIMER_ROWS).encode()
+        status, data = _request(port, "POST", "/start", json.dumps({"minutes": 60}).encode())
+        return "/start/batch", body, f"/status/{json.loads(data)['id']}"
+    return "/predict", json.dumps(SAMPLE_PAYLOAD).encode(), "/health"
+
+
+# ---------------------------
+# Load
+# ---------------------------
+async def _send(port: int, request: bytes) -> Optional[int]:
+    """One HTTP/1.0 request on a fresh connection; the response status, or None on error/timeout."""
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection("127.0.0.1", port), CLIENT_TIMEOUT)
+    except (OSError, asyncio.TimeoutError):
+        return None
+    try:
+        writer.write(request)
+        head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), CLIENT_TIMEOUT)
+        lines = head.decode("latin-1").split("\r\n")
+        length = next((int(line.split(":", 1)[1]) for line in lines if line.lower().startswith("content-length:")), None)
+        # read exactly the body: a server that rejected us unread (503) may wait for us to hang up
+        if length is None:
+            await asyncio.wait_for(reader.read(), CLIENT_TIMEOUT)
+        else:
+            await asyncio.wait_for(reader.readexactly(length), CLIENT_TIMEOUT)
+        parts = lines[0].split()
+        return int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else None
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+        return None
+    finally:
+        writer.close()
+
+
+def _http10(method: str, path: str, body: bytes = b"") -> bytes:
+    return (f"{method} {path} HTTP/1.0\r\nHost: bench\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+
+
+async def _open_loop(port: int, path: str, body: bytes, rate: float, duration: float,
+                     probe_path: str) -> Dict[str, list]:
+    request, probe = _http10("POST", path, body), _http10("GET", probe_path)
+    loop = asyncio.get_running_loop()
+    results: Dict[str, list] = {"ok": [], "shed": [], "failed": [], "probe": []}
+    done = asyncio.Event()
+
+    async def one(scheduled: float) -> None:
+        status = await _send(port, request)
+        latency = loop.time() - scheduled  # from the scheduled send time: client backlog counts too
+        results["ok" if status == 200 else "shed" if status == 503 else "failed"].append(latency)
+
+    async def prober() -> None:
+        while not done.is_set():
+            t = loop.time()
+            await _send(port, probe)
+            results["probe"].append(loop.time() - t)
+            await asyncio.sleep(PROBE_INTERVAL)
+
+    probe_task = asyncio.ensure_future(prober())
+    tasks = []
+    t0 = loop.time() + 0.1
+    for i in range(int(rate * duration)):
+        scheduled = t0 + i / rate
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(one(scheduled)))
+    await asyncio.gather(*tasks)
+    done.set()
+    await probe_task
+    return results
+
+
+async def _closed_loop(port: int, request: bytes, concurrency: int, duration: float) -> float:
+    loop = asyncio.get_running_loop()
+    stop_at = loop.time() + duration
+    completed = [0]
+
+    async def client() -> None:
+        while loop.time() < stop_at:
+            if await _send(port, request) == 200:
+                completed[0] += 1
+
+    t0 = loop.time()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return completed[0] / (loop.time() - t0)
+
+
+def capacity(port: int, path: str, body: bytes, duration: float, concurrency: int = PREDICT_BATCH) -> float:
+    """Completed req/s with `concurrency` back-to-back clients (same client as open_loop, so same client cost)."""
+    request = _http10("POST", path, body)
+    asyncio.run(_closed_loop(port, request, concurrency, 1.0))  # warm-up
+    return asyncio.run(_closed_loop(port, request, concurrency, duration))
+
+
+def open_loop(port: int, path: str, body: bytes, rate: float, duration: float, slo: float,
+              probe_path: str) -> Dict[str, float]:
+    """Send POST `path` at `rate` req/s for `duration` s, whatever the server does."""
+    t0 = time.perf_counter()
+    results = asyncio.run(_open_loop(port, path, body, rate, duration, probe_path))
+    elapsed = max(time.perf_counter() - t0, duration)
+    ms = np.array(results["ok"]) * 1000.0 if results["ok"] else np.full(1, np.nan)
+    probe_ms = np.array(results["probe"]) * 1000.0 if results["probe"] else np.full(1, np.nan)
+    return {
+        "offered_rps": rate,
+        "goodput_rps": float(np.sum(ms <= slo * 1000.0)) / elapsed,
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "shed_rps": len(results["shed"]) / elapsed,
+        "failed": len(results["failed"]),
+        "fast_p99_ms": float(np.percentile(probe_ms, 99)),
+    }
+
+
+def bench_target(target: str, root: str, factors: List[float], duration: float, slo: float,
+                 concurrency: int, switch_interval_ms: float) -> Dict[str, Dict]:
+    results = {}
+    capacity_rps = None
+    for admission in (False, True):
+        proc, port = _start_server(target, root, admission, switch_interval_ms)
+        try:
+            path, body, probe_path = _workload(target, port)
+            if capacity_rps is None:
+                # measured once, on the unbounded server: both runs are offered the same rates
+                capacity_rps = capacity(port, path, body, max(2.0, duration / 2), concurrency)
+            for factor in factors:
+                label = f"{target}_x{factor:g}_{'admission' if admission else 'unbounded'}"
+                results[label] = dict(open_loop(port, path, body, capacity_rps * factor, duration, slo, probe_path),
+                                      capacity_rps=capacity_rps)
+                time.sleep(1.0)  # let the backlog drain before the next level
+        finally:
+            _stop(proc)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=TARGETS)
+    parser.add_argument("--factors", type=float, nargs="+", default=[2.0, 5.0],
+                        help="Offered load as multiples of the measured capacity")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds of offered load per run")
+    parser.add_argument("--slo-ms", type=float, default=500.0, help="A 200 slower than this is not goodput")
+    parser.add_argument("--concurrency", type=int, default=PREDICT_BATCH,
+                        help=f"Closed-loop clients for the capacity run (at least {PREDICT_BATCH}, one full batch)")
+    parser.add_argument("--switch-interval-ms", type=float, default=0.0,
+                        help="Server GIL switch interval for both runs (0 = Python default)")
+    parser.add_argument("--model-dir", default=HERE,
+                        help="Directory containing saved_models/; a seeded fixture is used if it has no NumPy weights")
+    parser.add_argument("--output", default=None, help="Write results JSON here")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.abspath(args.model_dir)
+        if not os.path.exists(os.path.join(root, inference.NUMPY_PATH)):
+            root = tmp
+            write_fixture(root)
+        results = {}
+        for target in args.targets:
+            results.update(bench_target(target, root, args.factors, args.duration, args.slo_ms / 1000.0,
+                                        max(args.concurrency, PREDICT_BATCH), args.switch_interval_ms))
+
+    print(f"{'run':>42} {'offered/s':>10} {'goodput/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'shed/s':>8} "
+          f"{'failed':>7} {'fast p99':>9}")
+    for name, r in results.items():
+        print(f"{name:>42} {r['offered_rps']:>10.1f} {r['goodput_rps']:>10.1f} {r['p50_ms']:>9.1f} "
+              f"{r['p99_ms']:>9.1f} {r['shed_rps']:>8.1f} {r['failed']:>7} {r['fast_p99_ms']:>9.1f}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Throughput / latency benchmark for the /predict path.
+
+Reports, per batch size:
+  - direct: one predict_inputs() call on N rows (what /predict/batch does)
+  - batcher: N concurrent clients going through MicroBatcher (what /predict does)
+
+With --compare-backends, instead compares the Keras and NumPy backends:
+cold start (fresh interpreter: import + load + first prediction) and
+per-request latency of predict_plan_from_payload.
+
+With --serialization, instead times encoding results to a JSON body (no
+model needed): Flask's jsonify-equivalent json.dumps vs encode_results with
+the stdlib fallback and with orjson.
+
+Usage (after `python mindpulse_service.py --train` and `--export-numpy`):
+  python bench_predict.py
+  python bench_predict.py --sizes 1 8 32 --requests 2000 --backend numpy
+  python bench_predict.py --compare-backends
+  python bench_predict.py --serialization
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import threading
+import time
+from typing import List
+
+import numpy as np
+
+import mindpulse_inference
+from mindpulse_inference import NUM_PLANS, _result, encode_results, map_probs_to_plan
+from mindpulse_service import (
+    PERSONALITY_LIST,
+    MicroBatcher,
+    load_serving_backend,
+    predict_inputs,
+    predict_plan_from_payload,
+)
+
+SAMPLE_PAYLOAD = {"social_media_hours": 2, "texting_hours": 3, "personality": "owl"}
+
+COLD_START_SNIPPET = (
+    "from mindpulse_service import load_serving_backend, predict_plan_from_payload\n"
+    "m, s = load_serving_backend({backend!r})\n"
+    "predict_plan_from_payload({payload!r}, m, s)\n"
+)
+
+
+def _random_inputs(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return [
+        (float(rng.uniform(0, 12)), float(rng.uniform(0, 10)),
+         PERSONALITY_LIST[int(rng.integers(0, len(PERSONALITY_LIST)))])
+        for _ in range(n)
+    ]
+
+
+def _p99_ms(latencies: List[float]) -> float:
+    return float(np.percentile(latencies, 99) * 1000.0)
+
+
+def bench_direct(model, scaler, sizes: List[int], requests: int) -> None:
+    print("\n[direct] one forward pass per batch")
+    print(f"{'batch':>6} {'rows/sec':>12} {'p99 ms/call':>12}")
+    for size in sizes:
+        inputs = _random_inputs(size)
+        predict_inputs(inputs, model, scaler)  # warm-up
+        calls = max(1, requests // size)
+        latencies = []
+        t0 = time.perf_counter()
+        for _ in range(calls):
+            t = time.perf_counter()
+            predict_inputs(inputs, model, scaler)
+            latencies.append(time.perf_counter() - t)
+        elapsed = time.perf_counter() - t0
+        print(f"{size:>6} {calls * size / elapsed:>12.1f} {_p99_ms(latencies):>12.2f}")
+
+
+def bench_batcher(model, scaler, sizes: List[int], requests: int, max_wait_ms: float) -> None:
+    print(f"\n[batcher] concurrent clients = max batch size, max_wait_ms={max_wait_ms}")
+    print(f"{'batch':>6} {'req/sec':>12} {'p99 ms/req':>12} {'mean batch':>11}")
+    for size in sizes:
+        batcher = MicroBatcher(lambda items: predict_inputs(items, model, scaler),
+                               max_batch_size=size, max_wait_ms=max_wait_ms)
+        batcher.submit(_random_inputs(1)[0])  # warm-up
+        batcher.batch_sizes.clear()
+
+        per_client = max(1, requests // size)
+        latencies: List[float] = []
+        lock = threading.Lock()
+
+        def client(seed: int) -> None:
+            local = []
+            for item in _random_inputs(per_client, seed):
+                t = time.perf_counter()
+                batcher.submit(item)
+                local.append(time.perf_counter() - t)
+            with lock:
+                latencies.extend(local)
+
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(size)]
+        t0 = time.perf_counter()
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+        elapsed = time.perf_counter() - t0
+
+        passes = sum(batcher.batch_sizes.values())
+        mean_batch = sum(k * v for k, v in batcher.batch_sizes.items()) / max(1, passes)
+        print(f"{size:>6} {len(latencies) / elapsed:>12.1f} {_p99_ms(latencies):>12.2f} {mean_batch:>11.1f}")
+
+
+def bench_backends(requests: int, cold_runs: int) -> None:
+    print("\n[backends] cold start and per-request latency")
+    print(f"{'backend':>8} {'cold start s':>13} {'p50 ms/req':>11} {'p99 ms/req':>11}")
+    for backend in ("keras", "numpy"):
+        cold = []
+        for _ in range(cold_runs):
+            code = COLD_START_SNIPPET.format(backend=backend, payload=SAMPLE_PAYLOAD)
+            t = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], check=True, capture_output=True)
+            cold.append(time.perf_counter() - t)
+
+        model, scaler = load_serving_backend(backend)
+        predict_plan_from_payload(SAMPLE_PAYLOAD, model, scaler)  # warm-up
+        latencies = []
+        for _ in range(requests):
+            t = time.perf_counter()
+            predict_plan_from_payload(SAMPLE_PAYLOAD, model, scaler)
+            latencies.append(time.perf_counter() - t)
+        p50 = float(np.percentile(latencies, 50) * 1000.0)
+        print(f"{backend:>8} {min(cold):>13.2f} {p50:>11.3f} {_p99_ms(latencies):>11.3f}")
+
+
+def _random_results(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    probs = rng.dirichlet(np.ones(NUM_PLANS), size=n).astype(np.float32)
+    return [_result(inputs, p.tolist(), map_probs_to_plan(p)) for inputs, p in zip(_random_inputs(n, seed), probs)]
+
+
+def bench_serialization(sizes: List[int], requests: int) -> None:
+    print("\n[serialization] JSON body per response / batch")
+    print(f"{'batch':>6} {'encoder':>10} {'us/call':>10} {'us/result':>10}")
+    jsonify_like = lambda results: json.dumps({"results": results}, sort_keys=True,
+                                              separators=(",", ":")).encode("utf-8")
+    orjson = mindpulse_inference.orjson
+    encoders = [("json.dumps", jsonify_like), ("stdlib", encode_results)]
+    if orjson is not None:
+        encoders.append(("orjson", encode_results))
+    for size in sizes:
+        results = _random_results(size)
+        calls = max(1, requests // size)
+        for name, encode in encoders:
+            mindpulse_inference.orjson = orjson if name.startswith("orjson") else None
+            encode(results)  # warm-up
+            t0 = time.perf_counter()
+            for _ in range(calls):
+                encode(results)
+            per_call = (time.perf_counter() - t0) / calls * 1e6
+            print(f"{size:>6} {name:>10} {per_call:>10.1f} {per_call / size:>10.2f}")
+    mindpulse_inference.orjson = orjson
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--requests", type=int, default=1000, help="Rows scored per batch size")
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument("--backend", choices=["auto", "numpy", "keras"], default="auto")
+    parser.add_argument("--compare-backends", action="store_true")
+    parser.add_argument("--cold-runs", type=int, default=3, help="Fresh-interpreter runs per backend")
+    parser.add_argument("--serialization", action="store_true")
+    args = parser.parse_args()
+
+    if args.serialization:
+        bench_serialization(args.sizes, max(args.requests, 20_000))
+        return
+
+    if args.compare_backends:
+        bench_backends(args.requests, args.cold_runs)
+        return
+
+    model, scaler = load_serving_backend(args.backend)
+    bench_direct(model, scaler, args.sizes, args.requests)
+    bench_batcher(model, scaler, args.sizes, args.requests, args.max_wait_ms)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Load-test harness for `mindpulse_service.py --serve --workers N`.
+
+For each worker count it starts the pre-fork server on a free port, drives
+/predict with a fixed number of concurrent clients for a fixed duration and
+reports requests/sec, p50/p99 latency and per-worker memory (Linux only:
+USS = private pages, PSS = proportional share), so you can check that
+throughput scales with cores while per-worker RSS stays flat.
+
+Admission control is set explicitly (--max-concurrency, default 0 = off), and
+503 responses are counted as `shed`, apart from `errors` (other statuses,
+timeouts and connection errors).
+
+Usage (after `python mindpulse_service.py --train` and `--export-numpy`):
+  python bench_serve.py
+  python bench_serve.py --workers 1 2 4 8 --concurrency 64 --duration 15
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SAMPLE_PAYLOAD = {"social_media_hours": 2, "texting_hours": 3, "personality": "owl"}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_healthy(port: int, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not become healthy")
+
+
+def http_load(port: int, concurrency: int, duration: float, path: str = "/predict",
+              payload: Dict = None) -> Dict[str, float]:
+    """Hammer POST `path` from `concurrency` threads for `duration` seconds (503s count as shed, not errors)."""
+    body = json.dumps(payload if payload is not None else SAMPLE_PAYLOAD)
+    headers = {"Content-Type": "application/json"}
+    latencies: List[float] = []
+    errors = [0]
+    shed = [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client() -> None:
+        local, failed, rejected = [], 0, 0
+        while time.monotonic() < stop_at:
+            t = time.perf_counter()
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+                conn.request("POST", path, body=body, headers=headers)
+                resp = conn.getresponse()
+                resp.read()
+                conn.close()
+                if resp.status == 503:
+                    rejected += 1
+                    continue
+                if resp.status != 200:
+                    failed += 1
+                    continue
+            except OSError:
+                failed += 1
+                continue
+            local.append(time.perf_counter() - t)
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+            shed[0] += rejected
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    t0 = time.perf_counter()
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    elapsed = time.perf_counter() - t0
+
+    ms = np.array(latencies) * 1000.0 if latencies else np.zeros(1)
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "errors": errors[0],
+        "shed": shed[0],
+    }
+
+
+def _children(pid: int) -> List[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(c) for c in f.read().split()]
+    except OSError:
+        return []
+
+
+def _memory_mb(pid: int) -> Dict[str, float]:
+    """USS/PSS of a process from /proc/<pid>/smaps_rollup, in MB (empty off Linux)."""
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1])
+    except OSError:
+        return {}
+    uss = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return {"uss_mb": uss / 1024.0, "pss_mb": fields.get("Pss", 0) / 1024.0}
+
+
+def bench_workers(workers: int, args) -> Dict[str, float]:
+    port = _free_port()
+    cmd = [sys.executable, os.path.join(HERE, "mindpulse_service.py"), "--serve",
+           "--workers", str(workers), "--host", "127.0.0.1", "--port", str(port),
+           "--backend", args.backend, "--max-batch-size", str(args.max_batch_size),
+           "--max-concurrency", str(args.max_concurrency)]
+    proc = subprocess.Popen(cmd, cwd=HERE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait_healthy(port)
+        http_load(port, args.concurrency, 1.0)  # warm-up
+        result = http_load(port, args.concurrency, args.duration)
+        mems = [m for m in (_memory_mb(pid) for pid in _children(proc.pid)) if m]
+        if mems:
+            result["worker_uss_mb"] = sum(m["uss_mb"] for m in mems) / len(mems)
+            result["worker_pss_mb"] = sum(m["pss_mb"] for m in mems) / len(mems)
+        return result
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main() -> None:
+    cores = os.cpu_count() or 1
+    default_workers = sorted({1, 2, 4, 8, 16, cores} & set(range(1, cores + 1)))
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per worker count")
+    parser.add_argument("--backend", choices=["auto", "numpy", "keras"], default="numpy")
+    parser.add_argument("--max-batch-size", type=int, default=1)
+    parser.add_argument("--max-concurrency", type=int, default=0,
+                        help="Server admission gate per worker (0 = off; see mindpulse_service.py --help)")
+    args = parser.parse_args()
+
+    print(f"{'workers':>7} {'req/sec':>10} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'shed':>7} "
+          f"{'USS MB/w':>9} {'PSS MB/w':>9}")
+    base = None
+    for workers in args.workers:
+        r = bench_workers(workers, args)
+        base = base or r["rps"]
+        print(f"{workers:>7} {r['rps']:>10.1f} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['errors']:>7} "
+              f"{r['shed']:>7} "
+              f"{r.get('worker_uss_mb', float('nan')):>9.1f} {r.get('worker_pss_mb', float('nan')):>9.1f}"
+              f"   x{r['rps'] / base:.2f}")
+
+
+if __name__ == "__main__":
+    main()
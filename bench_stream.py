@@ -0,0 +1,165 @@
+"""
+Polling vs push benchmark for watched timers.
+
+Starts `uvicorn main:app` in a subprocess, creates --timers long-running
+timers, then for --window seconds either
+  - poll: GETs /status/{id} for every timer once per second (what the old
+    /ui did), over --connections keep-alive connections, or
+  - push: holds --connections multiplexed /stream?ids=... SSE connections
+    with the given --tick,
+and reports server CPU % (from /proc/<pid>/stat) and the HTTP request rate.
+
+Usage:
+  python bench_stream.py
+  python bench_stream.py --timers 10000 --connections 100 --tick 10 --window 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    # utime and stime are fields 14 and 15 of /proc/<pid>/stat
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def _request(reader, writer, method: str, path: str, body: bytes = b"") -> Tuple[int, bytes]:
+    head = (f"{method} {path} HTTP/1.1\r\nHost: bench\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n")
+    writer.write(head.encode() + body)
+    await writer.drain()
+    status_line = await reader.readline()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return int(status_line.split()[1]), await reader.readexactly(length)
+
+
+async def _create_timers(port: int, count: int, connections: int) -> List[str]:
+    ids: List[str] = []
+
+    async def worker(n: int) -> None:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        for _ in range(n):
+            _, body = await _request(reader, writer, "POST", "/start", json.dumps({"minutes": 60}).encode())
+            ids.append(json.loads(body)["id"])
+        writer.close()
+
+    per = -(-count // connections)
+    await asyncio.gather(*(worker(min(per, count - i * per)) for i in range(connections) if count > i * per))
+    return ids
+
+
+async def _poll(port: int, ids: List[str], connections: int, window: float) -> int:
+    done = 0
+    stop_at = time.monotonic() + window
+
+    async def worker(chunk: List[str]) -> None:
+        nonlocal done
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        while time.monotonic() < stop_at:
+            round_start = time.monotonic()
+            for timer_id in chunk:
+                await _request(reader, writer, "GET", f"/status/{timer_id}")
+                done += 1
+            await asyncio.sleep(max(0.0, 1.0 - (time.monotonic() - round_start)))
+        writer.close()
+
+    await asyncio.gather(*(worker(ids[i::connections]) for i in range(connections)))
+    return done
+
+
+async def _push(port: int, ids: List[str], connections: int, window: float, tick: float) -> int:
+    events = 0
+
+    async def worker(chunk: List[str]) -> None:
+        nonlocal events
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET /stream?ids={','.join(chunk)}&tick={tick} HTTP/1.1\r\nHost: bench\r\n\r\n".encode())
+        await writer.drain()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.startswith(b"event:"):
+                    events += 1
+        finally:
+            writer.close()
+
+    tasks = [asyncio.ensure_future(worker(ids[i::connections])) for i in range(connections)]
+    await asyncio.sleep(window)
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return events
+
+
+async def _run(args, port: int, pid: int) -> None:
+    ids = await _create_timers(port, args.timers, min(args.connections, 50))
+    for mode in args.modes:
+        cpu0, t0 = _cpu_seconds(pid), time.perf_counter()
+        if mode == "poll":
+            requests = await _poll(port, ids, args.connections, args.window)
+            events = requests
+        else:
+            requests = args.connections
+            events = await _push(port, ids, args.connections, args.window, args.tick)
+        elapsed = time.perf_counter() - t0
+        cpu_pct = 100.0 * (_cpu_seconds(pid) - cpu0) / elapsed
+        print(f"{mode:>5} {len(ids):>8,} {cpu_pct:>12.1f} {requests / elapsed:>10.1f} {events / elapsed:>10.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--timers", type=int, default=10_000)
+    parser.add_argument("--connections", type=int, default=100)
+    parser.add_argument("--window", type=float, default=15.0)
+    parser.add_argument("--tick", type=float, default=10.0, help="Push-mode tick seconds (0 = changes only)")
+    parser.add_argument("--modes", nargs="+", choices=["poll", "push"], default=["poll", "push"])
+    args = parser.parse_args()
+
+    port = _free_port()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+                             "--log-level", "warning"], cwd=HERE)
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.2)
+        print(f"{'mode':>5} {'timers':>8} {'server CPU %':>12} {'req/sec':>10} {'events/s':>10}")
+        asyncio.run(_run(args, port, proc.pid))
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,449 @@
+"""
+Reproducible benchmark suite for the prediction path.
+
+Cases (each reports p50/p95/p99 latency, ops/sec and RSS):
+  build_features             training feature pipeline on 10k-row frames (needs pandas + sklearn)
+  map_probs_to_plan          softmax row -> plan dict
+  predict_plan_from_payload  one /predict payload, parse to plan
+  predict_batch_64           predict_inputs on 64 rows (what /predict/batch does)
+  cold_load_numpy            fresh interpreter: import + load_serving_backend("numpy") + first prediction
+  cold_load_keras            same through load_model_and_scaler (skipped without a trained model + TensorFlow)
+  http_c<N>                  `mindpulse_service.py --serve --workers 1` driven at concurrency N
+                             (admission control off: the request path, not the gate, is measured)
+  metrics_overhead           predict_plan_from_payload with stage metrics on vs off; fails the
+                             run if recording costs more than METRICS_OVERHEAD_BUDGET
+  score                      `--score` over a SCORE_ROWS-row synthetic CSV in-process (rows/s vs
+                             mindpulse_score.SCORE_TARGET_ROWS_PER_SEC; needs pandas)
+  reload                     `--serve --registry` at the highest --concurrency, steady vs while the
+                             served version flips every RELOAD_INTERVAL; fails the run on any
+                             failed or shed (503) request during the reloads
+  variant_<precision>        predict_batch_64 on the float32/float16/int8 (`--quantize`) weights,
+                             plus artifact bytes, cold load and plan agreement (needs pandas)
+
+Runs offline and is deterministic: inputs are seeded, and unless
+--model-dir already holds exported NumPy weights, a NumpyPlanner fixture
+with seeded random weights (the layer shapes of build_model) is written to a
+temp dir and served from there.
+
+Results are written as JSON (--output). --baseline compares against an
+earlier file and exits 1 if any case's p50 grew, or its ops/sec fell, by more
+than --threshold (a fraction).
+
+Usage:
+  python bench_suite.py --output bench.json
+  python bench_suite.py --baseline bench.json --threshold 0.15
+  python bench_suite.py --cases map_probs_to_plan predict_batch_64 --quick
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+import mindpulse_inference as inference
+import mindpulse_metrics as metrics
+from mindpulse_registry import ModelRegistry
+from bench_serve import SAMPLE_PAYLOAD, _children, _free_port, _wait_healthy, http_load
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SEED = 0
+# Hidden layer widths of mindpulse_service.build_model
+FIXTURE_LAYERS = [2 + inference.NUM_PERSONALITIES, 64, 32, 16, inference.NUM_PLANS]
+
+CASES = ["build_features", "map_probs_to_plan", "predict_plan_from_payload", "predict_batch_64",
+         "cold_load_numpy", "cold_load_keras", "http", "metrics_overhead", "score", "reload", "variants"]
+
+# Max share of in-process predict_plan_from_payload time that stage metrics may add.
+METRICS_OVERHEAD_BUDGET = 0.05
+# Rows in the synthetic cohort scored by the score case.
+SCORE_ROWS = 1_000_000
+# Seconds between version flips in the reload case (the server's watcher polls every 1 s).
+RELOAD_INTERVAL = 0.5
+
+COLD_LOAD_SNIPPET = (
+    "import mindpulse_inference as m\n"
+    "model, scaler = m.{loader}\n"
+    "m.predict_plan_from_payload({payload!r}, model, scaler)\n"
+)
+
+
+# ---------------------------
+# Fixture model
+# ---------------------------
+def write_fixture(root: str, seed: int = SEED) -> str:
+    """Seeded NumpyPlanner weights at <root>/saved_models/, laid out like --export-numpy."""
+    rng = np.random.default_rng(seed)
+    weights = [rng.normal(0, np.sqrt(2.0 / n_in), (n_in, n_out))
+               for n_in, n_out in zip(FIXTURE_LAYERS, FIXTURE_LAYERS[1:])]
+    biases = [rng.normal(0, 0.05, n_out) for n_out in FIXTURE_LAYERS[1:]]
+    activations = ["relu"] * (len(weights) - 1) + ["softmax"]
+    scaler_mean = np.r_[4.0, 2.5, np.full(inference.NUM_PERSONALITIES, 1.0 / inference.NUM_PERSONALITIES)]
+    scaler_scale = np.r_[2.0, 1.5, np.full(inference.NUM_PERSONALITIES, 0.35)]
+    path = os.path.join(root, inference.NUMPY_PATH)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    inference.save_numpy_weights(path, weights, biases, activations, scaler_mean, scaler_scale)
+    return path
+
+
+# ---------------------------
+# Measurement helpers
+# ---------------------------
+def _rss_mb(pid: str = "self") -> float:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0  # peak, not current
+
+
+def _summary(latencies: List[float], ops_per_call: int = 1, rss_mb: Optional[float] = None) -> Dict[str, float]:
+    ms = np.asarray(latencies) * 1000.0
+    return {
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "ops_per_s": ops_per_call * len(ms) / (ms.sum() / 1000.0),
+        "rss_mb": _rss_mb() if rss_mb is None else rss_mb,
+    }
+
+
+def _time_calls(fn: Callable[[], object], iterations: int, ops_per_call: int = 1) -> Dict[str, float]:
+    for _ in range(max(1, iterations // 10)):  # warm-up
+        fn()
+    latencies = []
+    for _ in range(iterations):
+        t = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t)
+    return _summary(latencies, ops_per_call)
+
+
+def _random_inputs(n: int, seed: int = SEED):
+    rng = np.random.default_rng(seed)
+    return [(float(rng.uniform(0, 12)), float(rng.uniform(0, 10)),
+             inference.PERSONALITY_LIST[int(rng.integers(0, inference.NUM_PERSONALITIES))])
+            for _ in range(n)]
+
+
+# ---------------------------
+# Cases
+# ---------------------------
+def bench_build_features(iterations: int) -> Dict[str, float]:
+    from mindpulse_inference import build_features
+    from mindpulse_service import generate_synthetic_wisam_data
+
+    df = generate_synthetic_wisam_data(10_000, seed=SEED)
+    _, scaler = build_features(df)
+    return _time_calls(lambda: build_features(df, scaler), iterations, ops_per_call=len(df))
+
+
+def bench_map_probs_to_plan(iterations: int) -> Dict[str, float]:
+    probs = np.random.default_rng(SEED).dirichlet(np.ones(inference.NUM_PLANS), size=256).astype(np.float32)
+    rows = iter(probs[i % len(probs)] for i in range(10 ** 9))
+    return _time_calls(lambda: inference.map_probs_to_plan(next(rows)), iterations)
+
+
+def bench_predict_plan_from_payload(model, scaler, iterations: int) -> Dict[str, float]:
+    payloads = [{"social_media_hours": s, "texting_hours": t, "personality": p} for s, t, p in _random_inputs(256)]
+    rows = iter(payloads[i % len(payloads)] for i in range(10 ** 9))
+    return _time_calls(lambda: inference.predict_plan_from_payload(next(rows), model, scaler), iterations)
+
+
+def bench_predict_batch(model, scaler, iterations: int, size: int = 64) -> Dict[str, float]:
+    inputs = _random_inputs(size)
+    return _time_calls(lambda: inference.predict_inputs(inputs, model, scaler), iterations, ops_per_call=size)
+
+
+def bench_metrics_overhead(model, iterations: int, rounds: int = 5) -> Dict[str, float]:
+    """Median p50 with metrics on vs off over alternating rounds (reduces drift between the two)."""
+    p50 = {True: [], False: []}
+    for _ in range(rounds):
+        for enabled in (False, True):
+            metrics.ENABLED = enabled
+            p50[enabled].append(bench_predict_plan_from_payload(model, None, iterations)["p50_ms"])
+    metrics.ENABLED = True
+    on, off = float(np.median(p50[True])), float(np.median(p50[False]))
+    return {"p50_on_ms": on, "p50_off_ms": off, "overhead_us": (on - off) * 1000.0,
+            "overhead_pct": 100.0 * (on - off) / off, "budget_pct": 100.0 * METRICS_OVERHEAD_BUDGET}
+
+
+def bench_cold_load(root: str, backend: str, runs: int, variant: str = "float32") -> Dict[str, float]:
+    loader = f'load_serving_backend("numpy", "{variant}")' if backend == "numpy" else "load_model_and_scaler()"
+    code = COLD_LOAD_SNIPPET.format(loader=loader, payload=SAMPLE_PAYLOAD)
+    env = dict(os.environ, PYTHONPATH=HERE)
+    latencies = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=root, env=env, check=True, capture_output=True)
+        latencies.append(time.perf_counter() - t)
+    # peak RSS of the largest child so far (Linux reports ru_maxrss in KB)
+    return _summary(latencies, rss_mb=resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024.0)
+
+
+def bench_variants(root: str, iterations: int, cold_runs: int) -> Dict[str, Dict[str, float]]:
+    """Quantize a copy of root's float32 weights, then time each variant the same way."""
+    import contextlib
+    import io
+
+    from mindpulse_service import export_quantized
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copytree(os.path.join(root, inference.MODEL_DIR), os.path.join(tmp, inference.MODEL_DIR))
+        src = os.path.join(tmp, inference.NUMPY_PATH)
+        for variant in inference.MODEL_VARIANTS:
+            path = os.path.join(tmp, inference.variant_path(variant))
+            agreement = 1.0
+            if variant != "float32":
+                with contextlib.redirect_stdout(io.StringIO()):
+                    agreement = export_quantized(variant, src=src, out_path=path, min_agreement=0.0)
+            result = bench_predict_batch(inference.NumpyPlanner.load(path), None, max(10, iterations // 10))
+            result.update(bytes=os.path.getsize(path), agreement=agreement,
+                          cold_load_p50_ms=bench_cold_load(tmp, "numpy", cold_runs, variant)["p50_ms"])
+            results[f"variant_{variant}"] = result
+    return results
+
+
+def bench_http(root: str, concurrency: List[int], duration: float) -> Dict[str, Dict[str, float]]:
+    port = _free_port()
+    cmd = [sys.executable, os.path.join(HERE, "mindpulse_service.py"), "--serve", "--workers", "1",
+           "--host", "127.0.0.1", "--port", str(port), "--backend", "numpy", "--max-concurrency", "0"]
+    proc = subprocess.Popen(cmd, cwd=root, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    results = {}
+    try:
+        _wait_healthy(port)
+        http_load(port, max(concurrency), 1.0)  # warm-up
+        for level in concurrency:
+            r = http_load(port, level, duration)
+            rss = sum(_rss_mb(str(pid)) for pid in [proc.pid] + _children(proc.pid))
+            results[f"http_c{level}"] = {"p50_ms": r["p50_ms"], "p95_ms": r["p95_ms"], "p99_ms": r["p99_ms"],
+                                         "ops_per_s": r["rps"], "rss_mb": rss, "errors": r["errors"],
+                                         "shed": r["shed"]}
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    return results
+
+
+def bench_score(root: str, rows: int) -> Dict[str, float]:
+    """Bulk-score a synthetic cohort CSV into .npz parts in this process (workers=0: per-core rate)."""
+    from mindpulse_score import SCORE_TARGET_ROWS_PER_SEC, score_file
+    from mindpulse_service import iter_synthetic_wisam_data
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "cohort.csv")
+        for i, df in enumerate(iter_synthetic_wisam_data(rows, seed=SEED)):
+            df.drop(columns="label").to_csv(csv_path, mode="a", header=i == 0, index=False)
+        os.chdir(root)  # load_serving_backend reads ./saved_models
+        try:
+            summary = score_file(csv_path, os.path.join(tmp, "scores"), backend="numpy", workers=0)
+        finally:
+            os.chdir(cwd)
+    return {"rows": summary["rows"], "rows_per_s": summary["rows_per_s"],
+            "target_rows_per_s": SCORE_TARGET_ROWS_PER_SEC, "rss_mb": _rss_mb()}
+
+
+def bench_reload(concurrency: int, duration: float) -> Dict[str, Dict[str, float]]:
+    """Same load twice: with a fixed model, then while the registry's CURRENT keeps changing."""
+    tmp = tempfile.mkdtemp(prefix="bench-reload-")
+    registry = ModelRegistry(os.path.join(tmp, "registry"))
+    versions = [registry.publish("numpy", {"weights": write_fixture(os.path.join(tmp, f"seed{seed}"), seed)})
+                for seed in (SEED, SEED + 1)]
+    registry.pin(versions[0])
+    port = _free_port()
+    cmd = [sys.executable, os.path.join(HERE, "mindpulse_service.py"), "--serve", "--workers", "1",
+           "--host", "127.0.0.1", "--port", str(port), "--registry", registry.root, "--max-concurrency", "0"]
+    proc = subprocess.Popen(cmd, cwd=tmp, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    results = {}
+    try:
+        _wait_healthy(port)
+        http_load(port, concurrency, 1.0)  # warm-up
+        for name, reloading in (("http_reload_steady", False), ("http_reload", True)):
+            load: Dict[str, float] = {}
+            loader = threading.Thread(target=lambda: load.update(http_load(port, concurrency, duration)))
+            loader.start()
+            flips = 0
+            while reloading and loader.is_alive():
+                loader.join(RELOAD_INTERVAL)
+                if loader.is_alive():
+                    flips += 1
+                    registry.pin(versions[flips % 2])
+            loader.join()
+            results[name] = {"p50_ms": load["p50_ms"], "p95_ms": load["p95_ms"], "p99_ms": load["p99_ms"],
+                             "ops_per_s": load["rps"], "rss_mb": _rss_mb(str(proc.pid)),
+                             "errors": load["errors"], "shed": load["shed"], "version_flips": flips}
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        shutil.rmtree(tmp, ignore_errors=True)
+    return results
+
+
+# ---------------------------
+# Baseline comparison
+# ---------------------------
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Regression messages for cases present in both runs."""
+    regressions = []
+    for name, new in current["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if not old or "p50_ms" not in old or "p50_ms" not in new:
+            continue
+        if new["p50_ms"] > old["p50_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p50 {old['p50_ms']:.3f} -> {new['p50_ms']:.3f} ms")
+        if new["ops_per_s"] < old["ops_per_s"] * (1 - threshold):
+            regressions.append(f"{name}: ops/s {old['ops_per_s']:.1f} -> {new['ops_per_s']:.1f}")
+    return regressions
+
+
+def _meta(model_source: str) -> Dict[str, str]:
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                             capture_output=True, text=True).stdout.strip()
+    except OSError:
+        rev = ""
+    return {
+        "git_rev": rev,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "json_encoder": inference.JSON_ENCODER,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "model": model_source,
+        "seed": SEED,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=CASES)
+    parser.add_argument("--model-dir", default=HERE,
+                        help="Directory containing saved_models/; a seeded fixture is used if it has no NumPy weights")
+    parser.add_argument("--iterations", type=int, default=5000, help="Timed calls per in-process case")
+    parser.add_argument("--cold-runs", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds of load per concurrency level")
+    parser.add_argument("--quick", action="store_true", help="Fewer iterations and shorter HTTP runs")
+    parser.add_argument("--output", default=None, help="Write results JSON here")
+    parser.add_argument("--baseline", default=None, help="Results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+    if args.quick:
+        args.iterations, args.cold_runs, args.duration = 500, 2, 1.0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.abspath(args.model_dir)
+        if os.path.exists(os.path.join(root, inference.NUMPY_PATH)):
+            model_source = os.path.join(root, inference.NUMPY_PATH)
+        else:
+            root = tmp
+            write_fixture(root)
+            model_source = f"fixture(seed={SEED})"
+        model = inference.NumpyPlanner.load(os.path.join(root, inference.NUMPY_PATH))
+
+        results: Dict[str, Dict] = {}
+        for case in args.cases:
+            if case == "build_features":
+                try:
+                    results[case] = bench_build_features(max(10, args.iterations // 100))
+                except ImportError as e:
+                    results[case] = {"skipped": str(e)}
+            elif case == "map_probs_to_plan":
+                results[case] = bench_map_probs_to_plan(args.iterations)
+            elif case == "predict_plan_from_payload":
+                results[case] = bench_predict_plan_from_payload(model, None, args.iterations)
+            elif case == "predict_batch_64":
+                results[case] = bench_predict_batch(model, None, max(10, args.iterations // 10))
+            elif case == "cold_load_numpy":
+                results[case] = bench_cold_load(root, "numpy", args.cold_runs)
+            elif case == "cold_load_keras":
+                try:
+                    results[case] = bench_cold_load(root, "keras", args.cold_runs)
+                except subprocess.CalledProcessError:
+                    results[case] = {"skipped": "no trained Keras model or TensorFlow not installed"}
+            elif case == "http":
+                results.update(bench_http(root, args.concurrency, args.duration))
+            elif case == "metrics_overhead":
+                results[case] = bench_metrics_overhead(model, args.iterations)
+            elif case == "score":
+                try:
+                    results[case] = bench_score(root, SCORE_ROWS // 10 if args.quick else SCORE_ROWS)
+                except ImportError as e:
+                    results[case] = {"skipped": str(e)}
+            elif case == "reload":
+                results.update(bench_reload(max(args.concurrency), max(args.duration, 4 * RELOAD_INTERVAL)))
+            elif case == "variants":
+                try:
+                    results.update(bench_variants(root, args.iterations, args.cold_runs))
+                except ImportError as e:
+                    results[case] = {"skipped": str(e)}
+
+    report = {"meta": _meta(model_source), "results": results}
+    print(f"{'case':>26} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/sec':>12} {'RSS MB':>8}")
+    for name, r in results.items():
+        if "skipped" in r:
+            print(f"{name:>26}  skipped: {r['skipped']}")
+            continue
+        if name == "score":
+            print(f"{name:>26}  {r['rows_per_s']:,.0f} rows/s over {r['rows']:,} rows "
+                  f"(target {r['target_rows_per_s']:,}), RSS {r['rss_mb']:.1f} MB")
+            continue
+        if name == "metrics_overhead":
+            print(f"{name:>26}  {r['overhead_us']:+.2f} us/request ({r['overhead_pct']:+.1f}%, "
+                  f"budget {r['budget_pct']:.0f}%)")
+            continue
+        print(f"{name:>26} {r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f} {r['p99_ms']:>9.3f} "
+              f"{r['ops_per_s']:>12.1f} {r['rss_mb']:>8.1f}")
+        if name.startswith("variant_"):
+            print(f"{'':>26}  {r['bytes']:,} bytes, cold load p50 {r['cold_load_p50_ms']:.1f} ms, "
+                  f"plan agreement {r['agreement']:.4f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+
+    reload = results.get("http_reload", {})
+    if reload.get("errors", 0) or reload.get("shed", 0):
+        print(f"{reload['errors']} request(s) failed and {reload['shed']} were shed (503) "
+              f"while the model was reloading")
+        sys.exit(1)
+
+    overhead = results.get("metrics_overhead", {})
+    if overhead.get("overhead_pct", 0.0) > overhead.get("budget_pct", 100.0):
+        print("Metrics overhead exceeds its budget")
+        sys.exit(1)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} vs {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+CPU / memory benchmark for the timer engine.
+
+Each case runs in a fresh interpreter: create N live timers (long enough not
+to finish), let the event loop idle for --window seconds, and report
+  - create_ms: time to create + start all timers
+  - cpu_pct:   process CPU time during the idle window / wall time
+  - mem_mb:    RSS growth from creating the timers (and bytes per timer)
+  - poll_us:   mean latency of one status poll (get_timer)
+for the current engine ("heap": shared scheduler, slotted records) and the
+previous one ("legacy": one task per timer waking every second, 7-key dict
+records copied on every poll), reproduced below for comparison.
+
+With --stores, instead measures persistence: create throughput with a
+timer_store backend attached (group commit included) and the time to
+recover all records into a fresh engine.
+
+With --workers, instead starts `main.py --workers N` (timers sharded across
+N processes) for each N and drives it over HTTP from --clients client
+processes: /start throughput, then /status on random ids from all shards
+(so most of them are forwarded to the owning worker). Throughput can only
+scale with N up to the number of free cores (clients need some too).
+
+Usage:
+  python bench_timer.py
+  python bench_timer.py --counts 1000 100000 --window 5 --impls heap
+  python bench_timer.py --stores wal sqlite --counts 1000000
+  python bench_timer.py --workers 1 2 4 --clients 4 --duration 5
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+import timer
+import timer_store
+
+
+# ---------------------------
+# Legacy engine: dict records, one asyncio task per timer waking every second
+# ---------------------------
+_legacy_timers = {}
+
+
+def _legacy_create(minutes: float) -> str:
+    timer_id = str(uuid.uuid4())
+    duration_seconds = int(max(0, minutes) * 60)
+    _legacy_timers[timer_id] = {
+        "id": timer_id,
+        "status": "created",
+        "duration_seconds": duration_seconds,
+        "remaining_seconds": duration_seconds,
+        "started_at": time.time(),
+        "finished_at": None,
+        "cancelled": False,
+    }
+    return timer_id
+
+
+def _legacy_get(timer_id: str) -> dict:
+    t = _legacy_timers.get(timer_id)
+    if t["status"] in ("running", "created"):
+        now = time.time()
+        remaining = max(0, t["duration_seconds"] - int(now - t["started_at"]))
+        t["remaining_seconds"] = remaining
+        if remaining == 0:
+            t["status"] = "finished"
+            t["finished_at"] = time.time()
+    return dict(t)
+
+
+async def _legacy_runner(timer_id: str) -> None:
+    t = _legacy_timers.get(timer_id)
+    end_at = t["started_at"] + t["duration_seconds"]
+    while True:
+        if t.get("cancelled"):
+            t["status"] = "cancelled"
+            break
+        remaining = int(max(0, end_at - time.time()))
+        t["remaining_seconds"] = remaining
+        if remaining <= 0:
+            t["status"] = "finished"
+            t["finished_at"] = time.time()
+            break
+        await asyncio.sleep(min(1, remaining))
+
+
+def _legacy_start(timer_id: str):
+    _legacy_timers[timer_id]["status"] = "running"
+    return asyncio.create_task(_legacy_runner(timer_id))
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * 4096 / (1024 * 1024)
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+async def _run_case(impl: str, count: int, window: float, polls: int = 100_000) -> dict:
+    if impl == "legacy":
+        create, start, get = _legacy_create, _legacy_start, _legacy_get
+    else:
+        create, start, get = timer.create_timer, timer.start_background, timer.get_timer
+    rss0 = _rss_mb()
+    t0 = time.perf_counter()
+    ids = []
+    for _ in range(count):
+        timer_id = create(60)
+        start(timer_id)
+        ids.append(timer_id)
+    create_ms = (time.perf_counter() - t0) * 1000.0
+    await asyncio.sleep(0)
+    mem_mb = _rss_mb() - rss0
+
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    await asyncio.sleep(window)
+    cpu_pct = 100.0 * (time.process_time() - cpu0) / (time.perf_counter() - wall0)
+
+    sample = [random.choice(ids) for _ in range(polls)]
+    t0 = time.perf_counter()
+    for timer_id in sample:
+        get(timer_id)
+    poll_us = (time.perf_counter() - t0) / polls * 1e6
+    return {"impl": impl, "count": count, "create_ms": create_ms, "cpu_pct": cpu_pct,
+            "mem_mb": mem_mb, "bytes_per_timer": mem_mb * 1024 * 1024 / count, "poll_us": poll_us}
+
+
+def _reset_engine() -> None:
+    timer.timers.clear()
+    timer._deadlines.clear()
+    timer._evictions.clear()
+
+
+async def _run_store_case(kind: str, count: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        spec = f"{kind}:{tmp}/timers" + (".db" if kind == "sqlite" else "")
+        _reset_engine()
+        timer.attach_store(timer_store.open_store(spec))
+        t0 = time.perf_counter()
+        for _ in range(count):
+            timer.start_background(timer.create_timer(60))
+        create_s = time.perf_counter() - t0
+        timer.detach_store()  # final group commit
+        durable_s = time.perf_counter() - t0
+
+        _reset_engine()
+        t0 = time.perf_counter()
+        restored = timer.attach_store(timer_store.open_store(spec))
+        recover_s = time.perf_counter() - t0
+        timer.detach_store()
+    return {"impl": kind, "count": count, "creates_per_s": count / create_s,
+            "durable_s": durable_s, "recover_s": recover_s, "restored": restored}
+
+
+def _client_phase(port: int, threads: int, duration: float, ids: list) -> tuple:
+    """One client process: `threads` keep-alive connections for `duration` s. /start if ids is empty, else /status."""
+    counts, failures, created = [0] * threads, [0] * threads, [[] for _ in range(threads)]
+    stop_at = time.monotonic() + duration
+    body = json.dumps({"minutes": 60})
+
+    def run(i: int) -> None:
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        while time.monotonic() < stop_at:
+            try:
+                if ids:
+                    conn.request("GET", f"/status/{random.choice(ids)}")
+                else:
+                    conn.request("POST", "/start", body=body, headers={"Content-Type": "application/json"})
+                resp = conn.getresponse()
+                data = resp.read()
+            except (OSError, http.client.HTTPException):
+                failures[i] += 1
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+                continue
+            if resp.status != 200:
+                failures[i] += 1
+            else:
+                counts[i] += 1
+                if not ids:
+                    created[i].append(json.loads(data)["id"])
+        conn.close()
+
+    workers = [threading.Thread(target=run, args=(i,)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return sum(counts), sum(failures), [timer_id for chunk in created for timer_id in chunk]
+
+
+def _wait_for_shards(directory: str, workers: int, timeout: float = 60.0) -> None:
+    """Until every worker has registered its forwarding address (i.e. finished startup)."""
+    deadline = time.monotonic() + timeout
+    while not os.path.isdir(directory) or len(os.listdir(directory)) < workers:
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"{workers} shard(s) did not start within {timeout:.0f}s")
+        time.sleep(0.1)
+
+
+def _run_sharded_case(workers: int, clients: int, threads: int, duration: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp, socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+        probe.close()
+        main_py = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+        proc = subprocess.Popen([sys.executable, main_py, "--workers", str(workers), "--port", str(port),
+                                 "--run-dir", os.path.join(tmp, "run")],
+                                cwd=tmp, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            _wait_for_shards(os.path.join(tmp, "run", "shards"), workers)
+            with multiprocessing.Pool(clients) as pool:
+                phase = pool.starmap(_client_phase, [(port, threads, duration, [])] * clients)
+                created = [timer_id for _, _, ids in phase for timer_id in ids]
+                creates, create_failures = sum(r[0] for r in phase), sum(r[1] for r in phase)
+                phase = pool.starmap(_client_phase, [(port, threads, duration, created)] * clients)
+                statuses, status_failures = sum(r[0] for r in phase), sum(r[1] for r in phase)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+    owners = {timer.shard_of(timer_id) for timer_id in created}
+    return {"workers": workers, "creates_per_s": creates / duration, "status_per_s": statuses / duration,
+            "failures": create_failures + status_failures, "shards_seen": len(owners),
+            "forwarded_pct": 100.0 * (1 - 1 / len(owners)) if owners else 0.0}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--counts", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--impls", nargs="+", choices=["legacy", "heap"], default=["legacy", "heap"])
+    parser.add_argument("--window", type=float, default=5.0, help="Idle seconds measured per case")
+    parser.add_argument("--stores", nargs="+", choices=["wal", "sqlite"])
+    parser.add_argument("--workers", type=int, nargs="+", help="Benchmark sharded main.py with these worker counts")
+    parser.add_argument("--clients", type=int, default=4, help="Client processes for --workers")
+    parser.add_argument("--threads", type=int, default=8, help="Connections per client process for --workers")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per phase for --workers")
+    parser.add_argument("--case", nargs=2, metavar=("IMPL", "COUNT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        result = asyncio.run(_run_case(args.case[0], int(args.case[1]), args.window))
+        print(json.dumps(result))
+        return
+
+    if args.workers:
+        print(f"cores: {os.cpu_count()}")
+        print(f"{'workers':>7} {'creates/s':>10} {'status/s':>10} {'forwarded %':>12} {'failures':>9}")
+        for workers in args.workers:
+            r = _run_sharded_case(workers, args.clients, args.threads, args.duration)
+            print(f"{workers:>7} {r['creates_per_s']:>10,.0f} {r['status_per_s']:>10,.0f} "
+                  f"{r['forwarded_pct']:>12.0f} {r['failures']:>9}")
+        return
+
+    if args.stores:
+        print(f"{'store':>7} {'timers':>10} {'creates/s':>10} {'durable s':>10} {'recover s':>10}")
+        for count in args.counts:
+            for kind in args.stores:
+                r = asyncio.run(_run_store_case(kind, count))
+                assert r["restored"] == count, r
+                print(f"{kind:>7} {count:>10,} {r['creates_per_s']:>10,.0f} {r['durable_s']:>10.2f} {r['recover_s']:>10.2f}")
+        return
+
+    print(f"{'impl':>7} {'timers':>10} {'create ms':>10} {'idle CPU %':>11} {'RSS MB':>8} "
+          f"{'B/timer':>8} {'poll us':>8}")
+    for count in args.counts:
+        for impl in args.impls:
+            out = subprocess.run([sys.executable, __file__, "--case", impl, str(count),
+                                  "--window", str(args.window)],
+                                 check=True, capture_output=True, text=True).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            print(f"{r['impl']:>7} {r['count']:>10,} {r['create_ms']:>10.0f} {r['cpu_pct']:>11.1f} {r['mem_mb']:>8.1f} "
+                  f"{r['bytes_per_timer']:>8.0f} {r['poll_us']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
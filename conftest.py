@@ -0,0 +1,44 @@
+"""
+Shared pytest fixtures.
+
+Tests that need a model use small seeded NumpyPlanner .npz files, so no
+Keras is needed.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+import mindpulse_inference as inference
+
+
+def _seeded_weights(path, seed: int = 0, hidden=(16,), scaler=(0.5, 2.0)) -> str:
+    """Write a seeded relu MLP with `hidden` layer sizes and a constant (mean, scale) scaler to `path`."""
+    layers = [2 + inference.NUM_PERSONALITIES, *hidden, inference.NUM_PLANS]
+    rng = np.random.default_rng(seed)
+    weights = [rng.normal(0, 0.5, (n_in, n_out)) for n_in, n_out in zip(layers, layers[1:])]
+    biases = [rng.normal(0, 0.05, n_out) for n_out in layers[1:]]
+    mean, scale = scaler
+    inference.save_numpy_weights(str(path), weights, biases, ["relu"] * len(hidden) + ["softmax"],
+                                 np.full(layers[0], mean), np.full(layers[0], scale))
+    return str(path)
+
+
+@pytest.fixture
+def seeded_weights():
+    """_seeded_weights(path, seed=0, hidden=(16,), scaler=(0.5, 2.0)) -> path."""
+    return _seeded_weights
+
+
+@pytest.fixture
+def model_dir(request, tmp_path, monkeypatch):
+    """
+    A working directory with seeded weights at inference.NUMPY_PATH.
+    Parametrise indirectly with _seeded_weights keyword arguments, e.g.
+    @pytest.mark.parametrize("model_dir", [{"seed": 3}], indirect=True).
+    """
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(inference.MODEL_DIR)
+    _seeded_weights(inference.NUMPY_PATH, **getattr(request, "param", {}))
+    return tmp_path
@@ -1,23 +1,268 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse
-from pydantic import BaseModel
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+import json
+import os
+
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, field_validator
 import asyncio
 
-from timer import create_timer, start_background, get_timer, cancel_timer
+from timer import create_timer, start_background, get_timer, get_timer_json, cancel_timer, watch_timers
+from timer import create_timers, start_many, create_session, get_session
+from timer import attach_store, detach_store
+from timer import set_shard, shard_of, is_local
+from timer_store import open_store
+from timer_shards import FORWARDED_HEADER, forward, open_directory
+import mindpulse_inference as inference
+import mindpulse_metrics as metrics
+from mindpulse_admission import (ADMISSION_MAX_CONCURRENCY, ADMISSION_MAX_LOOP_LAG, ADMISSION_MAX_QUEUE,
+                                 ADMISSION_QUEUE_TIMEOUT, ADMISSION_RETRY_AFTER, AsyncAdmissionLimiter,
+                                 LoopLagMonitor, Overloaded, admission_slots, shorten_switch_interval)
+from mindpulse_registry import ModelRegistry, RegistryWatcher, ServingModel, registry_loader
+
+
+# Predictions run on this pool so model.predict never blocks the event loop.
+PREDICT_THREADS = int(os.environ.get("MINDPULSE_PREDICT_THREADS", "4"))
+MODEL_BACKEND = os.environ.get("MINDPULSE_BACKEND", "auto")
+# "float16"/"int8" serve the `mindpulse_service.py --quantize` weights instead of float32.
+MODEL_VARIANT = os.environ.get("MINDPULSE_MODEL_VARIANT", "float32")
+# Versioned model registry directory to serve from (hot-reloads CURRENT); unset = MODEL_BACKEND files.
+MODEL_REGISTRY = os.environ.get("MINDPULSE_REGISTRY", "")
+# "wal:<dir>" or "sqlite:<file>" to persist timers across restarts; unset = in-memory only.
+# May contain "{shard}" to give each shard its own store.
+TIMER_STORE = os.environ.get("MINDPULSE_TIMER_STORE", "")
+# Sharded serving (`python main.py --workers N` sets these per worker): this
+# worker's shard number, the timer_shards directory spec, and the address
+# other workers forward this shard's timer requests to.
+SHARD = os.environ.get("MINDPULSE_SHARD", "")
+SHARD_DIRECTORY = os.environ.get("MINDPULSE_SHARD_DIRECTORY", "")
+SHARD_ADDRESS = os.environ.get("MINDPULSE_SHARD_ADDRESS", "")
+
+# Admission control: requests beyond a lane's concurrency limit wait in a
+# bounded queue for at most the queue timeout, else get 503 + Retry-After.
+# Lanes: "predict" (/predict, /predict/batch) and "timers" (POST /start,
+# /start/batch, /sessions); everything else is the ungated fast lane.
+# Both gates are off (0) unless set; the predict lane gets at least one slot
+# per PREDICT_THREADS thread, or the pool idles while requests get 503.
+PREDICT_CONCURRENCY = int(os.environ.get("MINDPULSE_PREDICT_CONCURRENCY", str(ADMISSION_MAX_CONCURRENCY)))
+TIMER_CONCURRENCY = int(os.environ.get("MINDPULSE_TIMER_CONCURRENCY", str(ADMISSION_MAX_CONCURRENCY)))
+ADMISSION_QUEUE = int(os.environ.get("MINDPULSE_ADMISSION_QUEUE", str(ADMISSION_MAX_QUEUE)))
+ADMISSION_TIMEOUT_MS = float(os.environ.get("MINDPULSE_QUEUE_TIMEOUT_MS", str(ADMISSION_QUEUE_TIMEOUT * 1000.0)))
+RETRY_AFTER = int(os.environ.get("MINDPULSE_RETRY_AFTER", str(ADMISSION_RETRY_AFTER)))
+# Gated lanes also shed while the event loop lags by more than this (timer creation runs on the loop)
+MAX_LOOP_LAG_MS = float(os.environ.get("MINDPULSE_MAX_LOOP_LAG_MS", str(ADMISSION_MAX_LOOP_LAG * 1000.0)))
+# Lower GIL switch interval (e.g. 0.2) so the loop keeps up with the predict threads (0 = Python default)
+SWITCH_INTERVAL_MS = float(os.environ.get("MINDPULSE_SWITCH_INTERVAL_MS", "0"))
+
+# Timer streams: state changes are pushed as they happen; `tick` adds a
+# periodic remaining-time event (0 = changes only, plus keep-alive comments).
+STREAM_KEEPALIVE_SECONDS = 15.0
+STREAM_MAX_TIMERS = 1000
+# Upper bound on timers created by one /start/batch request.
+MAX_BATCH_TIMERS = 1000
+# A session can span at most this many work cycles.
+MAX_SESSION_CYCLES = 100
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+        app.state.shards = None
+        if SHARD:
+                set_shard(int(SHARD))
+                app.state.shards = open_directory(SHARD_DIRECTORY or "local:")
+        if TIMER_STORE:
+                store_spec = TIMER_STORE.replace("{shard}", SHARD or "0")
+                restored = attach_store(open_store(store_spec))
+                print(f"Restored {restored} timer(s) from {store_spec}")
+        if SHARD and SHARD_ADDRESS:
+                app.state.shards.register(int(SHARD), SHARD_ADDRESS)
+        registry = ModelRegistry(MODEL_REGISTRY) if MODEL_REGISTRY else None
+        if registry is not None:
+                app.state.serving = ServingModel(registry_loader(registry))
+        else:
+                label = inference.resolve_backend(MODEL_BACKEND, MODEL_VARIANT)
+                if MODEL_VARIANT != "float32":
+                        label = f"{label}-{MODEL_VARIANT}"
+                app.state.serving = ServingModel(
+                        lambda: (label,) + inference.load_serving_backend(MODEL_BACKEND, MODEL_VARIANT))
+        # requests wait in the kernel while the loop is busy; the lag monitor lets the limiters see that wait
+        lag_monitor = LoopLagMonitor().start()
+        app.state.admission = {}
+        for lane, limit in (("predict", admission_slots(PREDICT_CONCURRENCY, PREDICT_THREADS)),
+                            ("timers", TIMER_CONCURRENCY)):
+                if limit > 0:
+                        app.state.admission[lane] = AsyncAdmissionLimiter(
+                                lane, max_concurrency=limit, max_queue=ADMISSION_QUEUE,
+                                queue_timeout=ADMISSION_TIMEOUT_MS / 1000.0, retry_after=RETRY_AFTER,
+                                lag_monitor=lag_monitor, max_loop_lag=MAX_LOOP_LAG_MS / 1000.0)
+        shorten_switch_interval(SWITCH_INTERVAL_MS / 1000.0)
+        app.state.model_error = None
+        app.state.predict_pool = ThreadPoolExecutor(max_workers=PREDICT_THREADS, thread_name_prefix="predict")
+        loop = asyncio.get_running_loop()
+        try:
+                await loop.run_in_executor(app.state.predict_pool, app.state.serving.get)
+        except Exception as e:
+                # keep serving timers; /predict reports the load error
+                app.state.model_error = str(e)
+        # new registry versions are loaded and warmed up off the request path, then swapped in
+        watcher = RegistryWatcher(registry, app.state.serving).start() if registry is not None else None
+        yield
+        lag_monitor.stop()
+        if watcher is not None:
+                watcher.stop()
+        if SHARD and SHARD_ADDRESS:
+                app.state.shards.unregister(int(SHARD))
+        app.state.predict_pool.shutdown(wait=True)
+        detach_store()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
-app = FastAPI()
+ADMISSION_LANES = {("POST", "/predict"): "predict", ("POST", "/predict/batch"): "predict",
+                   ("POST", "/start"): "timers", ("POST", "/start/batch"): "timers", ("POST", "/sessions"): "timers"}
+
+
+class AdmissionMiddleware:
+        """Admit gated requests before their body is read or validated; reject with 503 + Retry-After."""
+
+        def __init__(self, app):
+                self.app = app
+
+        async def __call__(self, scope, receive, send):
+                lane = ADMISSION_LANES.get((scope.get("method"), scope.get("path"))) if scope["type"] == "http" else None
+                limiter = getattr(app.state, "admission", {}).get(lane) if lane else None
+                if limiter is None:
+                        await self.app(scope, receive, send)
+                        return
+                try:
+                        await limiter.acquire()
+                except Overloaded as e:
+                        response = JSONResponse({"detail": str(e)}, status_code=503,
+                                                headers={"Retry-After": str(e.retry_after)})
+                        await response(scope, receive, send)
+                        return
+                try:
+                        await self.app(scope, receive, send)
+                finally:
+                        limiter.release()
+
+
+app.add_middleware(AdmissionMiddleware)
 
 
 class StartRequest(BaseModel):
         minutes: float
 
 
+class SessionRequest(BaseModel):
+        work_minutes: float = 25
+        cycles: int = 4
+        short_break: float = 5
+        long_break: float = 15
+
+
+class PredictRequest(BaseModel):
+        social_media_hours: float
+        texting_hours: float
+        personality: str
+
+        @field_validator("personality")
+        @classmethod
+        def known_personality(cls, v: str) -> str:
+                v = v.lower()
+                if v not in inference.PERSONALITY_MAP:
+                        raise ValueError(f"Unknown personality '{v}'. Valid: {inference.PERSONALITY_LIST}")
+                return v
+
+        def as_inputs(self):
+                return self.social_media_hours, self.texting_hours, self.personality
+
+
+def _serving_model():
+        """(version, model, scaler) currently served, or None before a successful load."""
+        serving = getattr(app.state, "serving", None)
+        return serving.current if serving is not None else None
+
+
+async def _predict(inputs: list) -> list:
+        current = _serving_model()
+        if current is None:
+                error = getattr(app.state, "model_error", None) or "startup did not run"
+                raise HTTPException(status_code=503, detail=f"Model not loaded: {error}")
+        if not inputs:
+                return []
+        # model and scaler come from one snapshot, so a concurrent reload can't mix versions
+        _, model, scaler = current
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(app.state.predict_pool, inference.predict_inputs, inputs, model, scaler)
+
+
+async def _predict_response(inputs: list, encode, profile: Optional[str]) -> Response:
+        # X-Mindpulse-Profile: 1 (with MINDPULSE_PROFILE=1) also writes collapsed stacks to a file
+        if metrics.PROFILE_ENABLED and profile == "1":
+                with metrics.SamplingProfiler() as profiler:
+                        body = encode(await _predict(inputs))
+                return Response(content=body, media_type="application/json",
+                                headers={metrics.PROFILE_FILE_HEADER: metrics.save_profile(profiler)})
+        return Response(content=encode(await _predict(inputs)), media_type="application/json")
+
+
+async def _forward_to_owner(request: Request, timer_id: str) -> Optional[Response]:
+        """The owning shard's response if `timer_id` lives in another worker, else None (serve locally)."""
+        directory = getattr(app.state, "shards", None)
+        if directory is None or is_local(timer_id) or request.headers.get(FORWARDED_HEADER):
+                return None
+        shard = shard_of(timer_id)
+        address = directory.lookup(shard)
+        if address is None:
+                raise HTTPException(status_code=503, detail=f"shard {shard} is not registered")
+        target = request.url.path + (f"?{request.url.query}" if request.url.query else "")
+        try:
+                upstream = await forward(address, request.method, target, await request.body())
+        except (OSError, asyncio.TimeoutError):
+                directory.forget(shard)
+                raise HTTPException(status_code=503, detail=f"shard {shard} is unavailable")
+        if upstream.content_type.startswith("text/event-stream"):
+                return StreamingResponse(upstream.chunks(), status_code=upstream.status, media_type=upstream.content_type,
+                                         headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+        return Response(content=await upstream.read(), status_code=upstream.status, media_type=upstream.content_type)
+
+
 @app.get("/")
 def read_root():
         return {"message": "Hello!", "joshua kim and wisam al taie are gooners and made this app": "5"}
 
 
+@app.get("/health")
+def health():
+        current = _serving_model()
+        return {"status": "ok", "model_loaded": current is not None,
+                "model_version": current[0] if current is not None else None}
+
+
+@app.get("/metrics")
+def metrics_endpoint():
+        return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.post("/predict")
+async def predict_endpoint(req: PredictRequest, x_mindpulse_profile: Optional[str] = Header(None)):
+        return await _predict_response([req.as_inputs()], lambda results: inference.encode_result(results[0]),
+                                       x_mindpulse_profile)
+
+
+@app.post("/predict/batch")
+async def predict_batch_endpoint(payloads: List[PredictRequest], x_mindpulse_profile: Optional[str] = Header(None)):
+        if len(payloads) > inference.MAX_BATCH_PAYLOADS:
+                raise HTTPException(status_code=400,
+                                    detail=f"Too many payloads: {len(payloads)} > {inference.MAX_BATCH_PAYLOADS}")
+        return await _predict_response([p.as_inputs() for p in payloads], inference.encode_results,
+                                       x_mindpulse_profile)
+
+
 @app.post("/start")
 async def start_timer_endpoint(req: StartRequest):
         if req.minutes <= 0:
@@ -30,22 +275,136 @@ async def start_timer_endpoint(req: StartRequest):
         return {"id": timer_id, "status": "running", "remaining_seconds": int(req.minutes * 60)}
 
 
+@app.post("/start/batch")
+async def start_batch_endpoint(reqs: List[StartRequest]):
+        if not reqs or len(reqs) > MAX_BATCH_TIMERS:
+                raise HTTPException(status_code=400, detail=f"Send 1..{MAX_BATCH_TIMERS} timers")
+        if any(r.minutes <= 0 for r in reqs):
+                raise HTTPException(status_code=400, detail="minutes must be > 0")
+
+        timer_ids = create_timers([r.minutes for r in reqs])
+        start_many(timer_ids)
+
+        return {"timers": [{"id": timer_id, "status": "running", "remaining_seconds": int(r.minutes * 60)}
+                           for timer_id, r in zip(timer_ids, reqs)]}
+
+
+@app.post("/sessions")
+async def start_session_endpoint(req: SessionRequest):
+        if req.work_minutes <= 0 or req.short_break < 0 or req.long_break < 0:
+                raise HTTPException(status_code=400, detail="work_minutes must be > 0 and breaks >= 0")
+        if not 1 <= req.cycles <= MAX_SESSION_CYCLES:
+                raise HTTPException(status_code=400, detail=f"cycles must be 1..{MAX_SESSION_CYCLES}")
+
+        session_id = create_session(req.work_minutes, req.cycles, req.short_break, req.long_break)
+        start_background(session_id)
+
+        return get_session(session_id)
+
+
+@app.get("/sessions/{session_id}")
+async def session_endpoint(session_id: str, request: Request):
+        # sessions are timers too: /cancel/{id} and /stream/{id} work on them
+        forwarded = await _forward_to_owner(request, session_id)
+        if forwarded is not None:
+                return forwarded
+        session = get_session(session_id)
+        if not session:
+                raise HTTPException(status_code=404, detail="session not found")
+        return session
+
+
 @app.get("/status/{timer_id}")
-def status_endpoint(timer_id: str):
-        timer = get_timer(timer_id)
-        if not timer:
+async def status_endpoint(timer_id: str, request: Request):
+        forwarded = await _forward_to_owner(request, timer_id)
+        if forwarded is not None:
+                return forwarded
+        body = get_timer_json(timer_id)
+        if body is None:
                 raise HTTPException(status_code=404, detail="timer not found")
-        return timer
+        return Response(content=body, media_type="application/json")
 
 
 @app.post("/cancel/{timer_id}")
-def cancel_endpoint(timer_id: str):
+async def cancel_endpoint(timer_id: str, request: Request):
+        forwarded = await _forward_to_owner(request, timer_id)
+        if forwarded is not None:
+                return forwarded
         ok = cancel_timer(timer_id)
         if not ok:
                 raise HTTPException(status_code=404, detail="timer not found")
         return {"id": timer_id, "status": "cancelled"}
 
 
+def _sse(event: str, data: dict) -> str:
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _timer_events(timer_ids: List[str], tick: float):
+        """Server-Sent Events for `timer_ids` until all of them have ended."""
+        watch = watch_timers(timer_ids)
+        try:
+                live = set()
+                for timer_id in watch.timer_ids:
+                        state = get_timer(timer_id)
+                        if state is None:
+                                yield _sse("missing", {"id": timer_id})
+                                continue
+                        yield _sse("state", state)
+                        if state["status"] in ("running", "created"):
+                                live.add(timer_id)
+
+                while live:
+                        change = await watch.get(timeout=tick if tick > 0 else STREAM_KEEPALIVE_SECONDS)
+                        if change is None:
+                                if tick > 0:
+                                        states = [s for s in (get_timer(t) for t in live) if s is not None]
+                                        yield _sse("tick", {"timers": [
+                                                {"id": s["id"], "status": s["status"], "remaining_seconds": s["remaining_seconds"]}
+                                                for s in states]})
+                                else:
+                                        yield ": keep-alive\n\n"
+                                continue
+                        timer_id, state = change
+                        yield _sse("state", state)
+                        if state["status"] not in ("running", "created"):
+                                live.discard(timer_id)
+        finally:
+                watch.close()
+
+
+def _event_stream(timer_ids: List[str], tick: float) -> StreamingResponse:
+        return StreamingResponse(_timer_events(timer_ids, tick), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.get("/stream/{timer_id}")
+async def stream_endpoint(timer_id: str, request: Request, tick: float = 1.0):
+        forwarded = await _forward_to_owner(request, timer_id)
+        if forwarded is not None:
+                return forwarded
+        if get_timer(timer_id) is None:
+                raise HTTPException(status_code=404, detail="timer not found")
+        return _event_stream([timer_id], tick)
+
+
+@app.get("/stream")
+async def stream_many_endpoint(request: Request, ids: str = Query(..., description="Comma-separated timer ids"),
+                               tick: float = 1.0):
+        timer_ids = [i for i in ids.split(",") if i]
+        if not timer_ids or len(timer_ids) > STREAM_MAX_TIMERS:
+                raise HTTPException(status_code=400, detail=f"ids must list 1..{STREAM_MAX_TIMERS} timers")
+        if getattr(app.state, "shards", None) is not None:
+                # one stream is served by one worker; /start/batch ids always share a shard
+                remote = {shard_of(t) for t in timer_ids if not is_local(t)}
+                if len(remote) > 1 or (remote and any(is_local(t) for t in timer_ids)):
+                        raise HTTPException(status_code=400, detail="ids span several shards; open one stream per shard")
+                forwarded = await _forward_to_owner(request, timer_ids[0]) if remote else None
+                if forwarded is not None:
+                        return forwarded
+        return _event_stream(timer_ids, tick)
+
+
 @app.get("/ui", response_class=HTMLResponse)
 def ui():
         html = """
@@ -71,18 +430,34 @@ def ui():
                 });
                 const data = await res.json();
                 document.getElementById('status').textContent = 'Started: ' + data.id;
-                poll(data.id);
+                watch(data.id);
             }
 
-            async function poll(id) {
+            // The server pushes state changes plus a resync tick every 10s;
+            // the countdown in between is rendered locally.
+            function watch(id) {
                 const el = document.getElementById('status');
-                while (true) {
-                    const res = await fetch('/status/' + id);
-                    const s = await res.json();
-                    el.textContent = `Status: ${s.status} — Remaining: ${s.remaining_seconds}s`;
-                    if (s.status !== 'running') break;
-                    await new Promise(r => setTimeout(r, 1000));
-                }
+                let status = 'running', remaining = 0, syncedAt = Date.now();
+                const render = () => {
+                    const left = status === 'running'
+                        ? Math.max(0, Math.round(remaining - (Date.now() - syncedAt) / 1000))
+                        : remaining;
+                    el.textContent = `Status: ${status} — Remaining: ${left}s`;
+                };
+                const source = new EventSource('/stream/' + id + '?tick=10');
+                const timerId = setInterval(render, 1000);
+                const update = (s) => {
+                    status = s.status;
+                    remaining = s.remaining_seconds;
+                    syncedAt = Date.now();
+                    render();
+                    if (status !== 'running') {
+                        source.close();
+                        clearInterval(timerId);
+                    }
+                };
+                source.addEventListener('state', e => update(JSON.parse(e.data)));
+                source.addEventListener('tick', e => JSON.parse(e.data).timers.forEach(update));
             }
 
             document.getElementById('start').addEventListener('click', start);
@@ -93,6 +468,105 @@ def ui():
         return html
 
 
+# ---------------------------
+# Sharded multi-worker serving
+# ---------------------------
+# Each worker is one shard: it shares the public listening socket with the
+# others and also listens on a private socket (Unix, or TCP with
+# --forward-host) that the other shards forward its timers' requests to.
+def _run_shard(sock, env: dict, run_dir: str, forward_host: str) -> None:
+        import socket
+        import uvicorn
+
+        shard = env["MINDPULSE_SHARD"]
+        if forward_host:
+                private = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                private.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                private.bind((forward_host, 0))
+                address = f"tcp:{forward_host}:{private.getsockname()[1]}"
+        else:
+                path = os.path.join(run_dir, f"shard-{shard}.sock")
+                if os.path.exists(path):
+                        os.remove(path)
+                private = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                private.bind(path)
+                address = f"unix:{path}"
+        private.listen(1024)
+        # set before uvicorn imports main, which reads them at module level
+        os.environ.update(env, MINDPULSE_SHARD_ADDRESS=address)
+        uvicorn.Server(uvicorn.Config("main:app", log_level="warning")).run(sockets=[sock, private])
+
+
+def serve_sharded(host: str, port: int, workers: int, run_dir: str, shard_base: int = 0,
+                  forward_host: str = "") -> None:
+        """
+        Run shards shard_base .. shard_base + workers - 1 as worker processes on
+        host:port and respawn any that exit (with the same shard number, so
+        its ids, and a "{shard}" timer store, stay valid). Nodes sharing one
+        MINDPULSE_SHARD_DIRECTORY must use disjoint shard ranges and --forward-host.
+        """
+        import multiprocessing
+        import multiprocessing.connection
+        import signal
+        import socket
+
+        os.makedirs(run_dir, exist_ok=True)
+        directory = os.environ.get("MINDPULSE_SHARD_DIRECTORY") or f"file:{os.path.join(run_dir, 'shards')}"
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        sock.listen(2048)
+
+        ctx = multiprocessing.get_context("spawn")
+        procs = {}
+        stopping = False
+
+        def spawn(shard: int) -> None:
+                env = {"MINDPULSE_SHARD": str(shard), "MINDPULSE_SHARD_DIRECTORY": directory}
+                proc = ctx.Process(target=_run_shard, args=(sock, env, run_dir, forward_host), name=f"shard-{shard}")
+                proc.start()
+                procs[shard] = proc
+
+        def stop(signum, frame):
+                nonlocal stopping
+                stopping = True
+                for proc in procs.values():
+                        proc.terminate()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        for shard in range(shard_base, shard_base + workers):
+                spawn(shard)
+        print(f"Serving shards {shard_base}..{shard_base + workers - 1} on http://{host}:{port} ({directory})")
+        while procs:
+                multiprocessing.connection.wait([proc.sentinel for proc in procs.values()])
+                for shard, proc in list(procs.items()):
+                        if not proc.is_alive():
+                                proc.join()
+                                del procs[shard]
+                                if not stopping:
+                                        print(f"Shard {shard} exited with {proc.exitcode}; restarting")
+                                        spawn(shard)
+        sock.close()
+
+
 if __name__ == "__main__":
+        import argparse
         import uvicorn
-        uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
\ No newline at end of file
+
+        parser = argparse.ArgumentParser(description="MindPulse timer + prediction API")
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8000)
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Serve N worker processes with timers sharded across them "
+                                 "(unset = one auto-reloading dev server)")
+        parser.add_argument("--run-dir", default="./run", help="Shard sockets and the default shard directory")
+        parser.add_argument("--shard-base", type=int, default=0,
+                            help="First shard number (give each node its own range)")
+        parser.add_argument("--forward-host", default="",
+                            help="Forward between shards over TCP on this address instead of Unix sockets")
+        args = parser.parse_args()
+        if args.workers:
+                serve_sharded(args.host, args.port, args.workers, args.run_dir, args.shard_base, args.forward_host)
+        else:
+                uvicorn.run("main:app", host=args.host, port=args.port, reload=True)
\ No newline at end of file
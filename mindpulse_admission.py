@@ -0,0 +1,246 @@
+"""
+Admission control for the MindPulse services: concurrency limits, bounded
+queues with a queue-time deadline, and early rejection.
+
+Lanes (inference, timer creation) are only gated when given a limit
+(admission control is off by default); each gated lane has a limiter:
+  - up to `max_concurrency` requests run at once;
+  - up to `max_queue` more wait, first come first served, for at most
+    `queue_timeout` seconds;
+  - anything else is rejected straight away with Overloaded, which both apps
+    turn into 503 + Retry-After before reading the request body.
+A finishing request hands its slot directly to the oldest waiter, so a slot
+is never up for grabs between the two.
+
+Shedding at the door keeps latency bounded for the requests that are
+admitted: without it, every request queues (in worker threads, the executor
+or the event loop) and under sustained overload they all end up late.
+
+The fast lane (/health, /status, /metrics, ...) is simply never gated.
+
+AdmissionLimiter is for threaded servers (Flask); AsyncAdmissionLimiter is
+for one asyncio event loop (FastAPI).
+"""
+
+import asyncio
+import math
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Deque, Dict
+
+import mindpulse_metrics as metrics
+
+# Defaults for both apps; the CLI flags / environment variables override them.
+# Admission control is opt-in: a lane is only gated once it is given a
+# concurrency limit. A limit below what the request path can use at once
+# (a full micro-batch, or every predict thread) only turns capacity into
+# 503s, so see admission_slots.
+ADMISSION_MAX_CONCURRENCY = 0  # 0 = lane not gated
+ADMISSION_MAX_QUEUE = 8
+ADMISSION_QUEUE_TIMEOUT = 0.1  # seconds a request may wait for a slot
+ADMISSION_RETRY_AFTER = 1  # seconds, sent as Retry-After on 503
+# Event-loop lag beyond which an async lane sheds. Handlers that run on the
+# loop itself (timer creation) never queue in the limiter, only behind each
+# other on the loop, so lag is their only early signal.
+ADMISSION_MAX_LOOP_LAG = 0.02  # seconds
+
+_OUTCOMES = metrics.Counter("mindpulse_admission_total",
+                            "Admission decisions by lane and outcome (admitted, queue_full, deadline, loop_lag).",
+                            ["lane", "outcome"])
+_QUEUE_SECONDS = metrics.Histogram("mindpulse_admission_queue_seconds",
+                                   "Time admitted requests waited for a slot.", ["lane"])
+
+
+def admission_slots(max_concurrency: int, min_slots: int) -> int:
+    """Concurrency for a gated lane: at least `min_slots` (batch size / worker threads), 0 stays ungated."""
+    return max(max_concurrency, min_slots) if max_concurrency > 0 else 0
+
+
+def shorten_switch_interval(seconds: float) -> None:
+    """Lower the GIL switch interval (never raise it); 0 leaves the interpreter default alone.
+
+    With CPU-bound threads running, the thread that accepts connections waits
+    up to the switch interval (5 ms by default) after every blocking call, so
+    under overload requests pile up unseen in the listen backlog instead of
+    being shed. A shorter interval (e.g. 0.2 ms) keeps it accepting, for a few
+    % of throughput; it changes the whole interpreter, so it is only ever set
+    on request (--switch-interval-ms / MINDPULSE_SWITCH_INTERVAL_MS).
+    """
+    if 0 < seconds < sys.getswitchinterval():
+        sys.setswitchinterval(seconds)
+
+
+class Overloaded(Exception):
+    """Raised instead of admitting a request; answer 503 with a Retry-After of `retry_after` seconds."""
+
+    def __init__(self, lane: str, reason: str, retry_after: int):
+        super().__init__(f"{lane} is overloaded ({reason}); retry in {retry_after}s")
+        self.lane = lane
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Limits:
+    """Configuration and counters shared by both limiter flavours."""
+
+    def __init__(self, lane: str, max_concurrency: int,
+                 max_queue: int = ADMISSION_MAX_QUEUE, queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+                 retry_after: int = ADMISSION_RETRY_AFTER):
+        if max_concurrency < 1 or max_queue < 0 or queue_timeout < 0:
+            raise ValueError("max_concurrency must be >= 1, max_queue and queue_timeout >= 0")
+        self.lane = lane
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = max(1, int(math.ceil(retry_after)))
+        self.in_flight = 0
+        self.counts = {"admitted": 0, "queue_full": 0, "deadline": 0, "loop_lag": 0}
+
+    def _admitted(self, queued_since: float = None) -> None:
+        self.counts["admitted"] += 1
+        _OUTCOMES.labels(self.lane, "admitted").inc()
+        if queued_since is not None:
+            _QUEUE_SECONDS.labels(self.lane).observe(time.perf_counter() - queued_since)
+
+    def _reject(self, reason: str) -> Overloaded:
+        self.counts[reason] += 1
+        _OUTCOMES.labels(self.lane, reason).inc()
+        return Overloaded(self.lane, reason, self.retry_after)
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.counts, in_flight=self.in_flight, queued=len(self._waiters),
+                    max_concurrency=self.max_concurrency, max_queue=self.max_queue)
+
+
+class AdmissionLimiter(_Limits):
+    """Thread-safe limiter: `with limiter.admit(): ...` runs the block or raises Overloaded."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        self._waiters: Deque[threading.Event] = deque()
+
+    def acquire(self) -> None:
+        with self._lock:
+            if self.in_flight < self.max_concurrency and not self._waiters:
+                self.in_flight += 1
+                self._admitted()
+                return
+            if len(self._waiters) >= self.max_queue:
+                raise self._reject("queue_full")
+            granted = threading.Event()
+            self._waiters.append(granted)
+        queued_since = time.perf_counter()
+        if not granted.wait(self.queue_timeout):
+            with self._lock:
+                # release() may have handed us the slot between the timeout and taking the lock
+                if not granted.is_set():
+                    self._waiters.remove(granted)
+                    raise self._reject("deadline")
+        with self._lock:
+            self._admitted(queued_since)
+
+    def release(self) -> None:
+        with self._lock:
+            if self._waiters:
+                self._waiters.popleft().set()  # the slot passes on; in_flight is unchanged
+            else:
+                self.in_flight -= 1
+
+    @contextmanager
+    def admit(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class LoopLagMonitor:
+    """
+    How late the event loop runs a periodic wakeup. A new connection waits
+    about that long before any handler (or limiter) sees it, so it stands in
+    for the time requests spend queued in the kernel while the loop is busy.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.lag = 0.0
+        self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            t = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, loop.time() - t - self.interval)
+
+    def start(self) -> "LoopLagMonitor":
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+
+class AsyncAdmissionLimiter(_Limits):
+    """
+    Limiter for coroutines on a single event loop: `async with limiter.admit(): ...`.
+    With a LoopLagMonitor, requests are also shed while the loop lags by more
+    than `max_loop_lag`: new requests are already waiting that long to be seen.
+    """
+
+    def __init__(self, *args, lag_monitor: LoopLagMonitor = None, max_loop_lag: float = ADMISSION_MAX_LOOP_LAG,
+                 **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lag_monitor = lag_monitor
+        self.max_loop_lag = max_loop_lag
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> None:
+        if self.lag_monitor is not None and self.lag_monitor.lag > self.max_loop_lag:
+            raise self._reject("loop_lag")
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            self._admitted()
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject("queue_full")
+        granted = asyncio.get_running_loop().create_future()
+        self._waiters.append(granted)
+        queued_since = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(granted), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not granted.done():
+                self._waiters.remove(granted)
+                granted.cancel()
+                raise self._reject("deadline")
+        except asyncio.CancelledError:
+            # client went away while queued: give back a slot we may have just been handed
+            if granted.done() and not granted.cancelled():
+                self.release()
+            elif granted in self._waiters:
+                self._waiters.remove(granted)
+            raise
+        self._admitted(queued_since)
+
+    def release(self) -> None:
+        while self._waiters:
+            granted = self._waiters.popleft()
+            if not granted.done():
+                granted.set_result(None)
+                return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def admit(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
@@ -0,0 +1,877 @@
+"""
+Serving-side inference backend for the mindboost planner.
+
+Everything `mindpulse_service.py --serve` needs at request time lives here and
+depends only on NumPy: the personality/plan constants, payload parsing,
+batched prediction, plan mapping, the micro-batcher and NumpyPlanner, plus
+build_features for DataFrames (used by training and by the --score workers).
+Training code (pandas, sklearn, TensorFlow) stays in mindpulse_service and is
+imported lazily, so serving workers never pay for it.
+
+NumpyPlanner evaluates the planner MLP from the .npz written by
+`mindpulse_service.py --export-numpy`, with the StandardScaler folded into the
+first layer. It implements `predict(X)` so it can be passed anywhere a Keras
+model is expected, with `scaler=None` since scaling is built in.
+
+The Keras backend's scaler is stored as NumpyScaler arrays (scaler.npz) rather
+than a pickled sklearn StandardScaler; legacy scaler.pkl files are still read
+and converted on first load.
+"""
+
+import os
+import json
+import math
+import time
+import queue
+import threading
+from collections import Counter, OrderedDict
+from types import MappingProxyType
+from typing import Dict, Any, List, Tuple, Callable, Optional, Sequence, TYPE_CHECKING
+
+import numpy as np
+
+import mindpulse_metrics as metrics
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from sklearn.preprocessing import StandardScaler
+
+try:
+    import orjson  # optional fast JSON encoder, see dumps()
+except ImportError:
+    orjson = None
+
+
+# Personality animals
+PERSONALITY_MAP = {
+    "lion": 0,
+    "fox": 1,
+    "wolf": 2,
+    "owl": 3,
+    "bear": 4,
+    "snake": 5,
+    "dolphin": 6
+}
+PERSONALITY_LIST = list(PERSONALITY_MAP.keys())
+NUM_PERSONALITIES = len(PERSONALITY_LIST)
+
+# Plan categories
+PLAN_CATEGORIES = [
+    "Stress-Relief & Mindfulness",
+    "Productivity & Focus",
+    "Balanced Lifestyle",
+    "Sleep & Recovery"
+]
+NUM_PLANS = len(PLAN_CATEGORIES)
+
+# Model artifacts
+MODEL_DIR = "./saved_models"
+MODEL_PATH = os.path.join(MODEL_DIR, "mindboost_saved.keras")
+SCALER_PATH = os.path.join(MODEL_DIR, "scaler.npz")
+LEGACY_SCALER_PATH = os.path.join(MODEL_DIR, "scaler.pkl")  # pickled StandardScaler, read for migration only
+NUMPY_PATH = os.path.join(MODEL_DIR, "mindboost_planner.npz")
+
+# ---------------------------
+# NumPy forward pass
+# ---------------------------
+NUMPY_SCHEMA_VERSION = 1
+# Reduced-precision weights from `mindpulse_service.py --quantize`: the scaler
+# is already folded in, and a "precision" entry says how W{i} are stored.
+QUANTIZED_SCHEMA_VERSION = 2
+MODEL_VARIANTS = ("float32", "float16", "int8")
+
+# Max absolute difference allowed between NumpyPlanner and model.predict
+# softmax outputs (float32 accumulation order + folded scaler).
+NUMPY_TOLERANCE = 1e-4
+
+
+def _relu(x: np.ndarray) -> np.ndarray:
+    return np.maximum(x, 0.0, out=x)
+
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    x = x - x.max(axis=1, keepdims=True)
+    np.exp(x, out=x)
+    x /= x.sum(axis=1, keepdims=True)
+    return x
+
+
+def _linear(x: np.ndarray) -> np.ndarray:
+    return x
+
+
+ACTIVATIONS = {
+    "relu": _relu,
+    "softmax": _softmax,
+    "linear": _linear,
+}
+
+
+def save_numpy_weights(path: str, weights: Sequence[np.ndarray], biases: Sequence[np.ndarray],
+                       activations: Sequence[str], scaler_mean: np.ndarray,
+                       scaler_scale: np.ndarray) -> None:
+    """
+    Write Dense layer weights/biases, their activation names and the scaler
+    statistics to a single .npz file.
+    """
+    for name in activations:
+        if name not in ACTIVATIONS:
+            raise ValueError(f"Unsupported activation '{name}'. Supported: {list(ACTIVATIONS)}")
+    arrays = {
+        "schema_version": np.array(NUMPY_SCHEMA_VERSION),
+        "activations": np.array(list(activations)),
+        "scaler_mean": np.asarray(scaler_mean, dtype=np.float64),
+        "scaler_scale": np.asarray(scaler_scale, dtype=np.float64),
+    }
+    for i, (w, b) in enumerate(zip(weights, biases)):
+        arrays[f"W{i}"] = np.asarray(w, dtype=np.float32)
+        arrays[f"b{i}"] = np.asarray(b, dtype=np.float32)
+    np.savez(path, **arrays)
+
+
+class NumpyPlanner:
+    """
+    Dense MLP forward pass in NumPy. Takes raw (unscaled) feature rows; the
+    StandardScaler is folded into the first layer:
+        ((x - mean) / scale) @ W + b == x @ (W / scale[:, None]) + (b - (mean / scale) @ W)
+    """
+
+    def __init__(self, weights: List[np.ndarray], biases: List[np.ndarray],
+                 activations: List[str], scaler_mean: np.ndarray, scaler_scale: np.ndarray):
+        if not (len(weights) == len(biases) == len(activations)) or not weights:
+            raise ValueError("weights, biases and activations must be non-empty and the same length")
+
+        mean = np.asarray(scaler_mean, dtype=np.float64)
+        scale = np.asarray(scaler_scale, dtype=np.float64)
+        w0 = np.asarray(weights[0], dtype=np.float64)
+        b0 = np.asarray(biases[0], dtype=np.float64)
+        folded_w = w0 / scale[:, None]
+        folded_b = b0 - (mean / scale) @ w0
+
+        self.weights = [folded_w.astype(np.float32)] + [np.asarray(w, dtype=np.float32) for w in weights[1:]]
+        self.biases = [folded_b.astype(np.float32)] + [np.asarray(b, dtype=np.float32) for b in biases[1:]]
+        self.activation_names = list(activations)
+        self.activations = [ACTIVATIONS[name] for name in activations]
+        self.input_dim = self.weights[0].shape[0]
+
+    @classmethod
+    def load(cls, path: str) -> "NumpyPlanner":
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data["schema_version"])
+            if version not in (NUMPY_SCHEMA_VERSION, QUANTIZED_SCHEMA_VERSION):
+                raise ValueError(f"Unsupported numpy weights schema {version} in {path}")
+            activations = [str(a) for a in data["activations"]]
+            if version == QUANTIZED_SCHEMA_VERSION:
+                precision = str(data["precision"])
+                weights = [_dequantize(data, i, precision) for i in range(len(activations))]
+            else:
+                weights = [data[f"W{i}"] for i in range(len(activations))]
+            biases = [data[f"b{i}"] for i in range(len(activations))]
+            return cls(weights, biases, activations, data["scaler_mean"], data["scaler_scale"])
+
+    def predict(self, X: np.ndarray, verbose: int = 0) -> np.ndarray:
+        """Return softmax probabilities, shape (N, NUM_PLANS). Signature mirrors keras.Model.predict."""
+        x = np.asarray(X, dtype=np.float32)
+        if x.ndim == 1:
+            x = x.reshape(1, -1)
+        for w, b, act in zip(self.weights, self.biases, self.activations):
+            x = x @ w
+            x += b
+            x = act(x)
+        return x
+
+# ---------------------------
+# Reduced-precision weights
+# ---------------------------
+# Weights are stored in float16, or as int8 with one float32 scale per output
+# unit (symmetric, per channel), and widened back to float32 at load: NumPy
+# has no fast float16/int8 matmul, so the gain is artifact size, not FLOPs.
+# Biases stay float32.
+def _quantize(w: np.ndarray, precision: str, clip: float = 1.0) -> Dict[str, np.ndarray]:
+    if precision == "float16":
+        return {"": w.astype(np.float16)}
+    if precision == "int8":
+        # clip < 1 trades the largest weights' precision for everyone else's
+        limit = np.maximum(np.abs(w).max(axis=0) * clip, 1e-12)
+        scale = (limit / 127.0).astype(np.float32)
+        return {"": np.clip(np.round(w / scale), -127, 127).astype(np.int8), "_scale": scale}
+    raise ValueError(f"Unknown precision '{precision}'. Valid: float16, int8")
+
+
+def _dequantize(data, i: int, precision: str) -> np.ndarray:
+    w = data[f"W{i}"].astype(np.float32)
+    if precision == "int8":
+        w *= data[f"W{i}_scale"]
+    return w
+
+
+def save_quantized_weights(path: str, planner: NumpyPlanner, precision: str, clip: float = 1.0,
+                           calibration: Optional[np.ndarray] = None) -> None:
+    """
+    Write `planner`'s (scaler-folded) layers with weights stored at `precision`.
+    With `calibration` rows (raw features), each bias absorbs the mean shift
+    the rounded weights cause on that layer's calibration inputs (bias correction).
+    """
+    arrays = {
+        "schema_version": np.array(QUANTIZED_SCHEMA_VERSION),
+        "precision": np.array(precision),
+        "activations": np.array(planner.activation_names),
+        "scaler_mean": np.zeros(planner.input_dim),
+        "scaler_scale": np.ones(planner.input_dim),
+    }
+    h = None if calibration is None else np.asarray(calibration, dtype=np.float32)
+    for i, (w, b, activation) in enumerate(zip(planner.weights, planner.biases, planner.activations)):
+        quantized = _quantize(w, precision, clip)
+        for suffix, array in quantized.items():
+            arrays[f"W{i}{suffix}"] = array
+        if h is not None:
+            w_q = _dequantize({f"W{i}{suffix}": array for suffix, array in quantized.items()}, i, precision)
+            b = (b + h.mean(axis=0) @ (w - w_q)).astype(np.float32)
+            h = activation(h @ w_q + b)
+        arrays[f"b{i}"] = b
+    np.savez(path, **arrays)
+
+
+def variant_path(variant: str = "float32") -> str:
+    """Weights file of a model variant: NUMPY_PATH, or e.g. mindboost_planner.int8.npz."""
+    if variant not in MODEL_VARIANTS:
+        raise ValueError(f"Unknown model variant '{variant}'. Valid: {list(MODEL_VARIANTS)}")
+    return NUMPY_PATH if variant == "float32" else NUMPY_PATH[:-len(".npz")] + f".{variant}.npz"
+
+
+# ---------------------------
+# Scaler arrays
+# ---------------------------
+SCALER_SCHEMA_VERSION = 1
+
+
+class NumpyScaler:
+    """
+    The fitted part of a StandardScaler (mean_, scale_) with its transform,
+    without importing sklearn. Saved as a plain .npz, loaded with
+    allow_pickle=False.
+    """
+
+    def __init__(self, mean: np.ndarray, scale: np.ndarray):
+        self.mean_ = np.asarray(mean, dtype=np.float64)
+        self.scale_ = np.asarray(scale, dtype=np.float64)
+        if self.mean_.shape != self.scale_.shape or self.mean_.ndim != 1:
+            raise ValueError(f"mean and scale must be 1-D and the same shape, got "
+                             f"{self.mean_.shape} and {self.scale_.shape}")
+
+    @classmethod
+    def from_scaler(cls, scaler) -> "NumpyScaler":
+        """From a fitted sklearn StandardScaler (or anything with mean_ and scale_)."""
+        return cls(scaler.mean_, scaler.scale_)
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+    def save(self, path: str) -> None:
+        np.savez(path, schema_version=np.array(SCALER_SCHEMA_VERSION), mean=self.mean_, scale=self.scale_)
+
+    @classmethod
+    def load(cls, path: str) -> "NumpyScaler":
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data["schema_version"])
+            if version != SCALER_SCHEMA_VERSION:
+                raise ValueError(f"Unsupported scaler schema {version} in {path}")
+            return cls(data["mean"], data["scale"])
+
+
+def _load_pickled_scaler(path: str) -> NumpyScaler:
+    # unpickling runs arbitrary code: only for migrating our own pre-.npz artifacts
+    import pickle
+
+    with open(path, "rb") as f:
+        return NumpyScaler.from_scaler(pickle.load(f))
+
+
+def save_scaler(scaler, path: str = SCALER_PATH) -> None:
+    """Write a fitted StandardScaler (or NumpyScaler) as scaler arrays."""
+    NumpyScaler.from_scaler(scaler).save(path)
+
+
+def load_scaler(path: str = SCALER_PATH, legacy_path: str = LEGACY_SCALER_PATH) -> NumpyScaler:
+    """
+    Load scaler arrays from `path`. If only a legacy pickled scaler exists at
+    `legacy_path`, convert it and write `path` so later loads skip pickle.
+    A path ending in .pkl is read as a legacy pickle.
+    """
+    if path.endswith(".pkl"):
+        return _load_pickled_scaler(path)
+    if os.path.exists(path) or not os.path.exists(legacy_path):
+        return NumpyScaler.load(path)
+    scaler = _load_pickled_scaler(legacy_path)
+    try:
+        scaler.save(path)
+        print(f"Migrated {legacy_path} to {path}")
+    except OSError:
+        pass  # read-only model dir: keep serving from the pickle
+    return scaler
+
+
+# ---------------------------
+# Load model & scaler
+# ---------------------------
+def load_model_and_scaler(model_path: str = MODEL_PATH):
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model not found at {model_path}. Train first with --train")
+    from tensorflow import keras
+
+    model = keras.models.load_model(model_path)
+    return model, load_scaler()
+
+
+def resolve_backend(backend: str = "auto", variant: str = "float32") -> str:
+    """Map "auto" to "numpy" when exported weights exist, else "keras". Reduced-precision variants are numpy-only."""
+    if variant != "float32":
+        return "numpy"
+    if backend == "auto":
+        return "numpy" if os.path.exists(NUMPY_PATH) else "keras"
+    return backend
+
+
+def backend_artifact_paths(backend: str = "auto", variant: str = "float32") -> List[str]:
+    """Files a serving backend is loaded from (watched by the response cache)."""
+    if resolve_backend(backend, variant) == "numpy":
+        return [variant_path(variant)]
+    return [MODEL_PATH, SCALER_PATH]
+
+
+def load_serving_backend(backend: str = "auto", variant: str = "float32"):
+    """
+    Return (model, scaler) for serving.
+      - "numpy": NumpyPlanner from NUMPY_PATH (scaler folded in, so scaler is None)
+      - "keras": Keras model + NumpyScaler
+      - "auto": numpy if NUMPY_PATH exists, else keras
+    variant "float16"/"int8" loads the `--quantize` weights instead (numpy backend).
+    """
+    backend = resolve_backend(backend, variant)
+    if backend == "numpy":
+        path = variant_path(variant)
+        if not os.path.exists(path):
+            hint = "--export-numpy" if variant == "float32" else f"--quantize {variant}"
+            raise FileNotFoundError(f"NumPy weights not found at {path}. Export first with {hint}")
+        return NumpyPlanner.load(path), None
+    if backend == "keras":
+        return load_model_and_scaler()
+    raise ValueError(f"Unknown backend '{backend}'. Valid: auto, numpy, keras")
+
+# ---------------------------
+# Plan mapping (turn predicted probs -> text + structured plan)
+# ---------------------------
+# Static part of each plan, indexed like PLAN_CATEGORIES (i.e. by argmax).
+# Frozen below ("recommendations" as tuples, "structured" as a read-only
+# mapping) so no caller can edit a template in place; map_probs_to_plan
+# copies them into each plan, which keeps plans plain dicts that orjson
+# encodes natively (a cached result is re-encoded on every hit).
+_PLAN_TEMPLATES: List[Dict[str, Any]] = [
+    {  # Stress-Relief & Mindfulness
+        "recommendations": [
+            "Start with 10 minutes daily guided breathing",
+            "Take 5-minute mindful breaks every hour",
+            "Evening reflection journaling for 5 minutes"
+        ],
+        "structured": {
+            "daily_mindfulness_min": 10,
+            "micro_breaks_every_min": 60,
+            "evening_journal_min": 5
+        },
+    },
+    {  # Productivity & Focus
+        "recommendations": [
+            "Use Pomodoro cycles: 25min focus / 5min break",
+            "Turn off notifications during focus blocks",
+            "Plan top-3 tasks each morning"
+        ],
+        "structured": {
+            "focus_block_minutes": 25,
+            "break_minutes": 5,
+            "daily_top_tasks": 3
+        },
+    },
+    {  # Balanced Lifestyle
+        "recommendations": [
+            "Keep a consistent sleep schedule",
+            "30 minutes of moderate exercise 3x per week",
+            "Weekly social time with friends/family"
+        ],
+        "structured": {
+            "target_sleep_hours": 7.5,
+            "exercise_min_per_week": 90,
+            "social_meetups_per_week": 1
+        },
+    },
+    {  # Sleep & Recovery
+        "recommendations": [
+            "Avoid screens 60 minutes before bed",
+            "Wind-down routine: light stretching + breathing",
+            "Try to get consistent bedtime and wake time"
+        ],
+        "structured": {
+            "screen_off_before_sleep_min": 60,
+            "wind_down_min": 15,
+            "target_sleep_hours": 8.0
+        },
+    },
+]
+PLAN_TEMPLATES = tuple(
+    MappingProxyType({"recommendations": tuple(t["recommendations"]),
+                      "structured": MappingProxyType(t["structured"])})
+    for t in _PLAN_TEMPLATES
+)
+del _PLAN_TEMPLATES
+
+
+def map_probs_to_plan(probs: np.ndarray) -> Dict[str, Any]:
+    """
+    Input: probs (1d array of length NUM_PLANS)
+    Returns: plan dict with chosen category, confidence, recommendations and structured fields
+    """
+    idx = int(np.argmax(probs))
+    template = PLAN_TEMPLATES[idx]
+    return {
+        "plan_name": PLAN_CATEGORIES[idx],
+        "confidence": round(float(probs[idx]), 3),
+        "recommendations": list(template["recommendations"]),
+        "structured": dict(template["structured"])
+    }
+
+# ---------------------------
+# Response serialization
+# ---------------------------
+# orjson when installed (~10x faster than json.dumps here), stdlib json
+# otherwise. Both produce compact UTF-8 bytes that decode to the same values;
+# only the spelling of some floats differs (orjson writes 1e-05 as 0.00001).
+# _json_default covers what neither encodes natively: read-only mappings,
+# and numpy values for stdlib json (float32 as its shortest repr, like
+# orjson, not widened to float64 digits). Splicing pre-serialized plan
+# fragments into the body was measured too and loses to a single orjson
+# pass (bench_predict.py --serialization), so plans stay plain dicts.
+JSON_ENCODER = "orjson" if orjson is not None else "json"
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, MappingProxyType):
+        return dict(obj)
+    if isinstance(obj, np.ndarray):
+        return [_json_default(v) if isinstance(v, (np.ndarray, np.generic)) else v for v in obj]
+    if isinstance(obj, np.floating):
+        return float(obj) if isinstance(obj, float) else float(str(obj))
+    if isinstance(obj, (np.integer, np.bool_)):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# reused: json.dumps(..., separators=...) builds a new encoder on every call
+_stdlib_encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False, default=_json_default)
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return _stdlib_encoder.encode(obj).encode("utf-8")
+
+
+def encode_result(result: Dict[str, Any]) -> bytes:
+    """JSON body for one predict result ({"input", "probs", "plan"})."""
+    t0 = time.perf_counter()
+    body = dumps(result)
+    _STAGE_SERIALIZE.observe(time.perf_counter() - t0)
+    return body
+
+
+def encode_results(results: List[Dict[str, Any]]) -> bytes:
+    """JSON body for a batch: {"results": [...]}."""
+    t0 = time.perf_counter()
+    body = dumps({"results": results})
+    _STAGE_SERIALIZE.observe(time.perf_counter() - t0)
+    return body
+
+# ---------------------------
+# Prediction helpers
+# ---------------------------
+REQUIRED_FIELDS = ["social_media_hours", "texting_hours", "personality"]
+MAX_BATCH_PAYLOADS = 1024
+
+# Per-stage latency histograms (mindpulse_stage_seconds{stage=...}); each
+# call observes once, so a batch is one sample per stage.
+STAGE_PARSE = metrics.STAGE_SECONDS.labels("parse")
+_STAGE_FEATURES = metrics.STAGE_SECONDS.labels("features")
+_STAGE_SCALER = metrics.STAGE_SECONDS.labels("scaler")
+_STAGE_FORWARD = metrics.STAGE_SECONDS.labels("forward")
+_STAGE_PLAN = metrics.STAGE_SECONDS.labels("plan")
+_STAGE_SERIALIZE = metrics.STAGE_SECONDS.labels("serialize")
+
+
+def _hours(payload: Dict[str, Any], field: str) -> float:
+    try:
+        value = float(payload[field])
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be a number, got {payload[field]!r}")
+    if not math.isfinite(value):
+        raise ValueError(f"{field} must be finite, got {value}")
+    return value
+
+
+def parse_payload(payload: Dict[str, Any]) -> Tuple[float, float, str]:
+    """
+    Validate a request payload and return normalized (social, texting, personality).
+    Raises ValueError on missing fields, non-numeric or non-finite hours, or unknown personality.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("Payload must be a JSON object")
+    for k in REQUIRED_FIELDS:
+        if k not in payload:
+            raise ValueError(f"Missing required field: {k}")
+
+    social = _hours(payload, "social_media_hours")
+    texting = _hours(payload, "texting_hours")
+    personality = str(payload["personality"]).lower()
+    if personality not in PERSONALITY_MAP:
+        raise ValueError(f"Unknown personality '{personality}'. Valid: {PERSONALITY_LIST}")
+    return social, texting, personality
+
+
+def features_from_inputs(inputs: List[Tuple[float, float, str]]) -> np.ndarray:
+    """
+    Build the raw (unscaled) feature matrix, shape (N, 2 + NUM_PERSONALITIES),
+    for a list of parsed inputs.
+    """
+    X_raw = np.zeros((len(inputs), 2 + NUM_PERSONALITIES))
+    for row, (social, texting, personality) in enumerate(inputs):
+        X_raw[row, 0] = social
+        X_raw[row, 1] = texting
+        X_raw[row, 2 + PERSONALITY_MAP[personality]] = 1.0
+    return X_raw
+
+
+def _raw_features_from_codes(social: np.ndarray, texting: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """Raw feature matrix (N, 2 + NUM_PERSONALITIES) from numeric columns and personality codes."""
+    X_raw = np.zeros((len(codes), 2 + NUM_PERSONALITIES))
+    X_raw[:, 0] = social
+    X_raw[:, 1] = texting
+    X_raw[np.arange(len(codes)), 2 + codes] = 1.0
+    return X_raw
+
+
+def build_features(df: "pd.DataFrame", scaler: "StandardScaler" = None):
+    """
+    Convert DataFrame with columns social_media_hours, texting_hours, personality -> numeric matrix
+    One-hot encode personality and scale numeric features.
+    Returns (X, scaler) where scaler is fitted if not provided.
+    """
+    p_codes = df["personality"].map(PERSONALITY_MAP).astype(int).to_numpy()
+    X_raw = _raw_features_from_codes(df["social_media_hours"].astype(float).to_numpy(),
+                                     df["texting_hours"].astype(float).to_numpy(),
+                                     p_codes)  # shape (N, 2+NUM_PERSONALITIES)
+
+    if scaler is None:
+        from sklearn.preprocessing import StandardScaler
+
+        scaler = StandardScaler()
+        X = scaler.fit_transform(X_raw)
+    else:
+        X = scaler.transform(X_raw)
+
+    return X, scaler
+
+
+def _result(inputs: Tuple[float, float, str], probs: List[float], plan: Dict[str, Any]) -> Dict[str, Any]:
+    social, texting, personality = inputs
+    return {
+        "input": {
+            "social_media_hours": social,
+            "texting_hours": texting,
+            "personality": personality
+        },
+        "probs": probs,
+        "plan": plan
+    }
+
+
+def predict_inputs(inputs: List[Tuple[float, float, str]], model, scaler,
+                   cache: Optional["PredictionCache"] = None, lookup: bool = True,
+                   generation: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Run one forward pass over all parsed inputs and split the softmax rows
+    back into one result dict per input. Pass scaler=None for models that take
+    raw features (NumpyPlanner).
+
+    With a cache, hits skip the forward pass and plan mapping; only the misses
+    (at their quantized coordinates) are scored, then stored. lookup=False
+    only stores, for callers that already checked the cache (cached_result).
+    `generation` is cache.generation as read before `model` was: results are
+    not stored if the model was swapped since (default: read it now).
+    """
+    if cache is not None and generation is None:
+        generation = cache.generation
+    results: List[Optional[Dict[str, Any]]] = [None] * len(inputs)
+    misses = []
+    for i, item in enumerate(inputs):
+        cached = cache.get(item) if cache is not None and lookup else None
+        if cached is not None:
+            results[i] = _result(item, *cached)
+        else:
+            misses.append(i)
+    if not misses:
+        return results
+
+    scored = [cache.quantize(inputs[i]) if cache is not None else inputs[i] for i in misses]
+    t0 = time.perf_counter()
+    X = features_from_inputs(scored)
+    t1 = time.perf_counter()
+    if scaler is not None:
+        X = scaler.transform(X)
+        _STAGE_SCALER.observe(time.perf_counter() - t1)
+    t2 = time.perf_counter()
+    probs_batch = model.predict(X, verbose=0)  # softmax probabilities
+    t3 = time.perf_counter()
+
+    for i, probs in zip(misses, probs_batch):
+        value = (probs.tolist(), map_probs_to_plan(probs))
+        if cache is not None:
+            cache.put(inputs[i], value, generation)
+        results[i] = _result(inputs[i], *value)
+    _STAGE_FEATURES.observe(t1 - t0)
+    _STAGE_FORWARD.observe(t3 - t2)
+    _STAGE_PLAN.observe(time.perf_counter() - t3)
+    metrics.PREDICTED_ROWS.inc(len(misses))
+    return results
+
+
+def predict_plans_from_payloads(payloads: List[Dict[str, Any]], model, scaler,
+                                cache: Optional["PredictionCache"] = None,
+                                generation: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Batched variant of predict_plan_from_payload: validates every payload,
+    then scores them all with a single model.predict call.
+    """
+    t0 = time.perf_counter()
+    inputs = []
+    for i, payload in enumerate(payloads):
+        try:
+            inputs.append(parse_payload(payload))
+        except ValueError as ve:
+            raise ValueError(f"payloads[{i}]: {ve}")
+    STAGE_PARSE.observe(time.perf_counter() - t0)
+    if not inputs:
+        return []
+    return predict_inputs(inputs, model, scaler, cache, generation=generation)
+
+
+def predict_plan_from_payload(payload: Dict[str, Any], model, scaler,
+                              cache: Optional["PredictionCache"] = None) -> Dict[str, Any]:
+    """
+    payload expected keys:
+      - social_media_hours (float)
+      - texting_hours (float)
+      - personality (string)
+    Returns JSON-serializable dict with model outputs and plan.
+    """
+    t0 = time.perf_counter()
+    inputs = parse_payload(payload)
+    STAGE_PARSE.observe(time.perf_counter() - t0)
+    return predict_inputs([inputs], model, scaler, cache)[0]
+
+
+def cached_result(inputs: Tuple[float, float, str], cache: Optional["PredictionCache"]) -> Optional[Dict[str, Any]]:
+    """Return the result for `inputs` straight from the cache, or None on a miss."""
+    if cache is None:
+        return None
+    cached = cache.get(inputs)
+    return _result(inputs, *cached) if cached is not None else None
+
+# ---------------------------
+# Response cache
+# ---------------------------
+class PredictionCache:
+    """
+    Thread-safe LRU cache of (probs, plan) keyed on normalized inputs.
+
+    - max_size: entries kept before least-recently-used ones are evicted
+    - quantum: grid step (hours) the two numeric inputs are snapped to; 0 keys on exact values
+    - ttl_seconds: entries older than this are dropped on access; 0 disables TTL
+    - watch_paths: model/scaler files; the cache is cleared when any of them changes
+
+    Every clear (model swap, changed files) bumps `generation`. A forward pass
+    that read the generation before its model stores with put(..., generation)
+    and is dropped if the model changed meanwhile; entries are stamped too, so
+    get() never returns one from an older generation.
+
+    Cached plan dicts are shared between responses and must not be mutated.
+    """
+
+    WATCH_INTERVAL = 1.0  # seconds between stat() checks of watch_paths
+
+    def __init__(self, max_size: int = 4096, quantum: float = 0.0, ttl_seconds: float = 0.0,
+                 watch_paths: Sequence[str] = ()):
+        self.max_size = max(1, int(max_size))
+        self.quantum = max(0.0, float(quantum))
+        self.ttl = max(0.0, float(ttl_seconds))
+        self.watch_paths = list(watch_paths)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.stale_puts = 0
+        self.generation = 0
+        self._entries: "OrderedDict[tuple, Tuple[float, int, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._signature = self._file_signature()
+        self._next_check = time.monotonic() + self.WATCH_INTERVAL
+
+    def _file_signature(self) -> tuple:
+        sig = []
+        for path in self.watch_paths:
+            try:
+                st = os.stat(path)
+                sig.append((path, st.st_mtime_ns, st.st_size))
+            except OSError:
+                sig.append((path, None, None))
+        return tuple(sig)
+
+    def _check_files(self, now: float) -> None:
+        if now < self._next_check:
+            return
+        self._next_check = now + self.WATCH_INTERVAL
+        signature = self._file_signature()
+        if signature != self._signature:
+            self._signature = signature
+            self._invalidate()
+
+    def _invalidate(self) -> None:
+        self._entries.clear()
+        self.generation += 1
+        self.invalidations += 1
+
+    def quantize(self, inputs: Tuple[float, float, str]) -> Tuple[float, float, str]:
+        social, texting, personality = inputs
+        if self.quantum > 0:
+            social = round(social / self.quantum) * self.quantum
+            texting = round(texting / self.quantum) * self.quantum
+        return social, texting, personality
+
+    def _key(self, inputs: Tuple[float, float, str]) -> tuple:
+        social, texting, personality = inputs
+        if self.quantum > 0:
+            return round(social / self.quantum), round(texting / self.quantum), personality
+        return inputs
+
+    def get(self, inputs: Tuple[float, float, str]) -> Optional[Any]:
+        key = self._key(inputs)
+        now = time.monotonic()
+        with self._lock:
+            self._check_files(now)
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] != self.generation:
+                del self._entries[key]
+                entry = None
+            elif entry is not None and self.ttl and now - entry[0] > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, inputs: Tuple[float, float, str], value: Any, generation: Optional[int] = None) -> None:
+        """Store `value`; dropped if `generation` (read before the forward pass) is no longer current."""
+        key = self._key(inputs)
+        now = time.monotonic()
+        with self._lock:
+            self._check_files(now)
+            if generation is not None and generation != self.generation:
+                self.stale_puts += 1
+                return
+            self._entries[key] = (now, self.generation, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._invalidate()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "stale_puts": self.stale_puts,
+                "generation": self.generation,
+            }
+
+# ---------------------------
+# Server-side micro-batching
+# ---------------------------
+class MicroBatcher:
+    """
+    Gathers concurrent single predictions for up to `max_wait_ms` (or until
+    `max_batch_size` requests are queued) and runs them as one forward pass.
+
+    `predict_fn` takes a list of parsed inputs and returns one result per input;
+    any other count fails the whole batch, like an exception from predict_fn.
+    """
+
+    def __init__(self, predict_fn: Callable[[List[Any]], List[Any]],
+                 max_batch_size: int = 32, max_wait_ms: float = 2.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.batch_sizes = Counter()  # batch size -> number of forward passes
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, item: Any) -> Any:
+        """Queue one input and block until its result is ready."""
+        slot = {"done": threading.Event(), "result": None, "error": None}
+        self._queue.put((item, slot))
+        slot["done"].wait()
+        if slot["error"] is not None:
+            raise slot["error"]
+        return slot["result"]
+
+    def _collect(self) -> List[Tuple[Any, dict]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                if timeout <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            self.batch_sizes[len(batch)] += 1
+            try:
+                results = self.predict_fn([item for item, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"predict_fn returned {len(results)} result(s) for {len(batch)} input(s)")
+                for (_, slot), result in zip(batch, results):
+                    slot["result"] = result
+            except Exception as e:
+                for _, slot in batch:
+                    slot["error"] = e
+            for _, slot in batch:
+                slot["done"].set()
@@ -0,0 +1,295 @@
+"""
+Versioned model registry and hot-swappable serving slot.
+
+Layout under REGISTRY_DIR (./saved_models/registry by default):
+    v0001/manifest.json        version, backend, per-file sha256, created_at, note
+    v0001/mindboost_planner.npz            (numpy backend)
+    v0002/mindboost_saved.keras, scaler.npz (keras backend: model + scaler pair)
+    CURRENT                    version being served (written atomically)
+    PINNED                     present while CURRENT is pinned; publish() then stops advancing it
+
+A version directory is staged under a temp name and renamed into place, so
+readers only ever see complete model/scaler pairs with their manifest.
+
+ServingModel holds (version, model, scaler) as one tuple that is replaced in a
+single assignment, so a request never pairs a model with another version's
+scaler. RegistryWatcher polls CURRENT and swaps in new versions after a
+background load and a warm-up prediction; requests keep using the old
+version until the swap.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import traceback
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from mindpulse_inference import (
+    LEGACY_SCALER_PATH,
+    MODEL_DIR,
+    MODEL_PATH,
+    NUM_PLANS,
+    NUMPY_PATH,
+    PERSONALITY_LIST,
+    SCALER_PATH,
+    NumpyPlanner,
+    features_from_inputs,
+    load_scaler,
+)
+
+REGISTRY_DIR = os.path.join(MODEL_DIR, "registry")
+MANIFEST_NAME = "manifest.json"
+MANIFEST_SCHEMA_VERSION = 1
+WATCH_INTERVAL = 1.0  # seconds between checks of CURRENT
+
+# File name inside a version directory for each artifact role, per backend.
+BACKEND_FILES = {
+    "numpy": {"weights": os.path.basename(NUMPY_PATH)},
+    "keras": {"model": os.path.basename(MODEL_PATH), "scaler": os.path.basename(SCALER_PATH)},
+}
+
+# One row per personality: scored before a new version is swapped in.
+WARMUP_INPUTS = [(2.0, 3.0, personality) for personality in PERSONALITY_LIST]
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_atomic(path: str, text: str) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class ModelRegistry:
+    def __init__(self, root: str = REGISTRY_DIR):
+        self.root = root
+        self.current_path = os.path.join(root, "CURRENT")
+        self.pinned_path = os.path.join(root, "PINNED")
+
+    def versions(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if name.startswith("v") and name[1:].isdigit()
+                      and os.path.exists(os.path.join(self.root, name, MANIFEST_NAME)))
+
+    def manifest(self, version: str) -> Dict:
+        with open(os.path.join(self.root, version, MANIFEST_NAME)) as f:
+            return json.load(f)
+
+    def publish(self, backend: str, sources: Dict[str, str], note: str = "") -> str:
+        """
+        Copy one model/scaler pair (role -> source path, roles as in
+        BACKEND_FILES[backend]) into a new version and, unless pinned, make it
+        CURRENT. Returns the new version name.
+        """
+        expected = BACKEND_FILES[backend]
+        if set(sources) != set(expected):
+            raise ValueError(f"{backend} publishes {sorted(expected)}, got {sorted(sources)}")
+        os.makedirs(self.root, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=self.root)
+        try:
+            files = {}
+            for role, src in sources.items():
+                dst = os.path.join(staging, expected[role])
+                shutil.copyfile(src, dst)
+                files[expected[role]] = _sha256(dst)
+            manifest = {"schema_version": MANIFEST_SCHEMA_VERSION, "backend": backend, "files": files,
+                        "created_at": time.time(), "note": note}
+            _write_atomic(os.path.join(staging, MANIFEST_NAME), json.dumps(manifest, indent=2))
+            while True:
+                versions = self.versions()
+                version = f"v{int(versions[-1][1:]) + 1 if versions else 1:04d}"
+                try:
+                    os.rename(staging, os.path.join(self.root, version))  # atomic; fails if taken
+                    break
+                except OSError:
+                    if not os.path.exists(os.path.join(self.root, version)):
+                        raise
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        if not self.pinned():
+            _write_atomic(self.current_path, version)
+        return version
+
+    def backend(self, version: Optional[str] = None) -> Optional[str]:
+        """Backend of `version` (default: current), or None if nothing is published."""
+        version = version or self.current()
+        return self.manifest(version)["backend"] if version else None
+
+    def current(self) -> Optional[str]:
+        """Version to serve: CURRENT if set, else the latest published."""
+        try:
+            with open(self.current_path) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            versions = self.versions()
+            return versions[-1] if versions else None
+
+    def pinned(self) -> bool:
+        return os.path.exists(self.pinned_path)
+
+    def pin(self, version: str) -> None:
+        """Serve `version` until unpin(), even when newer versions are published."""
+        if version not in self.versions():
+            raise ValueError(f"Unknown model version '{version}'. Known: {self.versions()}")
+        _write_atomic(self.pinned_path, version)
+        _write_atomic(self.current_path, version)
+
+    def unpin(self) -> Optional[str]:
+        """Return to serving the latest version."""
+        if self.pinned():
+            os.remove(self.pinned_path)
+        versions = self.versions()
+        if versions:
+            _write_atomic(self.current_path, versions[-1])
+        return self.current()
+
+    def rollback(self) -> str:
+        """Pin the version published before the current one."""
+        versions = self.versions()
+        current = self.current()
+        index = versions.index(current) if current in versions else len(versions)
+        if index <= 0:
+            raise ValueError(f"No version before '{current}' to roll back to")
+        self.pin(versions[index - 1])
+        return versions[index - 1]
+
+    def load(self, version: str):
+        """(model, scaler) for `version`, after checking the files against the manifest."""
+        directory = os.path.join(self.root, version)
+        manifest = self.manifest(version)
+        if manifest.get("schema_version") != MANIFEST_SCHEMA_VERSION:
+            raise ValueError(f"Unsupported manifest schema in {directory}")
+        for name, digest in manifest["files"].items():
+            if _sha256(os.path.join(directory, name)) != digest:
+                raise ValueError(f"Checksum mismatch for {name} in {directory}")
+        names = dict(BACKEND_FILES[manifest["backend"]])
+        if os.path.basename(LEGACY_SCALER_PATH) in manifest["files"]:  # published before scaler.npz
+            names["scaler"] = os.path.basename(LEGACY_SCALER_PATH)
+        files = {role: os.path.join(directory, name) for role, name in names.items()}
+        if manifest["backend"] == "numpy":
+            return NumpyPlanner.load(files["weights"]), None
+        from tensorflow import keras
+
+        return keras.models.load_model(files["model"]), load_scaler(files["scaler"])
+
+
+def warm_up(model, scaler) -> None:
+    """Score WARMUP_INPUTS once; raises ValueError if the outputs are not valid probabilities."""
+    # straight to model.predict: predict_inputs would count these rows in the request metrics
+    X = features_from_inputs(WARMUP_INPUTS)
+    if scaler is not None:
+        X = scaler.transform(X)
+    probs = np.asarray(model.predict(X, verbose=0))
+    if probs.shape != (len(WARMUP_INPUTS), NUM_PLANS) or not np.all(np.isfinite(probs)) \
+            or not np.allclose(probs.sum(axis=1), 1.0, atol=1e-3):
+        raise ValueError("warm-up produced invalid probabilities")
+
+
+class ServingModel:
+    """
+    The (version, model, scaler) being served. Readers take `.current` (or
+    get()) once per request; swap() replaces the whole tuple at once.
+    get() loads lazily with `loader` and only once, however many requests
+    arrive together.
+    """
+
+    def __init__(self, loader: Callable[[], Tuple[str, object, object]],
+                 on_swap: Optional[Callable[[str], None]] = None):
+        self.loader = loader
+        self.on_swap = on_swap
+        self.current: Optional[Tuple[str, object, object]] = None
+        self._load_lock = threading.Lock()
+
+    def get(self) -> Tuple[str, object, object]:
+        current = self.current
+        if current is None:
+            with self._load_lock:
+                current = self.current
+                if current is None:
+                    current = self.current = self.loader()
+        return current
+
+    def swap(self, version: str, model, scaler) -> None:
+        self.current = (version, model, scaler)
+        if self.on_swap is not None:
+            self.on_swap(version)
+
+
+class RegistryWatcher:
+    """Background thread that follows the registry's CURRENT version into a ServingModel."""
+
+    def __init__(self, registry: ModelRegistry, serving: ServingModel, interval: float = WATCH_INTERVAL):
+        self.registry = registry
+        self.serving = serving
+        self.interval = interval
+        self.reloads = 0
+        self.failures = 0
+        self._failed: Optional[str] = None  # don't retry a broken version until CURRENT moves
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def check(self) -> bool:
+        """Load, warm up and swap in CURRENT if it changed. Returns True on a swap."""
+        version = self.registry.current()
+        loaded = self.serving.current
+        if version is None or (loaded is not None and loaded[0] == version) or version == self._failed:
+            return False
+        try:
+            model, scaler = self.registry.load(version)
+            warm_up(model, scaler)
+        except Exception:
+            self._failed = version
+            self.failures += 1
+            print(f"Model version {version} failed to load; still serving "
+                  f"{loaded[0] if loaded else 'nothing'}")
+            traceback.print_exc()
+            return False
+        self._failed = None
+        self.serving.swap(version, model, scaler)
+        self.reloads += 1
+        print(f"Now serving model version {version}")
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self) -> "RegistryWatcher":
+        self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def registry_loader(registry: ModelRegistry) -> Callable[[], Tuple[str, object, object]]:
+    """ServingModel loader for the registry's CURRENT version (warmed up)."""
+    def load():
+        version = registry.current()
+        if version is None:
+            raise FileNotFoundError(f"No model versions in {registry.root}. Publish one with --publish")
+        model, scaler = registry.load(version)
+        warm_up(model, scaler)
+        return version, model, scaler
+    return load
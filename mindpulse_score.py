@@ -0,0 +1,235 @@
+"""
+Offline bulk scoring: `python mindpulse_service.py --score cohort.csv --output scores.parquet`.
+
+Streams a CSV or Parquet file with social_media_hours, texting_hours and
+personality columns in chunks of --chunk-size rows. Each chunk is scored on a
+pool of worker processes with one vectorized build_features call and one
+large-batch forward pass, and written as columns:
+    [id column,] prob_<plan> for each of PLAN_CATEGORIES, plan_index, confidence
+confidence is the top probability. Rows with an unknown personality or
+non-numeric hours are kept (so output rows line up with input rows) with
+plan_index -1 and NaN probabilities.
+
+Output format follows the extension:
+    .parquet   one row group per chunk (needs pyarrow)
+    .csv       appended chunk by chunk
+    otherwise  a directory of columnar .npz parts (part-00000.npz, ...), NumPy only
+
+Memory is bounded by the chunk size, not the input size: at most
+2 x workers chunks are in flight, and results are written in input order as
+they complete. Target throughput is SCORE_TARGET_ROWS_PER_SEC with the NumPy
+backend on one core; the summary reports what was reached.
+"""
+
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Dict, Iterator, Optional
+
+import numpy as np
+
+from mindpulse_inference import (
+    NUM_PLANS,
+    PERSONALITY_LIST,
+    PLAN_CATEGORIES,
+    REQUIRED_FIELDS,
+    NumpyPlanner,
+    NumpyScaler,
+    build_features,
+    load_serving_backend,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+SCORE_CHUNK_SIZE = 100_000
+SCORE_TARGET_ROWS_PER_SEC = 500_000
+
+# NumpyPlanner has the scaler folded in; build_features still wants one.
+_IDENTITY_SCALER = NumpyScaler(np.zeros(2 + len(PERSONALITY_LIST)), np.ones(2 + len(PERSONALITY_LIST)))
+_worker_model = None  # (model, scaler) per worker process, see _init_worker
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+PROB_COLUMNS = [f"prob_{_slug(name)}" for name in PLAN_CATEGORIES]
+
+
+# ---------------------------
+# Input
+# ---------------------------
+def iter_input_chunks(path: str, chunk_size: int = SCORE_CHUNK_SIZE,
+                      id_column: Optional[str] = None) -> Iterator["pd.DataFrame"]:
+    """DataFrames of up to `chunk_size` rows from a .csv or .parquet file, only the needed columns."""
+    columns = list(REQUIRED_FIELDS) + ([id_column] if id_column else [])
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet input needs pyarrow (pip install pyarrow)") from e
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+        return
+    import pandas as pd
+
+    yield from pd.read_csv(path, usecols=columns, chunksize=chunk_size,
+                           dtype={"personality": "string"}, engine="c")
+
+
+def _prepare(df: "pd.DataFrame") -> "pd.DataFrame":
+    """Coerce a raw chunk to float hours and a personality categorical (-1 code = unknown)."""
+    import pandas as pd
+
+    df = df.copy()
+    df["social_media_hours"] = pd.to_numeric(df["social_media_hours"], errors="coerce")
+    df["texting_hours"] = pd.to_numeric(df["texting_hours"], errors="coerce")
+    names = df["personality"].str.lower()
+    df["personality"] = pd.Categorical(names.where(names.isin(PERSONALITY_LIST)), categories=PERSONALITY_LIST)
+    return df
+
+
+# ---------------------------
+# Scoring (runs in the worker processes)
+# ---------------------------
+def _init_worker(backend: str, variant: str = "float32") -> None:
+    global _worker_model
+    _worker_model = load_serving_backend(backend, variant)
+
+
+def score_chunk(df: "pd.DataFrame", id_column: Optional[str] = None) -> Dict[str, np.ndarray]:
+    """Output columns for one _prepare'd chunk."""
+    model, scaler = _worker_model
+    n = len(df)
+    probs = np.full((n, NUM_PLANS), np.nan, dtype=np.float32)
+    plan_index = np.full(n, -1, dtype=np.int8)
+    valid = ((df["personality"].cat.codes.to_numpy() >= 0)
+             & np.isfinite(df["social_media_hours"].to_numpy(dtype=np.float64))
+             & np.isfinite(df["texting_hours"].to_numpy(dtype=np.float64)))
+    if valid.any():
+        X, _ = build_features(df[valid], scaler if scaler is not None else _IDENTITY_SCALER)
+        if isinstance(model, NumpyPlanner):
+            scored = model.predict(X)
+        else:
+            scored = model.predict(X, batch_size=len(X), verbose=0)
+        probs[valid] = scored
+        plan_index[valid] = np.argmax(scored, axis=1)
+    columns = {}
+    if id_column:
+        columns[id_column] = df[id_column].to_numpy()
+    columns.update(zip(PROB_COLUMNS, probs.T))
+    columns["plan_index"] = plan_index
+    columns["confidence"] = probs.max(axis=1)
+    return columns
+
+
+# ---------------------------
+# Output
+# ---------------------------
+class _ParquetWriter:
+    def __init__(self, path: str):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet output needs pyarrow (pip install pyarrow); "
+                              "use a .csv path or a directory for .npz parts") from e
+        self._pa, self._pq, self.path, self._writer = pa, pq, path, None
+
+    def write(self, columns: Dict[str, np.ndarray]) -> None:
+        table = self._pa.table(columns)
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+class _CsvWriter:
+    def __init__(self, path: str):
+        self.path = path
+        self._header = True
+
+    def write(self, columns: Dict[str, np.ndarray]) -> None:
+        import pandas as pd
+
+        pd.DataFrame(columns).to_csv(self.path, mode="w" if self._header else "a", header=self._header,
+                                     index=False, float_format="%.6g")
+        self._header = False
+
+    def close(self) -> None:
+        pass
+
+
+class _NpzPartsWriter:
+    def __init__(self, path: str):
+        self.path = path
+        self._parts = 0
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):  # parts of an earlier, possibly longer, run
+            if name.startswith("part-") and name.endswith(".npz"):
+                os.remove(os.path.join(path, name))
+
+    def write(self, columns: Dict[str, np.ndarray]) -> None:
+        np.savez(os.path.join(self.path, f"part-{self._parts:05d}.npz"), **columns)
+        self._parts += 1
+
+    def close(self) -> None:
+        pass
+
+
+def _open_writer(path: str):
+    if path.endswith(".parquet"):
+        return _ParquetWriter(path)
+    if path.endswith(".csv"):
+        return _CsvWriter(path)
+    return _NpzPartsWriter(path)
+
+
+# ---------------------------
+# Driver
+# ---------------------------
+def score_file(input_path: str, output_path: str, backend: str = "auto", chunk_size: int = SCORE_CHUNK_SIZE,
+               workers: Optional[int] = None, id_column: Optional[str] = None,
+               variant: str = "float32") -> Dict[str, float]:
+    """
+    Score every row of `input_path` into `output_path` (see module docstring).
+    workers=None uses one process per CPU; 0 or 1 scores in this process.
+    Returns rows, invalid_rows, seconds and rows_per_s.
+    """
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    writer = _open_writer(output_path)
+    rows = invalid = 0
+    t0 = time.perf_counter()
+
+    def emit(columns: Dict[str, np.ndarray]) -> None:
+        nonlocal rows, invalid
+        writer.write(columns)
+        rows += len(columns["plan_index"])
+        invalid += int(np.count_nonzero(columns["plan_index"] < 0))
+
+    chunks = (_prepare(df) for df in iter_input_chunks(input_path, chunk_size, id_column))
+    try:
+        if workers <= 1:
+            _init_worker(backend, variant)
+            for chunk in chunks:
+                emit(score_chunk(chunk, id_column))
+        else:
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(backend, variant)) as pool:
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(pool.submit(score_chunk, chunk, id_column))
+                    if len(pending) >= 2 * workers:
+                        emit(pending.popleft().result())
+                while pending:
+                    emit(pending.popleft().result())
+    finally:
+        writer.close()
+    seconds = time.perf_counter() - t0
+    return {"rows": rows, "invalid_rows": invalid, "seconds": seconds,
+            "rows_per_s": rows / seconds if seconds > 0 else 0.0}
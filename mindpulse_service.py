@@ -9,52 +9,133 @@
 """
 
 import os
-import json
+import gc
+import glob
+import time
+import random
+import signal
+import socket
 import argparse
-from typing import Dict, Any
+import functools
+import threading
+import traceback
+from typing import Dict, Any, List, Tuple, Callable, Optional, TYPE_CHECKING
 
 import numpy as np
-import pandas as pd
-from sklearn.preprocessing import StandardScaler
-import pickle
-
-import tensorflow as tf
-from tensorflow import keras
-from tensorflow.keras import layers
-
-from flask import Flask, request, jsonify
-
-
-MODEL_DIR = "./saved_models"
-MODEL_PATH = os.path.join(MODEL_DIR, "mindboost_saved.keras")
-SCALER_PATH = os.path.join(MODEL_DIR, "scaler.pkl")
-os.makedirs(MODEL_DIR, exist_ok=True)
-
-# Personality animals
-PERSONALITY_MAP = {
-    "lion": 0,
-    "fox": 1,
-    "wolf": 2,
-    "owl": 3,
-    "bear": 4,
-    "snake": 5,
-    "dolphin": 6
-}
-PERSONALITY_LIST = list(PERSONALITY_MAP.keys())
-NUM_PERSONALITIES = len(PERSONALITY_LIST)
-
-# Plan categories
-PLAN_CATEGORIES = [
-    "Stress-Relief & Mindfulness",
-    "Productivity & Focus",
-    "Balanced Lifestyle",
-    "Sleep & Recovery"
-]
-NUM_PLANS = len(PLAN_CATEGORIES)
+
+from flask import Flask, Response, g, request, jsonify
+
+import mindpulse_metrics as metrics
+from mindpulse_admission import (
+    ADMISSION_MAX_CONCURRENCY,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_QUEUE_TIMEOUT,
+    ADMISSION_RETRY_AFTER,
+    AdmissionLimiter,
+    Overloaded,
+    admission_slots,
+    shorten_switch_interval,
+)
+from mindpulse_registry import REGISTRY_DIR, ModelRegistry, RegistryWatcher, ServingModel, registry_loader
+
+# Serving only needs the NumPy inference backend; pandas, sklearn and
+# TensorFlow are imported inside the training/export/Keras functions.
+from mindpulse_inference import (
+    MODEL_DIR,
+    MODEL_PATH,
+    SCALER_PATH,
+    NUMPY_PATH,
+    MAX_BATCH_PAYLOADS,
+    PERSONALITY_MAP,
+    PERSONALITY_LIST,
+    NUM_PERSONALITIES,
+    PLAN_CATEGORIES,
+    NUM_PLANS,
+    NUMPY_TOLERANCE,
+    MODEL_VARIANTS,
+    MicroBatcher,
+    NumpyPlanner,
+    PredictionCache,
+    STAGE_PARSE,
+    cached_result,
+    encode_result,
+    encode_results,
+    _raw_features_from_codes,
+    build_features,
+    features_from_inputs,
+    map_probs_to_plan,
+    parse_payload,
+    predict_inputs,
+    predict_plan_from_payload,
+    predict_plans_from_payloads,
+    save_numpy_weights,
+    save_quantized_weights,
+    variant_path,
+    load_model_and_scaler,
+    load_scaler,
+    save_scaler,
+    resolve_backend,
+    backend_artifact_paths,
+    load_serving_backend,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from sklearn.preprocessing import StandardScaler
+
 
 # ---------------------------
 # Synthetic data for demo model training wisam >:(
 # ---------------------------
+# Score offset per personality code (see PERSONALITY_MAP):
+#   owl +1.5 (nocturnal -> might need sleep recovery more)
+#   dolphin -1.0 (playful/athletic -> balanced)
+#   lion -0.7 (confident -> productivity)
+#   snake +0.8 (sneaky -> stress-like)
+PERSONALITY_SCORE_OFFSETS = np.zeros(NUM_PERSONALITIES)
+PERSONALITY_SCORE_OFFSETS[PERSONALITY_MAP["owl"]] = 1.5
+PERSONALITY_SCORE_OFFSETS[PERSONALITY_MAP["dolphin"]] = -1.0
+PERSONALITY_SCORE_OFFSETS[PERSONALITY_MAP["lion"]] = -0.7
+PERSONALITY_SCORE_OFFSETS[PERSONALITY_MAP["snake"]] = 0.8
+
+SYNTHETIC_CHUNK_SIZE = 100_000
+
+
+def _synthetic_arrays(n_samples: int, rng: np.random.Generator):
+    """Sample (social, texting, personality_code, label) arrays of n_samples rows with array-level draws."""
+    # sample screen usage
+    social = np.clip(rng.normal(4.0, 2.0, n_samples), 0.0, 12.0)   # hours/day
+    texting = np.clip(rng.normal(2.5, 1.5, n_samples), 0.0, 10.0)  # hours/day
+    codes = rng.integers(0, NUM_PERSONALITIES, n_samples)
+    score = social * 0.6 + texting * 0.4 + PERSONALITY_SCORE_OFFSETS[codes]
+
+    # map score to label
+    label = np.select(
+        [score >= 8.0, score >= 5.0, score >= 3.0],
+        [3, 0, 1],  # Sleep & Recovery, Stress-Relief & Mindfulness, Productivity & Focus
+        default=2,  # Balanced Lifestyle
+    )
+    return social, texting, codes, label
+
+
+def _iter_synthetic_arrays(n_samples: int, chunk_size: int = SYNTHETIC_CHUNK_SIZE, seed: int = 42):
+    """_synthetic_arrays in chunks of `chunk_size` rows (the last one may be shorter) from one seeded stream."""
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_samples, chunk_size):
+        yield _synthetic_arrays(min(chunk_size, n_samples - start), rng)
+
+
+def _synthetic_frame(social, texting, codes, label):
+    import pandas as pd
+
+    return pd.DataFrame({
+        "social_media_hours": social,
+        "texting_hours": texting,
+        "personality": np.asarray(PERSONALITY_LIST, dtype=object)[codes],
+        "label": label,
+    })
+
+
 def generate_synthetic_wisam_data(n_samples: int = 3000, seed: int = 42):
     """
     Create synthetic dataset for prototyping.
@@ -65,66 +146,17 @@ def generate_synthetic_wisam_data(n_samples: int = 3000, seed: int = 42):
     Target:
       - plan_label (int 0..NUM_PLANS-1)
     """
+    return _synthetic_frame(*_synthetic_arrays(n_samples, np.random.default_rng(seed)))
 
-    rng = np.random.default_rng(seed)
-    rows = []
-
-    for i in range(n_samples):
-        # sample screen usage
-        social = float(np.clip(rng.normal(4.0, 2.0), 0.0, 12.0))   # hours/day
-        texting = float(np.clip(rng.normal(2.5, 1.5), 0.0, 10.0))  # hours/day
-        personality = PERSONALITY_LIST[int(rng.integers(0, NUM_PERSONALITIES))]
-        score = (social * 0.6 + texting * 0.4)
-        # personality animal
-        if personality == "owl":    # nocturnal -> might need sleep recovery more
-            score += 1.5
-        if personality == "dolphin":  # playful/athletic -> balanced
-            score -= 1.0
-        if personality == "lion":  # confident -> productivity
-            score -= 0.7
-        if personality == "snake":  # sneaky -> stress-like
-            score += 0.8
-
-        # map score to label
-        if score >= 8.0:
-            label = 3  # Sleep & Recovery
-        elif score >= 5.0:
-            label = 0  # Stress-Relief & Mindfulness
-        elif score >= 3.0:
-            label = 1  # Productivity & Focus
-        else:
-            label = 2  # Balanced Lifestyle
-
-        rows.append((social, texting, personality, label))
-
-    df = pd.DataFrame(rows, columns=["social_media_hours", "texting_hours", "personality", "label"])
-    return df
 
-# ---------------------------
-# Feature builder / scaler
-# ---------------------------
-def build_features(df: pd.DataFrame, scaler: StandardScaler = None):
+def iter_synthetic_wisam_data(n_samples: int, chunk_size: int = SYNTHETIC_CHUNK_SIZE, seed: int = 42):
     """
-    Convert DataFrame with columns social_media_hours, texting_hours, personality -> numeric matrix
-    One-hot encode personality and scale numeric features.
-    Returns (X, scaler) where scaler is fitted if not provided.
+    Stream the same synthetic distribution as generate_synthetic_wisam_data in
+    DataFrames of `chunk_size` rows (the last one may be shorter), so only one
+    chunk is in memory at a time.
     """
-    # numeric features
-    numeric = df[["social_media_hours", "texting_hours"]].astype(float).to_numpy()
-
-    # one-hot personality
-    p_codes = df["personality"].map(PERSONALITY_MAP).astype(int).to_numpy()
-    p_onehot = np.eye(NUM_PERSONALITIES)[p_codes]  # shape (N, NUM_PERSONALITIES)
-
-    X_raw = np.concatenate([numeric, p_onehot], axis=1)  # shape (N, 2+NUM_PERSONALITIES)
-
-    if scaler is None:
-        scaler = StandardScaler()
-        X = scaler.fit_transform(X_raw)
-    else:
-        X = scaler.transform(X_raw)
-
-    return X, scaler
+    for arrays in _iter_synthetic_arrays(n_samples, chunk_size, seed):
+        yield _synthetic_frame(*arrays)
 
 # ---------------------------
 # Model definition
@@ -133,6 +165,9 @@ def build_model(input_dim: int):
     """
     Build and compile a Keras model that outputs a softmax over PLAN_CATEGORIES
     """
+    from tensorflow import keras
+    from tensorflow.keras import layers
+
     inputs = layers.Input(shape=(input_dim,), name="input_features")
     x = layers.Dense(64, activation="relu")(inputs)
     x = layers.Dropout(0.2)(x)
@@ -161,165 +196,556 @@ def train_and_save(n_samples: int = 3000, epochs: int = 30, save_path: str = MOD
     print("Training model...")
     model.fit(X, y, validation_split=0.12, epochs=epochs, batch_size=64, verbose=1)
 
+    _save_model_and_scaler(model, scaler, save_path)
+
+
+def _save_model_and_scaler(model, scaler, save_path: str = MODEL_PATH):
     print(f"Saving model to {save_path} ...")
+    os.makedirs(MODEL_DIR, exist_ok=True)
     model.save(save_path, include_optimizer=False)
-    # save scaler
-    with open(SCALER_PATH, "wb") as f:
-        pickle.dump(scaler, f)
+    save_scaler(scaler, SCALER_PATH)
     print("Model and scaler saved.")
 
-
 # ---------------------------
-# Load model & scaler
+# Streaming training (tf.data)
 # ---------------------------
-def load_model_and_scaler(model_path: str = MODEL_PATH):
-    if not os.path.exists(model_path):
-        raise FileNotFoundError(f"Model not found at {model_path}. Train first with --train")
-    model = keras.models.load_model(model_path)
-    with open(SCALER_PATH, "rb") as f:
-        scaler = pickle.load(f)
-    return model, scaler
+# Each chunk is (social, texting, personality_code, label) arrays. Personality
+# stays an integer index until the tf.data map expands it one batch at a time,
+# so nothing of size O(--samples) is ever materialized. The model keeps the
+# same 9-feature input as build_model, so Keras and NumPy serving are unchanged.
+# Training rows pass through a bounded shuffle buffer so batches mix rows from
+# across chunks (and shards) instead of arriving in generation order.
+STREAM_VALIDATION_FRACTION = 0.12
+STREAM_MAX_VALIDATION = 50_000
+STREAM_SHUFFLE_BUFFER = 10_000  # rows
+
+
+def write_synthetic_shards(out_dir: str, n_samples: int, chunk_size: int = SYNTHETIC_CHUNK_SIZE,
+                           seed: int = 42) -> List[str]:
+    """Write the synthetic dataset to `out_dir` as .npz shards of `chunk_size` rows."""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for i, (social, texting, codes, label) in enumerate(_iter_synthetic_arrays(n_samples, chunk_size, seed)):
+        path = os.path.join(out_dir, f"shard_{i:05d}.npz")
+        np.savez(path, social_media_hours=social, texting_hours=texting,
+                 personality=codes.astype(np.int8), label=label.astype(np.int8))
+        paths.append(path)
+    print(f"Wrote {len(paths)} shard(s) to {out_dir}")
+    return paths
+
+
+def _iter_chunks(n_samples: int = 0, chunk_size: int = SYNTHETIC_CHUNK_SIZE, seed: int = 42,
+                 shard_paths: List[str] = ()):
+    """Yield (social, texting, personality_code, label) chunks from shards or the generator."""
+    if shard_paths:
+        for path in shard_paths:
+            with np.load(path, allow_pickle=False) as data:
+                yield (data["social_media_hours"], data["texting_hours"],
+                       data["personality"].astype(np.int32), data["label"].astype(np.int32))
+        return
+    for social, texting, codes, label in _iter_synthetic_arrays(n_samples, chunk_size, seed):
+        yield social, texting, codes.astype(np.int32), label.astype(np.int32)
+
+
+def fit_scaler_streaming(chunks) -> "StandardScaler":
+    """Fit a StandardScaler over all chunks with partial_fit (one pass, one chunk in memory)."""
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler()
+    for social, texting, codes, _ in chunks:
+        scaler.partial_fit(_raw_features_from_codes(social, texting, codes))
+    return scaler
+
+
+def make_stream_dataset(chunk_fn: Callable, scaler: "StandardScaler", batch_size: int = 64,
+                        shuffle_buffer: int = 0):
+    """
+    Build a tf.data pipeline over `chunk_fn()` (called once per epoch):
+    chunks are split into rows, shuffled through a `shuffle_buffer`-row buffer
+    (reshuffled every epoch; 0 keeps generation order), batched, then scaled
+    and one-hot expanded in a parallel map and prefetched.
+    """
+    import tensorflow as tf
+
+    def chunks():
+        for social, texting, codes, labels in chunk_fn():
+            yield np.stack([social, texting], axis=1).astype(np.float32), codes, labels
+
+    mean = tf.constant(scaler.mean_, dtype=tf.float32)
+    scale = tf.constant(scaler.scale_, dtype=tf.float32)
+
+    def to_features(numeric, codes, labels):
+        onehot = tf.one_hot(codes, NUM_PERSONALITIES, dtype=tf.float32)
+        X = (tf.concat([numeric, onehot], axis=1) - mean) / scale
+        return X, labels
+
+    dataset = tf.data.Dataset.from_generator(
+        chunks,
+        output_signature=(
+            tf.TensorSpec(shape=(None, 2), dtype=tf.float32),
+            tf.TensorSpec(shape=(None,), dtype=tf.int32),
+            tf.TensorSpec(shape=(None,), dtype=tf.int32),
+        ),
+    ).unbatch()
+    if shuffle_buffer > 0:
+        dataset = dataset.shuffle(shuffle_buffer, reshuffle_each_iteration=True)
+    return (dataset
+            .batch(batch_size)
+            .map(to_features, num_parallel_calls=tf.data.AUTOTUNE)
+            .prefetch(tf.data.AUTOTUNE))
+
+
+def train_and_save_streaming(n_samples: int = 3000, epochs: int = 30, save_path: str = MODEL_PATH,
+                             chunk_size: int = SYNTHETIC_CHUNK_SIZE, shard_dir: str = None,
+                             batch_size: int = 64, shuffle_buffer: int = STREAM_SHUFFLE_BUFFER):
+    """
+    Like train_and_save, but streams data through tf.data so peak memory is
+    bounded by chunk_size + shuffle_buffer rather than n_samples. With
+    shard_dir, trains on the .npz shards there (the last shard is held out
+    for validation when there are several); otherwise on the synthetic
+    generator with a separate validation stream. Prints samples/sec per epoch.
+    """
+    from tensorflow import keras
+
+    if shard_dir:
+        shard_paths = sorted(glob.glob(os.path.join(shard_dir, "*.npz")))
+        if not shard_paths:
+            raise FileNotFoundError(f"No .npz shards found in {shard_dir}")
+        train_shards = shard_paths[:-1] if len(shard_paths) > 1 else shard_paths
+        val_shards = shard_paths[-1:] if len(shard_paths) > 1 else []
+        train_chunks = lambda: _iter_chunks(shard_paths=train_shards)
+        val_chunks = (lambda: _iter_chunks(shard_paths=val_shards)) if val_shards else None
+    else:
+        n_val = min(int(n_samples * STREAM_VALIDATION_FRACTION), STREAM_MAX_VALIDATION)
+        train_chunks = lambda: _iter_chunks(n_samples - n_val, chunk_size, seed=42)
+        val_chunks = (lambda: _iter_chunks(n_val, chunk_size, seed=43)) if n_val else None
+
+    print("Fitting scaler (streaming pass)...")
+    scaler = fit_scaler_streaming(train_chunks())
+    n_train = int(np.max(scaler.n_samples_seen_))
+
+    train_ds = make_stream_dataset(train_chunks, scaler, batch_size, shuffle_buffer)
+    val_ds = make_stream_dataset(val_chunks, scaler, batch_size) if val_chunks else None
+
+    class SamplesPerSecond(keras.callbacks.Callback):
+        def on_epoch_begin(self, epoch, logs=None):
+            self.started = time.perf_counter()
+
+        def on_epoch_end(self, epoch, logs=None):
+            elapsed = time.perf_counter() - self.started
+            print(f"Epoch {epoch + 1}: {n_train / elapsed:,.0f} samples/sec")
+
+    print("Building model...")
+    model = build_model(input_dim=2 + NUM_PERSONALITIES)
+
+    print(f"Training model on {n_train:,} streamed samples...")
+    model.fit(train_ds, validation_data=val_ds, epochs=epochs, verbose=1,
+              callbacks=[SamplesPerSecond()])
+
+    _save_model_and_scaler(model, scaler, save_path)
+
 
 # ---------------------------
-# Plan mapping (turn predicted probs -> text + structured plan)
+# NumPy export
 # ---------------------------
-def map_probs_to_plan(probs: np.ndarray) -> Dict[str, Any]:
+def export_numpy(model_path: str = MODEL_PATH, out_path: str = NUMPY_PATH,
+                 tolerance: float = NUMPY_TOLERANCE, n_check: int = 2000) -> float:
     """
-    Input: probs (1d array of length NUM_PLANS)
-    Returns: plan dict with chosen category, confidence, recommendations and structured fields
+    Export the trained Keras model's Dense layers and the scaler statistics to
+    `out_path`, then check NumpyPlanner against model.predict on synthetic rows.
+    Returns the max absolute difference; raises ValueError if above `tolerance`.
     """
-    idx = int(np.argmax(probs))
-    confidence = float(probs[idx])
-
-    plan_name = PLAN_CATEGORIES[idx]
-
-    # recommendations & structured plan per category
-    if plan_name == "Stress-Relief & Mindfulness":
-        recs = [
-            "Start with 10 minutes daily guided breathing",
-            "Take 5-minute mindful breaks every hour",
-            "Evening reflection journaling for 5 minutes"
-        ]
-        structured = {
-            "daily_mindfulness_min": 10,
-            "micro_breaks_every_min": 60,
-            "evening_journal_min": 5
-        }
-    elif plan_name == "Productivity & Focus":
-        recs = [
-            "Use Pomodoro cycles: 25min focus / 5min break",
-            "Turn off notifications during focus blocks",
-            "Plan top-3 tasks each morning"
-        ]
-        structured = {
-            "focus_block_minutes": 25,
-            "break_minutes": 5,
-            "daily_top_tasks": 3
-        }
-    elif plan_name == "Balanced Lifestyle":
-        recs = [
-            "Keep a consistent sleep schedule",
-            "30 minutes of moderate exercise 3x per week",
-            "Weekly social time with friends/family"
-        ]
-        structured = {
-            "target_sleep_hours": 7.5,
-            "exercise_min_per_week": 90,
-            "social_meetups_per_week": 1
-        }
-    else:  # "Sleep & Recovery"
-        recs = [
-            "Avoid screens 60 minutes before bed",
-            "Wind-down routine: light stretching + breathing",
-            "Try to get consistent bedtime and wake time"
-        ]
-        structured = {
-            "screen_off_before_sleep_min": 60,
-            "wind_down_min": 15,
-            "target_sleep_hours": 8.0
-        }
-
-    return {
-        "plan_name": plan_name,
-        "confidence": round(confidence, 3),
-        "recommendations": recs,
-        "structured": structured
-    }
+    from tensorflow.keras import layers
+
+    model, scaler = load_model_and_scaler(model_path)
+    dense = [layer for layer in model.layers if isinstance(layer, layers.Dense)]
+    weights, biases, activations = [], [], []
+    for layer in dense:
+        w, b = layer.get_weights()
+        weights.append(w)
+        biases.append(b)
+        activations.append(layer.activation.__name__)
+    save_numpy_weights(out_path, weights, biases, activations, scaler.mean_, scaler.scale_)
+
+    df = generate_synthetic_wisam_data(n_check, seed=7)
+    X_raw = features_from_inputs(list(zip(df["social_media_hours"], df["texting_hours"], df["personality"])))
+    expected = model.predict(scaler.transform(X_raw), verbose=0)
+    actual = NumpyPlanner.load(out_path).predict(X_raw)
+    max_diff = float(np.max(np.abs(expected - actual)))
+    if max_diff > tolerance:
+        os.remove(out_path)
+        raise ValueError(f"NumPy export mismatch: max |diff| {max_diff:.2e} > tolerance {tolerance:.0e}")
+    print(f"Exported NumPy weights to {out_path} (max |diff| vs Keras: {max_diff:.2e})")
+    return max_diff
+
 
 # ---------------------------
-# Prediction helper
+# Quantized export
 # ---------------------------
-def predict_plan_from_payload(payload: Dict[str, Any], model, scaler) -> Dict[str, Any]:
+QUANTIZE_MIN_AGREEMENT = 0.99  # share of synthetic rows whose argmax plan must match float32
+INT8_CLIP_CANDIDATES = (1.0, 0.999, 0.99, 0.98, 0.95)
+
+
+def _plan_agreement(reference: np.ndarray, candidate: NumpyPlanner, X_raw: np.ndarray) -> float:
+    return float(np.mean(np.argmax(candidate.predict(X_raw), axis=1) == reference))
+
+
+def export_quantized(precision: str, src: str = NUMPY_PATH, out_path: str = None,
+                     min_agreement: float = QUANTIZE_MIN_AGREEMENT, n_calib: int = 20000) -> float:
     """
-    payload expected keys:
-      - social_media_hours (float)
-      - texting_hours (float)
-      - personality (string)
-    Returns JSON-serializable dict with model outputs and plan.
+    Post-training quantization of the exported float32 NumPy weights at `src`
+    to "float16" or "int8" (default out_path: variant_path(precision)).
+
+    Calibrated on generate_synthetic_wisam_data rows: for int8 the first half
+    picks the clipping ratio of the per-channel ranges that agrees best with
+    float32 and drives bias correction; the second half is held out for the
+    gate. Returns the
+    held-out plan-argmax agreement; raises ValueError (and keeps any existing
+    variant file) if it is below `min_agreement`.
     """
-    # Validate keys
-    required = ["social_media_hours", "texting_hours", "personality"]
-    for k in required:
-        if k not in payload:
-            raise ValueError(f"Missing required field: {k}")
-
-    social = float(payload["social_media_hours"])
-    texting = float(payload["texting_hours"])
-    personality = payload["personality"].lower()
-    if personality not in PERSONALITY_MAP:
-        raise ValueError(f"Unknown personality '{personality}'. Valid: {PERSONALITY_LIST}")
-
-    # Build feature vector (1 x (2 + NUM_PERSONALITIES))
-    numeric = np.array([[social, texting]])
-    p_code = PERSONALITY_MAP[personality]
-    p_onehot = np.eye(NUM_PERSONALITIES)[p_code].reshape(1, -1)
-    X_raw = np.concatenate([numeric, p_onehot], axis=1)
-
-    X_scaled = scaler.transform(X_raw)
-
-    probs = model.predict(X_scaled)[0]  # softmax probabilities
-    plan = map_probs_to_plan(probs)
-
-    result = {
-        "input": {
-            "social_media_hours": social,
-            "texting_hours": texting,
-            "personality": personality
-        },
-        "probs": probs.tolist(),
-        "plan": plan
-    }
-    return result
+    if precision not in MODEL_VARIANTS or precision == "float32":
+        raise ValueError(f"Unknown precision '{precision}'. Valid: float16, int8")
+    out_path = out_path or variant_path(precision)
+    reference = NumpyPlanner.load(src)
+    df = generate_synthetic_wisam_data(n_calib, seed=7)
+    X_raw = features_from_inputs(list(zip(df["social_media_hours"], df["texting_hours"], df["personality"])))
+    X_calib, X_check = X_raw[:n_calib // 2], X_raw[n_calib // 2:]
+    expected = np.argmax(reference.predict(X_check), axis=1)
+
+    tmp_path = f"{out_path}.{os.getpid()}.tmp.npz"
+    clip = 1.0
+    try:
+        if precision == "int8":
+            calib_expected = np.argmax(reference.predict(X_calib), axis=1)
+            scores = {}
+            for candidate in INT8_CLIP_CANDIDATES:
+                save_quantized_weights(tmp_path, reference, precision, clip=candidate, calibration=X_calib)
+                scores[candidate] = _plan_agreement(calib_expected, NumpyPlanner.load(tmp_path), X_calib)
+            clip = max(INT8_CLIP_CANDIDATES, key=lambda c: (scores[c], c))
+        # bias correction only pays off for int8; float16 rounding is already below its noise
+        save_quantized_weights(tmp_path, reference, precision, clip=clip,
+                               calibration=X_calib if precision == "int8" else None)
+        quantized = NumpyPlanner.load(tmp_path)
+        agreement = _plan_agreement(expected, quantized, X_check)
+        max_diff = float(np.max(np.abs(reference.predict(X_check) - quantized.predict(X_check))))
+        if agreement < min_agreement:
+            raise ValueError(f"{precision} export rejected: plan agreement {agreement:.4f} "
+                             f"< {min_agreement} vs float32 on {len(X_check)} held-out rows")
+        os.replace(tmp_path, out_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    print(f"Exported {precision} weights to {out_path}: {os.path.getsize(out_path):,} bytes "
+          f"(float32 {os.path.getsize(src):,}), plan agreement {agreement:.4f}, max |diff| {max_diff:.2e}"
+          + (f", clip {clip}" if precision == "int8" else ""))
+    return agreement
 
 # ---------------------------
 # Flask server
 # ---------------------------
 app = Flask("mindboost_service")
-MODEL_GLOBAL = None
-SCALER_GLOBAL = None
+BACKEND_GLOBAL = "auto"
+VARIANT_GLOBAL = "float32"  # --variant: float16/int8 serve the --quantize weights
+BATCHER_GLOBAL = None  # set by main() when micro-batching is enabled
+CACHE_GLOBAL = None  # set by main() when --cache-size > 0
+REGISTRY_GLOBAL = None  # set by main() with --registry
+ADMISSION_GLOBAL = None  # set by main() with --max-concurrency N; gates the /predict routes only
+
+
+def _load_configured_model():
+    if REGISTRY_GLOBAL is not None:
+        return registry_loader(REGISTRY_GLOBAL)()
+    backend = resolve_backend(BACKEND_GLOBAL, VARIANT_GLOBAL)
+    label = backend if VARIANT_GLOBAL == "float32" else f"{backend}-{VARIANT_GLOBAL}"
+    return (label,) + load_serving_backend(BACKEND_GLOBAL, VARIANT_GLOBAL)
+
+
+def _on_model_swap(version: str) -> None:
+    if CACHE_GLOBAL is not None:
+        CACHE_GLOBAL.clear()
+
+
+# (version, model, scaler), swapped as one tuple by the registry watcher
+SERVING_GLOBAL = ServingModel(_load_configured_model, on_swap=_on_model_swap)
+
+
+def _ensure_model_loaded():
+    """Load the model on first use. Returns an error response tuple on failure, else None."""
+    try:
+        SERVING_GLOBAL.get()  # loads once even when the first requests arrive together
+    except Exception as e:
+        return jsonify({"error": f"Model not loaded: {str(e)}"}), 500
+    return None
+
+
+def _serving_snapshot() -> Tuple[Optional[int], Any, Any]:
+    """(cache generation, model, scaler) for one forward pass."""
+    # generation first: swap() replaces the model before _on_model_swap bumps
+    # it, so a pass that sees the new generation also sees the new model
+    generation = CACHE_GLOBAL.generation if CACHE_GLOBAL is not None else None
+    _, model, scaler = SERVING_GLOBAL.get()
+    return generation, model, scaler
+
+
+def _predict_with_globals(inputs: List[Tuple[float, float, str]]) -> List[Dict[str, Any]]:
+    # /predict already tried the cache in the request thread
+    generation, model, scaler = _serving_snapshot()
+    return predict_inputs(inputs, model, scaler, CACHE_GLOBAL, lookup=False, generation=generation)
+
+
+def _admitted(view):
+    """Run `view` only once ADMISSION_GLOBAL admits the request (before its body is read)."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if ADMISSION_GLOBAL is None:
+            return view(*args, **kwargs)
+        with ADMISSION_GLOBAL.admit():
+            return view(*args, **kwargs)
+    return wrapper
+
+
+def _json_response(body: bytes) -> Response:
+    # prediction bodies are pre-encoded (orjson + cached plan fragments), not jsonify'd
+    return Response(body, mimetype="application/json")
+
+
+@app.before_request
+def _start_profiler():
+    if metrics.PROFILE_ENABLED and request.headers.get(metrics.PROFILE_HEADER) == "1":
+        g.profiler = metrics.SamplingProfiler()
+        g.profiler.__enter__()
+
+
+@app.after_request
+def _finish_profiler(response: Response) -> Response:
+    profiler = g.pop("profiler", None)
+    if profiler is None:
+        return response
+    profiler.__exit__(None, None, None)
+    response.headers[metrics.PROFILE_FILE_HEADER] = metrics.save_profile(profiler)
+    return response
+
+
+@app.errorhandler(Overloaded)
+def _overloaded(e: Overloaded):
+    response = jsonify({"error": str(e)})
+    response.status_code = 503
+    response.headers["Retry-After"] = str(e.retry_after)
+    return response
+
+# /metrics, /health and /cache/stats are the fast lane: never queued behind predictions
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
 
 @app.route("/health", methods=["GET"])
 def health():
-    return jsonify({"status": "ok"})
+    current = SERVING_GLOBAL.current
+    return jsonify({"status": "ok", "model_version": current[0] if current is not None else None})
+
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    if CACHE_GLOBAL is None:
+        return jsonify({"enabled": False})
+    return jsonify(dict(CACHE_GLOBAL.stats(), enabled=True))
 
 @app.route("/predict", methods=["POST"])
+@_admitted
 def api_predict():
-    global MODEL_GLOBAL, SCALER_GLOBAL
-    if MODEL_GLOBAL is None or SCALER_GLOBAL is None:
-        try:
-            MODEL_GLOBAL, SCALER_GLOBAL = load_model_and_scaler()
-        except Exception as e:
-            return jsonify({"error": f"Model not loaded: {str(e)}"}), 500
+    error = _ensure_model_loaded()
+    if error is not None:
+        return error
 
     try:
+        t0 = time.perf_counter()
         payload = request.get_json(force=True)
-        result = predict_plan_from_payload(payload, MODEL_GLOBAL, SCALER_GLOBAL)
-        return jsonify(result)
+        inputs = parse_payload(payload)
+        STAGE_PARSE.observe(time.perf_counter() - t0)
+        result = cached_result(inputs, CACHE_GLOBAL)
+        if result is None:
+            if BATCHER_GLOBAL is not None:
+                result = BATCHER_GLOBAL.submit(inputs)
+            else:
+                result = _predict_with_globals([inputs])[0]
+        return _json_response(encode_result(result))
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+    except Exception as e:
+        return jsonify({"error": "internal error: " + str(e)}), 500
+
+@app.route("/predict/batch", methods=["POST"])
+@_admitted
+def api_predict_batch():
+    """Score a JSON array of /predict payloads with a single forward pass."""
+    error = _ensure_model_loaded()
+    if error is not None:
+        return error
+
+    try:
+        payloads = request.get_json(force=True)
+        if not isinstance(payloads, list):
+            raise ValueError("Body must be a JSON array of payloads")
+        if len(payloads) > MAX_BATCH_PAYLOADS:
+            raise ValueError(f"Too many payloads: {len(payloads)} > {MAX_BATCH_PAYLOADS}")
+        generation, model, scaler = _serving_snapshot()
+        results = predict_plans_from_payloads(payloads, model, scaler, CACHE_GLOBAL, generation)
+        return _json_response(encode_results(results))
     except ValueError as ve:
         return jsonify({"error": str(ve)}), 400
     except Exception as e:
         return jsonify({"error": "internal error: " + str(e)}), 500
 
+# ---------------------------
+# Multi-process serving (pre-fork)
+# ---------------------------
+# The parent loads the NumPy backend once, then forks workers that share the
+# weight arrays copy-on-write (refcount updates only touch the small array
+# headers, never the data pages). Workers accept on one shared listening
+# socket, recycle themselves after --max-requests, and drain in-flight
+# requests before exiting. The Keras backend is loaded in each worker instead,
+# since TensorFlow's runtime threads do not survive fork().
+WORKER_GRACE_SECONDS = 30.0
+
+
+def _configure_request_path(args):
+    """Create per-process serving helpers (cache, micro-batcher, registry watcher, admission). Must run after fork."""
+    global CACHE_GLOBAL, BATCHER_GLOBAL, ADMISSION_GLOBAL
+    if args.cache_size > 0:
+        # registry swaps clear the cache through _on_model_swap instead of file watching
+        watch_paths = () if args.registry else backend_artifact_paths(args.backend, args.variant)
+        CACHE_GLOBAL = PredictionCache(max_size=args.cache_size,
+                                       quantum=args.cache_quantum,
+                                       ttl_seconds=args.cache_ttl,
+                                       watch_paths=watch_paths)
+    if args.registry:
+        RegistryWatcher(REGISTRY_GLOBAL, SERVING_GLOBAL).start()
+    if args.max_batch_size > 1:
+        BATCHER_GLOBAL = MicroBatcher(_predict_with_globals,
+                                      max_batch_size=args.max_batch_size,
+                                      max_wait_ms=args.max_wait_ms)
+    # fewer slots than a micro-batch would keep every batch partial and shed the rest
+    slots = admission_slots(args.max_concurrency, args.max_batch_size)
+    if slots > 0:
+        ADMISSION_GLOBAL = AdmissionLimiter("predict", max_concurrency=slots,
+                                            max_queue=args.max_queue,
+                                            queue_timeout=args.queue_timeout_ms / 1000.0,
+                                            retry_after=args.retry_after)
+    shorten_switch_interval(args.switch_interval_ms / 1000.0)
+
+
+def _serve_worker(sock: socket.socket, args, max_requests: int) -> None:
+    """Run one worker's threaded WSGI server on the inherited socket until stopped or recycled."""
+    from werkzeug.serving import make_server
+
+    _configure_request_path(args)
+    server = make_server(args.host, args.port, app, threaded=True, fd=sock.fileno())
+    lock = threading.Lock()
+    state = {"in_flight": 0, "served": 0}
+    stopping = threading.Event()
+
+    def stop():
+        if not stopping.is_set():
+            stopping.set()
+            # shutdown() blocks until serve_forever returns, so never call it on the serving thread
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+    @app.before_request
+    def _count_in():
+        with lock:
+            state["in_flight"] += 1
+
+    @app.teardown_request
+    def _count_out(exc=None):
+        with lock:
+            state["in_flight"] -= 1
+            state["served"] += 1
+            recycle = max_requests and state["served"] >= max_requests
+        if recycle:
+            stop()
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop())
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent handles Ctrl-C
+    server.serve_forever()
+
+    deadline = time.monotonic() + WORKER_GRACE_SECONDS
+    while state["in_flight"] > 0 and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+
+def serve_prefork(args) -> None:
+    """
+    Supervise args.workers forked workers: respawn any that exit (recycling),
+    SIGHUP recycles all of them, SIGTERM/SIGINT shuts everything down.
+    """
+    if not hasattr(os, "fork"):
+        print("Multi-process serving needs os.fork(); falling back to a single process.")
+        SERVING_GLOBAL.get()
+        _configure_request_path(args)
+        app.run(host=args.host, port=args.port, threaded=True)
+        return
+
+    backend = REGISTRY_GLOBAL.backend() if args.registry else resolve_backend(args.backend, args.variant)
+    if backend == "numpy":
+        # later registry versions are loaded by each worker's watcher (not shared)
+        SERVING_GLOBAL.get()
+    else:
+        print("Keras backend: each worker loads its own model (export with --export-numpy to share weights).")
+    gc.freeze()  # keep the GC from touching (and un-sharing) objects created before fork
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(1024)
+    sock.set_inheritable(True)
+
+    children = set()
+    shutting_down = False
+
+    def spawn():
+        # jitter the recycle point so workers don't all restart together
+        limit = args.max_requests + random.randint(0, args.max_requests // 10) if args.max_requests else 0
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _serve_worker(sock, args, limit)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            os._exit(code)
+        children.add(pid)
+
+    def signal_children(sig):
+        for pid in list(children):
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                pass
+
+    def on_shutdown(signum, frame):
+        nonlocal shutting_down
+        shutting_down = True
+        signal_children(signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, on_shutdown)
+    signal.signal(signal.SIGINT, on_shutdown)
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, lambda signum, frame: signal_children(signal.SIGTERM))
+
+    for _ in range(args.workers):
+        spawn()
+    print(f"Starting {args.workers} workers on http://{args.host}:{args.port}")
+
+    while children:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not shutting_down:
+            spawn()
+    sock.close()
+
 # ---------------------------
 # CLI
 # ---------------------------
@@ -327,20 +753,135 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--train", action="store_true", help="Train synthetic model and save")
     parser.add_argument("--serve", action="store_true", help="Run Flask server")
+    parser.add_argument("--export-numpy", action="store_true",
+                        help="Export trained model + scaler to a .npz for Keras-free serving")
+    parser.add_argument("--backend", choices=["auto", "numpy", "keras"], default="auto",
+                        help="Inference backend for --serve (auto = numpy if exported)")
+    parser.add_argument("--variant", choices=MODEL_VARIANTS, default="float32",
+                        help="Weights precision for --serve/--score; float16/int8 need --quantize first")
+    parser.add_argument("--quantize", nargs="+", choices=MODEL_VARIANTS[1:], default=None, metavar="PRECISION",
+                        help="Export float16 and/or int8 variants of the --export-numpy weights")
+    parser.add_argument("--min-agreement", type=float, default=QUANTIZE_MIN_AGREEMENT,
+                        help="--quantize fails below this plan-argmax agreement with float32")
+    parser.add_argument("--calibration-samples", type=int, default=20000,
+                        help="Synthetic rows for --quantize calibration and the agreement check")
     parser.add_argument("--samples", type=int, default=3000, help="Synthetic training samples")
     parser.add_argument("--epochs", type=int, default=30, help="Training epochs")
+    parser.add_argument("--stream", action="store_true",
+                        help="With --train: stream batches through tf.data (memory bounded by --chunk-size)")
+    parser.add_argument("--chunk-size", type=int, default=SYNTHETIC_CHUNK_SIZE,
+                        help="Rows per generated chunk / shard for --stream and --write-shards")
+    parser.add_argument("--shards", default=None,
+                        help="With --train --stream: directory of .npz shards to train on")
+    parser.add_argument("--write-shards", default=None, metavar="DIR",
+                        help="Write --samples synthetic rows to DIR as .npz shards")
+    parser.add_argument("--host", default="0.0.0.0", help="Address for --serve")
+    parser.add_argument("--port", type=int, default=5000, help="Port for --serve")
+    parser.add_argument("--workers", type=int, nargs="?", const=os.cpu_count() or 1, default=None,
+                        help="Serve with N pre-forked worker processes (bare flag = CPU count)")
+    parser.add_argument("--max-requests", type=int, default=0,
+                        help="Recycle a worker after this many requests (0 = never)")
+    parser.add_argument("--max-batch-size", type=int, default=32,
+                        help="Micro-batch size for /predict (1 disables batching)")
+    parser.add_argument("--max-wait-ms", type=float, default=2.0,
+                        help="Max time a /predict request waits for a micro-batch to fill")
+    parser.add_argument("--cache-size", type=int, default=0,
+                        help="Prediction cache entries (0 disables the cache)")
+    parser.add_argument("--cache-quantum", type=float, default=0.0,
+                        help="Round hour inputs to this step for cache keys (0 = exact)")
+    parser.add_argument("--cache-ttl", type=float, default=0.0,
+                        help="Seconds before a cached prediction expires (0 = never)")
+    parser.add_argument("--max-concurrency", type=int, default=ADMISSION_MAX_CONCURRENCY,
+                        help="Gate /predict: concurrent requests per worker, at least --max-batch-size; "
+                             "more wait in a queue (0 = no admission control)")
+    parser.add_argument("--max-queue", type=int, default=ADMISSION_MAX_QUEUE,
+                        help="/predict requests that may wait for a slot; beyond this they get 503")
+    parser.add_argument("--queue-timeout-ms", type=float, default=ADMISSION_QUEUE_TIMEOUT * 1000.0,
+                        help="Max time a /predict request waits for a slot before 503")
+    parser.add_argument("--retry-after", type=int, default=ADMISSION_RETRY_AFTER,
+                        help="Retry-After seconds sent with 503 overload responses")
+    parser.add_argument("--switch-interval-ms", type=float, default=0.0,
+                        help="Lower the GIL switch interval (e.g. 0.2) so accept keeps up under load (0 = Python default)")
+    parser.add_argument("--score", default=None, metavar="INPUT",
+                        help="Bulk-score a .csv/.parquet cohort in --chunk-size chunks on --workers processes")
+    parser.add_argument("--output", default=None,
+                        help="--score output: .parquet, .csv, or a directory of .npz parts (default INPUT.scores/)")
+    parser.add_argument("--id-column", default=None, help="--score: input column copied to the output")
+    parser.add_argument("--registry", nargs="?", const=REGISTRY_DIR, default=None, metavar="DIR",
+                        help=f"Versioned model registry (bare flag = {REGISTRY_DIR}); --serve follows "
+                             "its CURRENT version and hot-reloads on change")
+    parser.add_argument("--publish", action="store_true",
+                        help="Publish the --backend (or --variant) model files as a new registry version")
+    parser.add_argument("--note", default="", help="Free-text note stored in the --publish manifest")
+    parser.add_argument("--list-versions", action="store_true", help="List registry versions")
+    parser.add_argument("--pin", default=None, metavar="VERSION",
+                        help="Serve VERSION until --unpin, ignoring newer publishes")
+    parser.add_argument("--unpin", action="store_true", help="Serve the latest registry version again")
+    parser.add_argument("--rollback", action="store_true",
+                        help="Pin the version published before the current one")
     args = parser.parse_args()
+    registry = ModelRegistry(args.registry or REGISTRY_DIR)
 
-    if args.train:
+    if args.train and args.stream:
+        train_and_save_streaming(n_samples=args.samples, epochs=args.epochs,
+                                 chunk_size=args.chunk_size, shard_dir=args.shards)
+    elif args.train:
         train_and_save(n_samples=args.samples, epochs=args.epochs)
+    elif args.write_shards:
+        write_synthetic_shards(args.write_shards, args.samples, args.chunk_size)
+    elif args.export_numpy:
+        export_numpy()
+    elif args.quantize:
+        for precision in args.quantize:
+            export_quantized(precision, min_agreement=args.min_agreement, n_calib=args.calibration_samples)
+    elif args.score:
+        from mindpulse_score import SCORE_TARGET_ROWS_PER_SEC, score_file
+
+        output = args.output or os.path.splitext(args.score)[0] + ".scores"
+        summary = score_file(args.score, output, backend=args.backend, chunk_size=args.chunk_size,
+                             workers=args.workers, id_column=args.id_column, variant=args.variant)
+        print(f"Scored {summary['rows']:,} rows ({summary['invalid_rows']:,} invalid) into {output} in "
+              f"{summary['seconds']:.1f}s: {summary['rows_per_s']:,.0f} rows/s "
+              f"(target {SCORE_TARGET_ROWS_PER_SEC:,} rows/s per core)")
+    elif args.publish:
+        backend = resolve_backend(args.backend, args.variant)
+        if backend == "keras":
+            load_scaler()  # converts a legacy scaler.pkl so the version never ships a pickle
+        # a float16/int8 variant is published as the version's weights file; NumpyPlanner.load reads either
+        sources = {"weights": variant_path(args.variant)} if backend == "numpy" else {"model": MODEL_PATH, "scaler": SCALER_PATH}
+        version = registry.publish(backend, sources, note=args.note)
+        print(f"Published {backend} model as {version} in {registry.root}"
+              + (" (pinned; still serving " + registry.current() + ")" if registry.pinned() else ""))
+    elif args.list_versions:
+        current = registry.current()
+        for version in registry.versions():
+            manifest = registry.manifest(version)
+            marker = ("*" if version == current else " ") + ("p" if version == current and registry.pinned() else " ")
+            created = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(manifest["created_at"]))
+            print(f"{marker} {version}  {manifest['backend']:<6} {created}  {manifest['note']}")
+    elif args.pin:
+        registry.pin(args.pin)
+        print(f"Pinned {args.pin}")
+    elif args.unpin:
+        print(f"Unpinned; serving {registry.unpin()}")
+    elif args.rollback:
+        print(f"Rolled back to {registry.rollback()} (pinned; --unpin to follow new versions)")
     elif args.serve:
+        global BACKEND_GLOBAL, VARIANT_GLOBAL, REGISTRY_GLOBAL
+        BACKEND_GLOBAL = args.backend
+        VARIANT_GLOBAL = args.variant
+        if args.registry:
+            REGISTRY_GLOBAL = registry
+        if args.workers:
+            serve_prefork(args)
+            return
         # Load model ahead of time (optional)
-        global MODEL_GLOBAL, SCALER_GLOBAL
-        MODEL_GLOBAL, SCALER_GLOBAL = load_model_and_scaler()
-        print("Starting server on http://127.0.0.1:5000")
-        app.run(host="0.0.0.0", port=5000)
+        SERVING_GLOBAL.get()
+        _configure_request_path(args)
+        print(f"Starting server on http://127.0.0.1:{args.port}")
+        app.run(host=args.host, port=args.port, threaded=True)
     else:
-        print("Use --train to create model, then --serve to run the API.\nExample:\n  python mindboost_service.py --train\n  python mindboost_service.py --serve")
+        print("Use --train to create model, then --serve to run the API.\nExample:\n  python mindboost_service.py --train\n  python mindboost_service.py --export-numpy\n  python mindboost_service.py --serve")
 
 if __name__ == "__main__":
     main()
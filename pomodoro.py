@@ -1,31 +1,248 @@
+import asyncio
+import math
+import threading
 import time
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Callable, List, Optional, Tuple
 
+# Phase names and the labels countdown() prints for them.
+PHASE_LABELS = {"work": "Work", "short_break": "Break", "long_break": "Long Break"}
 
-def countdown(total_seconds: int, label: str = "Time") -> None:
+
+def pomodoro_phases(work_minutes: float, cycles: int = 4, short_break: float = 5,
+                    long_break: float = 15) -> List[Tuple[str, int]]:
+    """(phase name, seconds) for a whole session: work + short break per cycle, long break after the last."""
+    phases = []
+    for i in range(1, cycles + 1):
+        phases.append(("work", int(work_minutes * 60)))
+        if i < cycles:
+            phases.append(("short_break", int(short_break * 60)))
+        else:
+            phases.append(("long_break", int(long_break * 60)))
+    return phases
+
+
+def phase_at(phases: List[Tuple[str, int]], elapsed: float) -> Optional[Tuple[int, float]]:
+    """(index of the phase running `elapsed` seconds into the session, seconds left in it), or None once over."""
+    ends = list(accumulate(seconds for _, seconds in phases))
+    index = bisect_right(ends, elapsed)
+    if index >= len(phases):
+        return None
+    return index, ends[index] - elapsed
+
+
+# Seconds between display refreshes. Wakeups land on whole multiples of the
+# interval remaining; 0 renders only at start, end and phase changes.
+RENDER_INTERVAL = 1.0
+
+
+def _clock_text(label: str, left: float) -> str:
+    minutes, seconds = divmod(math.ceil(left - 1e-3), 60)
+    return f"{label} — {minutes:02d}:{seconds:02d}"
+
+
+class Countdown:
+    """
+    Counts `total_seconds` down against a time.monotonic() deadline, so
+    render and scheduling latency never accumulate into drift. on_tick(left)
+    runs at every wakeup. pause(), resume() and stop() are safe to call from
+    another thread (or another task when driven by run_async()).
+    """
+
+    def __init__(self, total_seconds: float, on_tick: Optional[Callable[[float], None]] = None,
+                 render_interval: float = RENDER_INTERVAL, clock: Callable[[], float] = time.monotonic):
+        self.total_seconds = total_seconds
+        self.on_tick = on_tick
+        self.render_interval = render_interval
+        self.clock = clock
+        self._left = float(total_seconds)  # authoritative while not running
+        self._deadline: Optional[float] = None  # authoritative while running
+        self._paused = False
+        self._stopped = False
+        self._lock = threading.Lock()
+        self._changed = threading.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._async_changed: Optional[asyncio.Event] = None
+
+    @property
+    def paused(self) -> bool:
+        return self._paused
+
+    def remaining(self) -> float:
+        with self._lock:
+            if self._deadline is None:
+                return self._left
+            return max(0.0, self._deadline - self.clock())
+
+    def pause(self) -> None:
+        with self._lock:
+            if self._paused:
+                return
+            if self._deadline is not None:
+                self._left = max(0.0, self._deadline - self.clock())
+                self._deadline = None
+            self._paused = True
+        self._notify()
+
+    def resume(self) -> None:
+        with self._lock:
+            if not self._paused:
+                return
+            self._paused = False
+        self._notify()
+
+    def stop(self) -> None:
+        self._stopped = True
+        self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._async_changed.set)
+
+    def _tick(self, left: float) -> None:
+        if self.on_tick is not None:
+            self.on_tick(left)
+
+    def _wait_for(self, left: float) -> float:
+        """Seconds until the next wakeup: the next render boundary, or the deadline."""
+        if self.render_interval <= 0:
+            return left
+        wait = left % self.render_interval
+        if wait < 1e-3:
+            wait += self.render_interval
+        return min(wait, left)
+
+    def _step(self) -> Tuple[bool, Optional[float]]:
+        """(done, seconds to wait before the next step; None = until pause/resume/stop)."""
+        if self._stopped:
+            return True, None
+        with self._lock:
+            if self._paused:
+                return False, None
+            now = self.clock()
+            if self._deadline is None:
+                self._deadline = now + self._left
+            left = self._deadline - now
+            if left <= 0:
+                self._left, self._deadline = 0.0, None
+        if left <= 0:
+            self._tick(0.0)
+            return True, None
+        self._tick(left)
+        return False, self._wait_for(left)
+
+    def run(self) -> bool:
+        """Block until the countdown ends (True) or stop() is called (False)."""
+        while True:
+            self._changed.clear()
+            done, wait = self._step()
+            if done:
+                return not self._stopped
+            self._changed.wait(wait)
+
+    async def run_async(self) -> bool:
+        """run() for an event loop: one coroutine per countdown, no thread."""
+        self._loop = asyncio.get_running_loop()
+        self._async_changed = asyncio.Event()
+        try:
+            while True:
+                self._async_changed.clear()
+                done, wait = self._step()
+                if done:
+                    return not self._stopped
+                try:
+                    await asyncio.wait_for(self._async_changed.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._loop = None
+
+
+class PomodoroSession(Countdown):
+    """
+    A whole Pomodoro schedule as one Countdown. The current phase is derived
+    from elapsed time with phase_at(), like timer.SessionRecord on the server,
+    so phases cannot drift apart from each other or from the server's view.
+    Calls on_phase(index) when a phase begins and on_tick(index, phase_left)
+    at every wakeup.
+    """
+
+    def __init__(self, phases: List[Tuple[str, int]],
+                 on_phase: Optional[Callable[[int], None]] = None,
+                 on_tick: Optional[Callable[[int, float], None]] = None,
+                 render_interval: float = RENDER_INTERVAL, clock: Callable[[], float] = time.monotonic):
+        super().__init__(sum(seconds for _, seconds in phases), None, render_interval, clock)
+        self.phases = phases
+        self.on_phase = on_phase
+        self.on_phase_tick = on_tick
+        self.phase_index = -1
+
+    def _locate(self, left: float) -> Tuple[int, float]:
+        located = phase_at(self.phases, self.total_seconds - left)
+        return located if located is not None else (len(self.phases) - 1, 0.0)
+
+    def _tick(self, left: float) -> None:
+        index, phase_left = self._locate(left)
+        while self.phase_index < index:
+            self.phase_index += 1
+            if self.on_phase is not None:
+                self.on_phase(self.phase_index)
+        if self.on_phase_tick is not None:
+            self.on_phase_tick(index, phase_left)
+
+    def _wait_for(self, left: float) -> float:
+        _, phase_left = self._locate(left)
+        wait = super()._wait_for(left)
+        return min(wait, phase_left) if phase_left > 0 else wait
+
+
+def countdown(total_seconds: int, label: str = "Time", render_interval: float = RENDER_INTERVAL) -> None:
     try:
-        while total_seconds:
-            minutes, seconds = divmod(total_seconds, 60)
-            print(f"{label} — {minutes:02d}:{seconds:02d}", end="\r")
-            time.sleep(1)
-            total_seconds -= 1
-        print(f"{label} — 00:00")
+        Countdown(total_seconds, lambda left: print(_clock_text(label, left), end="\r"), render_interval).run()
+        print(_clock_text(label, 0))
     except KeyboardInterrupt:
         print("\nInterrupted by user.")
         raise
 
 
-def run_pomodoro(work_minutes: int, cycles: int = 4, short_break: int = 5, long_break: int = 15) -> None:
-    for i in range(1, cycles + 1):
-        print(f"\nCycle {i}/{cycles} — Work for {work_minutes} minute(s)")
-        countdown(work_minutes * 60, "Work")
+def _console_session(work_minutes: float, cycles: int, short_break: float, long_break: float,
+                     render_interval: float) -> PomodoroSession:
+    phases = pomodoro_phases(work_minutes, cycles, short_break, long_break)
 
-        if i < cycles:
+    def on_phase(index: int) -> None:
+        if index > 0:
+            print(_clock_text(PHASE_LABELS[phases[index - 1][0]], 0))
+        name = phases[index][0]
+        if name == "work":
+            print(f"\nCycle {index // 2 + 1}/{cycles} — Work for {work_minutes} minute(s)")
+        elif name == "short_break":
             print(f"Short break — {short_break} minute(s)")
-            countdown(short_break * 60, "Break")
         else:
             print(f"Long break — {long_break} minute(s)")
-            countdown(long_break * 60, "Long Break")
 
+    def on_tick(index: int, phase_left: float) -> None:
+        print(_clock_text(PHASE_LABELS[phases[index][0]], phase_left), end="\r")
+
+    return PomodoroSession(phases, on_phase, on_tick, render_interval)
+
+
+def run_pomodoro(work_minutes: int, cycles: int = 4, short_break: int = 5, long_break: int = 15,
+                 render_interval: float = RENDER_INTERVAL) -> None:
+    try:
+        _console_session(work_minutes, cycles, short_break, long_break, render_interval).run()
+    except KeyboardInterrupt:
+        print("\nInterrupted by user.")
+        raise
+    print("\nAll cycles complete. Nice work!")
+
+
+async def run_pomodoro_async(work_minutes: float, cycles: int = 4, short_break: float = 5,
+                             long_break: float = 15, render_interval: float = RENDER_INTERVAL) -> None:
+    """run_pomodoro as a coroutine, so many sessions can share one process."""
+    await _console_session(work_minutes, cycles, short_break, long_break, render_interval).run_async()
     print("\nAll cycles complete. Nice work!")
 
 
@@ -0,0 +1,117 @@
+"""
+Tests for admission control: limits, bounded queues with deadlines, and the
+503 + Retry-After / fast-lane behaviour of both apps.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import mindpulse_service as service
+from main import app
+from mindpulse_admission import AdmissionLimiter, AsyncAdmissionLimiter, LoopLagMonitor, Overloaded, admission_slots
+
+
+def test_limiter_queues_hands_over_and_sheds():
+    limiter = AdmissionLimiter("test", max_concurrency=1, max_queue=1, queue_timeout=0.05)
+    limiter.acquire()
+
+    t0 = time.perf_counter()
+    with pytest.raises(Overloaded) as e:
+        limiter.acquire()  # waits for the deadline, nobody releases
+    assert e.value.reason == "deadline" and time.perf_counter() - t0 >= 0.05
+
+    admitted = threading.Event()
+    waiter = threading.Thread(target=lambda: (limiter.acquire(), admitted.set()))
+    limiter.queue_timeout = 5.0
+    waiter.start()
+    while not limiter.stats()["queued"]:
+        time.sleep(0.001)
+    with pytest.raises(Overloaded) as e:
+        limiter.acquire()  # queue is full: rejected without waiting
+    assert e.value.reason == "queue_full" and e.value.retry_after == 1
+
+    limiter.release()  # the slot goes to the queued thread
+    waiter.join()
+    assert admitted.is_set()
+    assert limiter.stats()["in_flight"] == 1
+    limiter.release()
+    stats = limiter.stats()
+    assert (stats["admitted"], stats["queue_full"], stats["deadline"]) == (2, 1, 1)
+    assert stats["in_flight"] == stats["queued"] == 0
+
+
+def test_async_limiter_admits_in_arrival_order():
+    async def scenario():
+        limiter = AsyncAdmissionLimiter("test", max_concurrency=1, max_queue=8, queue_timeout=1.0)
+        order = []
+
+        async def request(i):
+            async with limiter.admit():
+                order.append(i)
+                await asyncio.sleep(0.001)
+
+        await asyncio.gather(*(request(i) for i in range(5)))
+        limiter.in_flight, limiter.queue_timeout = 1, 0.01  # a slot held elsewhere
+        with pytest.raises(Overloaded):
+            await limiter.acquire()
+        limiter.in_flight, limiter.lag_monitor = 0, LoopLagMonitor()
+        limiter.lag_monitor.lag = limiter.max_loop_lag * 2  # a free slot, but the loop is behind
+        with pytest.raises(Overloaded) as e:
+            await limiter.acquire()
+        assert e.value.reason == "loop_lag"
+        return order, limiter.stats()
+
+    order, stats = asyncio.run(scenario())
+    assert order == [0, 1, 2, 3, 4]
+    assert stats["admitted"] == 5 and stats["deadline"] == 1 and stats["loop_lag"] == 1 and stats["queued"] == 0
+
+
+def test_flask_predict_sheds_while_health_answers(monkeypatch):
+    limiter = AdmissionLimiter("predict", max_concurrency=1, max_queue=0, retry_after=3)
+    monkeypatch.setattr(service, "ADMISSION_GLOBAL", limiter)
+    client = service.app.test_client()
+    limiter.acquire()  # every slot busy
+    try:
+        r = client.post("/predict", json={"social_media_hours": 2, "texting_hours": 3, "personality": "owl"})
+        assert r.status_code == 503 and r.headers["Retry-After"] == "3"
+        assert client.get("/health").status_code == 200
+    finally:
+        limiter.release()
+
+
+def test_gates_are_opt_in_and_never_smaller_than_a_batch(monkeypatch):
+    assert admission_slots(0, 32) == 0
+    assert admission_slots(2, 32) == 32  # a partial micro-batch would shed the rest of it
+    assert admission_slots(64, 32) == 64
+    switch_interval = sys.getswitchinterval()
+    with TestClient(app):
+        assert app.state.admission == {}
+    assert sys.getswitchinterval() == switch_interval  # only changed on request
+    monkeypatch.setattr(main, "PREDICT_CONCURRENCY", 1)
+    with TestClient(app):
+        assert app.state.admission["predict"].max_concurrency == main.PREDICT_THREADS
+        assert "timers" not in app.state.admission
+
+
+def test_fastapi_sheds_per_lane_and_keeps_the_fast_lane_open(monkeypatch):
+    monkeypatch.setattr(main, "PREDICT_CONCURRENCY", 4)
+    monkeypatch.setattr(main, "TIMER_CONCURRENCY", 32)
+    with TestClient(app) as client:
+        predict = app.state.admission["predict"]
+        saved = predict.in_flight, predict.max_queue
+        predict.in_flight, predict.max_queue = predict.max_concurrency, 0  # every slot busy, no queue
+        try:
+            r = client.post("/predict", json={"social_media_hours": 2, "texting_hours": 3, "personality": "owl"})
+            assert r.status_code == 503 and r.headers["Retry-After"] == "1"
+            assert client.get("/health").status_code == 200
+            timer_id = client.post("/start", json={"minutes": 1}).json()["id"]  # timers are their own lane
+            assert client.get(f"/status/{timer_id}").status_code == 200
+        finally:
+            predict.in_flight, predict.max_queue = saved
+        assert predict.stats()["queue_full"] == 1
@@ -0,0 +1,150 @@
+"""
+Tests for /predict/batch and server-side micro-batching of /predict.
+
+The Flask app serves a seeded NumpyPlanner (conftest.model_dir); batched
+results must match one-at-a-time scoring row for row.
+"""
+
+import json
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import mindpulse_inference as inference
+import mindpulse_service as service
+from mindpulse_inference import MicroBatcher
+from mindpulse_registry import ServingModel
+
+PAYLOADS = [
+    {"social_media_hours": 2, "texting_hours": 3, "personality": "owl"},
+    {"social_media_hours": 9.5, "texting_hours": 0.5, "personality": "Lion"},
+    {"social_media_hours": 0, "texting_hours": 6, "personality": "snake"},
+    {"social_media_hours": 4.25, "texting_hours": 1, "personality": "owl"},
+]
+
+
+@pytest.fixture
+def client(model_dir, monkeypatch):
+    serving = ServingModel(lambda: ("numpy",) + inference.load_serving_backend("numpy"))
+    monkeypatch.setattr(service, "SERVING_GLOBAL", serving)
+    monkeypatch.setattr(service, "BATCHER_GLOBAL", None)
+    monkeypatch.setattr(service, "CACHE_GLOBAL", None)
+    monkeypatch.setattr(service, "ADMISSION_GLOBAL", None)
+    return service.app.test_client()
+
+
+def test_batch_matches_single_requests(client):
+    r = client.post("/predict/batch", json=PAYLOADS)
+    assert r.status_code == 200
+    batch = r.get_json()["results"]
+    assert len(batch) == len(PAYLOADS)
+    for payload, result in zip(PAYLOADS, batch):
+        single = client.post("/predict", json=payload).get_json()
+        assert result["input"] == single["input"]
+        assert result["plan"] == single["plan"]
+        np.testing.assert_allclose(result["probs"], single["probs"], atol=1e-6)
+    assert client.post("/predict/batch", json=[]).get_json() == {"results": []}
+
+
+def test_micro_batched_predict_matches_unbatched(client, monkeypatch):
+    expected = [client.post("/predict", json=payload).get_json() for payload in PAYLOADS]
+    batcher = MicroBatcher(service._predict_with_globals, max_batch_size=len(PAYLOADS), max_wait_ms=5000)
+    monkeypatch.setattr(service, "BATCHER_GLOBAL", batcher)
+
+    results = [None] * len(PAYLOADS)
+
+    def post(i):
+        results[i] = client.post("/predict", json=PAYLOADS[i]).get_json()
+
+    threads = [threading.Thread(target=post, args=(i,)) for i in range(len(PAYLOADS))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert batcher.batch_sizes == {len(PAYLOADS): 1}  # one forward pass for all four
+    for result, single in zip(results, expected):
+        assert result["input"] == single["input"] and result["plan"] == single["plan"]
+        np.testing.assert_allclose(result["probs"], single["probs"], atol=1e-6)
+
+
+def test_batcher_flushes_when_full_or_on_timeout():
+    calls = []
+    full = MicroBatcher(lambda items: calls.append(list(items)) or items, max_batch_size=3, max_wait_ms=5000)
+    t0 = time.monotonic()
+    threads = [threading.Thread(target=full.submit, args=(i,)) for i in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert time.monotonic() - t0 < 2.0  # a full batch does not wait out max_wait
+    assert full.batch_sizes == {3: 1} and sorted(calls[0]) == [0, 1, 2]
+
+    lone = MicroBatcher(lambda items: items, max_batch_size=32, max_wait_ms=50)
+    t0 = time.monotonic()
+    assert lone.submit("x") == "x"
+    assert time.monotonic() - t0 >= 0.045  # flushed by the timeout, alone
+    assert lone.batch_sizes == {1: 1}
+
+
+def test_batcher_raises_the_batch_error_in_every_caller():
+    def fail(items):
+        raise RuntimeError("model exploded")
+
+    batcher = MicroBatcher(fail, max_batch_size=2, max_wait_ms=5000)
+    errors = []
+
+    def submit():
+        try:
+            batcher.submit(1)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=submit) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == ["model exploded"] * 2
+
+
+def test_batcher_fails_every_caller_on_a_short_result_list():
+    batcher = MicroBatcher(lambda items: items[:-1], max_batch_size=3, max_wait_ms=5000)
+    errors = []
+
+    def submit(i):
+        try:
+            batcher.submit(i)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == ["predict_fn returned 2 result(s) for 3 input(s)"] * 3
+
+
+def test_batch_validation_errors(client):
+    bad = PAYLOADS[:1] + [{"social_media_hours": 1, "texting_hours": 1, "personality": "unicorn"}]
+    r = client.post("/predict/batch", json=bad)
+    assert r.status_code == 400 and r.get_json()["error"].startswith("payloads[1]: Unknown personality")
+
+    r = client.post("/predict/batch", json=PAYLOADS[:1] + [{"social_media_hours": 1, "personality": "owl"}])
+    assert r.status_code == 400 and "payloads[1]: Missing required field: texting_hours" in r.get_json()["error"]
+
+    # raw JSON: null, arrays and the NaN/Infinity literals Python's json accepts
+    for field, raw in (("texting_hours", "null"), ("texting_hours", "[1, 2]"), ("social_media_hours", "NaN"),
+                       ("social_media_hours", "-Infinity")):
+        row = {"social_media_hours": "1", "texting_hours": "1", "personality": '"owl"', field: raw}
+        bad = "{" + ", ".join(f'"{k}": {v}' for k, v in row.items()) + "}"
+        r = client.post("/predict/batch", data=f"[{json.dumps(PAYLOADS[0])}, {bad}]", content_type="application/json")
+        assert r.status_code == 400 and r.get_json()["error"].startswith(f"payloads[1]: {field} must be"), raw
+        r = client.post("/predict", data=bad, content_type="application/json")
+        assert r.status_code == 400 and r.get_json()["error"].startswith(f"{field} must be"), raw
+
+    assert client.post("/predict/batch", json=PAYLOADS[0]).status_code == 400  # not an array
+    r = client.post("/predict/batch", json=PAYLOADS[:1] * (inference.MAX_BATCH_PAYLOADS + 1))
+    assert r.status_code == 400 and "Too many payloads" in r.get_json()["error"]
@@ -0,0 +1,143 @@
+"""
+Tests for the opt-in prediction cache (--cache-size): LRU eviction, TTL,
+input quantisation, and invalidation when the model changes.
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+import mindpulse_inference as inference
+import mindpulse_service as service
+from mindpulse_inference import PredictionCache
+from mindpulse_registry import ServingModel
+
+OWL = {"social_media_hours": 2.1, "texting_hours": 3.0, "personality": "owl"}
+
+
+def test_lru_evicts_least_recently_used():
+    cache = PredictionCache(max_size=2)
+    cache.put((1.0, 1.0, "owl"), "a")
+    cache.put((2.0, 2.0, "owl"), "b")
+    assert cache.get((1.0, 1.0, "owl")) == "a"  # now most recently used
+    cache.put((3.0, 3.0, "owl"), "c")
+    assert cache.get((2.0, 2.0, "owl")) is None
+    assert cache.get((1.0, 1.0, "owl")) == "a" and cache.get((3.0, 3.0, "owl")) == "c"
+    stats = cache.stats()
+    assert (stats["size"], stats["evictions"], stats["hits"], stats["misses"]) == (2, 1, 3, 1)
+
+
+def test_ttl_expires_entries():
+    cache = PredictionCache(ttl_seconds=0.05)
+    cache.put((1.0, 1.0, "owl"), "a")
+    assert cache.get((1.0, 1.0, "owl")) == "a"
+    time.sleep(0.1)
+    assert cache.get((1.0, 1.0, "owl")) is None
+    assert cache.stats()["expirations"] == 1 and cache.stats()["size"] == 0
+
+
+def test_quantum_shares_entries_and_scores_at_grid_point(model_dir):
+    model, scaler = inference.load_serving_backend("numpy")
+    cache = PredictionCache(quantum=0.25)
+    assert cache.quantize((2.1, 2.95, "owl")) == (2.0, 3.0, "owl")
+
+    first = inference.predict_inputs([(2.1, 2.95, "owl")], model, scaler, cache)[0]
+    second = inference.predict_inputs([(1.9, 3.05, "owl")], model, scaler, cache)[0]
+    assert cache.stats()["hits"] == 1 and cache.stats()["size"] == 1
+    assert second["input"]["social_media_hours"] == 1.9  # the response echoes the caller's input
+    grid = inference.predict_inputs([(2.0, 3.0, "owl")], model, scaler)[0]
+    assert first["probs"] == second["probs"]
+    np.testing.assert_allclose(first["probs"], grid["probs"], atol=1e-6)
+    assert inference.predict_inputs([(2.0, 3.0, "lion")], model, scaler, cache)[0]["probs"] != first["probs"]
+
+
+def test_put_from_an_older_generation_is_dropped():
+    cache = PredictionCache()
+    generation = cache.generation  # read before the forward pass
+    cache.clear()  # the model is swapped meanwhile
+    cache.put((1.0, 1.0, "owl"), "old model", generation)
+    assert cache.get((1.0, 1.0, "owl")) is None
+    assert cache.stats()["stale_puts"] == 1
+    cache.put((1.0, 1.0, "owl"), "new model", cache.generation)
+    assert cache.get((1.0, 1.0, "owl")) == "new model"
+
+
+def test_changed_model_file_clears_the_cache(model_dir, seeded_weights, monkeypatch):
+    monkeypatch.setattr(PredictionCache, "WATCH_INTERVAL", 0.0)
+    cache = PredictionCache(watch_paths=[inference.NUMPY_PATH])
+    cache.put((1.0, 1.0, "owl"), "stale")
+    assert cache.get((1.0, 1.0, "owl")) == "stale"
+
+    before = os.stat(inference.NUMPY_PATH).st_mtime_ns
+    seeded_weights(inference.NUMPY_PATH, seed=9)
+    os.utime(inference.NUMPY_PATH, ns=(before + 10**9, before + 10**9))  # coarse-mtime filesystems
+    assert cache.get((1.0, 1.0, "owl")) is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_reload_never_serves_the_previous_models_predictions(model_dir, seeded_weights, monkeypatch):
+    cache = PredictionCache()
+    serving = ServingModel(lambda: ("v1",) + inference.load_serving_backend("numpy"), on_swap=service._on_model_swap)
+    monkeypatch.setattr(service, "CACHE_GLOBAL", cache)
+    monkeypatch.setattr(service, "SERVING_GLOBAL", serving)
+    monkeypatch.setattr(service, "BATCHER_GLOBAL", None)
+    monkeypatch.setattr(service, "ADMISSION_GLOBAL", None)
+    client = service.app.test_client()
+
+    old = client.post("/predict", json=OWL).get_json()["probs"]
+    assert client.post("/predict", json=OWL).get_json()["probs"] == old
+    assert cache.stats()["hits"] == 1
+
+    seeded_weights(inference.NUMPY_PATH, seed=9)
+    serving.swap("v2", *inference.load_serving_backend("numpy"))
+    new = client.post("/predict", json=OWL).get_json()["probs"]
+    model, scaler = serving.current[1:]
+    expected = inference.predict_inputs([inference.parse_payload(OWL)], model, scaler)[0]["probs"]
+    assert new != old
+    np.testing.assert_allclose(new, expected, atol=1e-6)
+    assert client.post("/predict/batch", json=[OWL]).get_json()["results"][0]["probs"] == new
+
+
+class _GatedModel:
+    """Wraps a model; predict() blocks until released, to hold a forward pass in flight."""
+
+    def __init__(self, model):
+        self.model = model
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def predict(self, X, verbose=0):
+        self.entered.set()
+        assert self.release.wait(5)
+        return self.model.predict(X, verbose=verbose)
+
+
+def test_swap_during_a_forward_pass_never_caches_the_old_model(model_dir, seeded_weights, monkeypatch):
+    cache = PredictionCache()
+    old_model, scaler = inference.load_serving_backend("numpy")
+    gated = _GatedModel(old_model)
+    serving = ServingModel(lambda: ("v1", gated, scaler), on_swap=service._on_model_swap)
+    monkeypatch.setattr(service, "CACHE_GLOBAL", cache)
+    monkeypatch.setattr(service, "SERVING_GLOBAL", serving)
+    monkeypatch.setattr(service, "BATCHER_GLOBAL", None)
+    monkeypatch.setattr(service, "ADMISSION_GLOBAL", None)
+    client = service.app.test_client()
+
+    in_flight = {}
+    t = threading.Thread(target=lambda: in_flight.update(r=client.post("/predict/batch", json=[OWL])))
+    t.start()
+    assert gated.entered.wait(5)  # the batch is inside the old model's predict
+    seeded_weights(inference.NUMPY_PATH, seed=9)
+    new_model, _ = inference.load_serving_backend("numpy")
+    serving.swap("v2", new_model, scaler)
+    gated.release.set()
+    t.join()
+
+    old = in_flight["r"].get_json()["results"][0]["probs"]  # answered by the model it started on
+    expected = inference.predict_inputs([inference.parse_payload(OWL)], new_model, scaler)[0]["probs"]
+    assert cache.stats()["stale_puts"] == 1 and cache.stats()["size"] == 0
+    new = client.post("/predict", json=OWL).get_json()["probs"]
+    assert new != old
+    np.testing.assert_allclose(new, expected, atol=1e-6)
@@ -0,0 +1,62 @@
+"""
+Import-time regression test for the serving path.
+
+`import mindpulse_service` is what every --serve worker pays at boot. It must
+only pull in NumPy, Flask and the inference backend: no TensorFlow, pandas or
+sklearn, no filesystem side effects, and stay under SERVE_IMPORT_BUDGET_MS as
+measured by `python -X importtime` (override with MINDPULSE_IMPORT_BUDGET_MS).
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("flask")
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SERVE_IMPORT_BUDGET_MS = float(os.environ.get("MINDPULSE_IMPORT_BUDGET_MS", "750"))
+HEAVY_MODULES = ("tensorflow", "keras", "pandas", "sklearn")
+
+PROBE = (
+    "import sys, mindpulse_service\n"
+    "print(','.join(m for m in {heavy!r} if m in sys.modules))\n"
+)
+
+
+def _import_serving(cwd):
+    env = dict(os.environ, PYTHONPATH=HERE)
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(heavy=HEAVY_MODULES)],
+        cwd=cwd, env=env, capture_output=True, text=True, check=True,
+    )
+
+
+def _cumulative_us(importtime_log: str, module: str) -> int:
+    # lines look like: "import time:       123 |       4567 | mindpulse_service"
+    for line in importtime_log.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1])
+    raise AssertionError(f"{module} not found in -X importtime output")
+
+
+def test_serving_import_skips_training_dependencies(tmp_path):
+    proc = _import_serving(tmp_path)
+    assert proc.stdout.strip() == ""
+
+
+def test_serving_import_has_no_filesystem_side_effects(tmp_path):
+    _import_serving(tmp_path)
+    assert not (tmp_path / "saved_models").exists()
+
+
+def test_serving_import_time_budget(tmp_path):
+    proc = _import_serving(tmp_path)
+    cumulative_ms = _cumulative_us(proc.stderr, "mindpulse_service") / 1000.0
+    assert cumulative_ms <= SERVE_IMPORT_BUDGET_MS, (
+        f"import mindpulse_service took {cumulative_ms:.0f} ms "
+        f"(budget {SERVE_IMPORT_BUDGET_MS:.0f} ms)"
+    )
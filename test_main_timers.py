@@ -0,0 +1,112 @@
+"""
+Tests for the FastAPI timer endpoints in main.py: /stream, /sessions and
+/start/batch. (test_timer_client.py is the manual smoke script.)
+"""
+
+import json
+import threading
+
+from fastapi.testclient import TestClient
+
+import timer
+from main import app
+from pomodoro import pomodoro_phases
+
+
+def _events(response):
+    """(event, data) pairs read from a text/event-stream response."""
+    events, event = [], None
+    for line in response.iter_lines():
+        if line.startswith('event: '):
+            event = line[len('event: '):]
+        elif line.startswith('data: '):
+            events.append((event, json.loads(line[len('data: '):])))
+    return events
+
+
+def test_stream_pushes_state_changes_and_resync_ticks():
+    with TestClient(app) as c:
+        short, long_ = [t['id'] for t in c.post('/start/batch', json=[{'minutes': 1 / 60}, {'minutes': 1}]).json()['timers']]
+        threading.Timer(0.3, timer.cancel_timer, args=(long_,)).start()
+        with c.stream('GET', f'/stream?ids={short},{long_}&tick=0.1') as r:
+            assert r.headers['content-type'].startswith('text/event-stream')
+            events = _events(r)  # the stream ends once both timers have ended
+
+    assert [(e, d['id'], d['status']) for e, d in events[:2]] == [('state', short, 'running'), ('state', long_, 'running')]
+    changes = [(i, d['id'], d['status']) for i, (e, d) in enumerate(events) if e == 'state' and i >= 2]
+    assert [c[1:] for c in changes] == [(long_, 'cancelled'), (short, 'finished')]
+    ticks = [(i, sorted(t['id'] for t in d['timers'])) for i, (e, d) in enumerate(events) if e == 'tick']
+    cancelled_at = changes[0][0]
+    assert any(i < cancelled_at and ids == sorted([short, long_]) for i, ids in ticks)
+    assert any(i > cancelled_at and ids == [short] for i, ids in ticks)  # only live timers are resynced
+
+
+def test_session_phase_arithmetic_and_boundaries():
+    phases = pomodoro_phases(25, cycles=2, short_break=5, long_break=15)
+    assert phases == [('work', 1500), ('short_break', 300), ('work', 1500), ('long_break', 900)]
+
+    def at(elapsed, status='running'):
+        state = timer.session_state({'phases': phases, 'duration_seconds': 4200,
+                                     'remaining_seconds': 4200 - elapsed, 'status': status})
+        return state['phase'], state['phase_index'], state['cycle'], state['phase_remaining_seconds']
+
+    assert at(0) == ('work', 0, 1, 1500)
+    assert at(1499) == ('work', 0, 1, 1)
+    assert at(1500) == ('short_break', 1, 1, 300)  # a boundary belongs to the phase it starts
+    assert at(1800) == ('work', 2, 2, 1500)
+    assert at(3300) == ('long_break', 3, 2, 900)
+    assert at(4199) == ('long_break', 3, 2, 1)
+    assert at(4200) == (None, None, None, 0)
+    assert at(100, status='cancelled') == (None, None, None, 0)
+
+
+def test_sessions_endpoint_and_cancel():
+    with TestClient(app) as c:
+        session = c.post('/sessions', json={'work_minutes': 25, 'cycles': 2}).json()
+        assert (session['status'], session['phase'], session['cycle'], session['duration_seconds']) == \
+               ('running', 'work', 1, 4200)
+        session_id = session['id']
+
+        timer.timers[session_id].started_at -= 1600  # 100 s into the first short break
+        state = c.get(f'/sessions/{session_id}').json()
+        assert (state['phase'], state['phase_index'], state['phase_remaining_seconds']) == ('short_break', 1, 200)
+        assert state['remaining_seconds'] == 2600
+
+        assert c.post(f'/cancel/{session_id}').json()['status'] == 'cancelled'
+        state = c.get(f'/sessions/{session_id}').json()
+        assert (state['status'], state['phase'], state['remaining_seconds']) == ('cancelled', None, 2600)
+        assert c.get(f'/status/{session_id}').json()['status'] == 'cancelled'
+
+        timer_id = c.post('/start', json={'minutes': 1}).json()['id']
+        assert c.get(f'/sessions/{timer_id}').status_code == 404  # plain timers are not sessions
+        assert c.get('/sessions/no-such-session').status_code == 404
+        for bad in ({'work_minutes': 0}, {'cycles': 0}, {'cycles': 101}, {'short_break': -1}):
+            assert c.post('/sessions', json=bad).status_code == 400, bad
+
+
+def test_start_batch_is_all_or_nothing():
+    with TestClient(app) as c:
+        before = set(timer.timers)
+        assert c.post('/start/batch', json=[{'minutes': 1}, {'minutes': 0}]).status_code == 400
+        assert c.post('/start/batch', json=[{'minutes': 1}, {'minutes': 'soon'}]).status_code == 422
+        assert c.post('/start/batch', json=[]).status_code == 400
+        assert c.post('/start/batch', json=[{'minutes': 1}] * 1001).status_code == 400
+        assert set(timer.timers) - before == set()  # a rejected batch creates no timers
+
+        created = c.post('/start/batch', json=[{'minutes': 1}, {'minutes': 2.5}]).json()['timers']
+        assert [t['remaining_seconds'] for t in created] == [60, 150]
+        assert [c.get(f"/status/{t['id']}").json()['status'] for t in created] == ['running', 'running']
+
+
+def test_status_body_matches_the_timer_state():
+    with TestClient(app) as c:
+        running, cancelled = [t['id'] for t in c.post('/start/batch', json=[{'minutes': 1}, {'minutes': 2}]).json()['timers']]
+        c.post(f'/cancel/{cancelled}')
+        session_id = c.post('/sessions', json={'work_minutes': 25, 'cycles': 2}).json()['id']
+        for timer_id in (running, cancelled, session_id):
+            r = c.get(f'/status/{timer_id}')
+            assert r.headers['content-type'] == 'application/json'
+            # the bytes FastAPI would have rendered from the get_timer() dict
+            assert r.content == json.dumps(timer.get_timer(timer_id), ensure_ascii=False,
+                                           separators=(',', ':')).encode()
+        assert c.get('/status/missing').status_code == 404
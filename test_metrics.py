@@ -0,0 +1,97 @@
+"""
+Prometheus exposition and profiler tests for mindpulse_metrics.
+
+Test metrics live in their own registry, so they never show up in the
+process-wide one that /metrics serves.
+"""
+
+import os
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import mindpulse_metrics as metrics
+import main
+import mindpulse_service as service
+
+
+@pytest.fixture
+def registry():
+    return []
+
+
+def _lines(registry, prefix):
+    return [line for line in metrics.render(registry).splitlines() if line.startswith(prefix)]
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    hist = metrics.Histogram("test_latency_seconds", "test", ["stage"], buckets=(0.1, 1.0), registry=registry)
+    child = hist.labels("a")
+    for value in (0.05, 0.5, 0.5, 5.0):
+        child.observe(value)
+    assert _lines(registry, "test_latency_seconds") == [
+        'test_latency_seconds_bucket{stage="a",le="0.1"} 1',
+        'test_latency_seconds_bucket{stage="a",le="1.0"} 3',
+        'test_latency_seconds_bucket{stage="a",le="+Inf"} 4',
+        'test_latency_seconds_sum{stage="a"} 6.05',
+        'test_latency_seconds_count{stage="a"} 4',
+    ]
+
+
+def test_counter_and_gauge(registry):
+    counter = metrics.Counter("test_events_total", "test", registry=registry)
+    counter.inc()
+    counter.inc(2)
+    metrics.Gauge("test_queue_depth", "test", lambda: 7, registry=registry)
+    assert _lines(registry, "test_events_total") == ["test_events_total 3.0"]
+    assert _lines(registry, "test_queue_depth") == ["test_queue_depth 7.0"]
+    assert "# TYPE test_events_total counter" in metrics.render(registry)
+    assert "test_events_total" not in metrics.render()  # not in the served registry
+
+
+def test_concurrent_observations_are_not_lost(registry):
+    child = metrics.Histogram("test_concurrent_seconds", "test", registry=registry).labels()
+
+    def worker():
+        for _ in range(50_000):
+            child.observe(0.001)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sum(child.counts) == 200_000
+
+
+def test_sampling_profiler_sees_busy_thread():
+    def busy_loop_for_profiler():
+        end = time.perf_counter() + 0.05
+        while time.perf_counter() < end:
+            pass
+
+    with metrics.SamplingProfiler(interval=0.001) as profiler:
+        thread = threading.Thread(target=busy_loop_for_profiler)
+        thread.start()
+        thread.join()
+    assert "busy_loop_for_profiler" in profiler.collapsed()
+
+
+def test_profiled_request_keeps_its_response(model_dir, tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "PROFILE_ENABLED", True)
+    monkeypatch.setattr(metrics, "PROFILE_DIR", str(tmp_path / "profiles"))
+    monkeypatch.setattr(main, "MODEL_BACKEND", "numpy")
+    flask_client = service.app.test_client()
+    r = flask_client.get("/health", headers={metrics.PROFILE_HEADER: "1"})
+    assert r.status_code == 200 and r.get_json()["status"] == "ok"
+    assert os.path.isfile(r.headers[metrics.PROFILE_FILE_HEADER])
+    assert metrics.PROFILE_FILE_HEADER not in flask_client.get("/health").headers
+
+    with TestClient(main.app) as client:
+        r = client.post("/predict", json={"social_media_hours": 2, "texting_hours": 3, "personality": "owl"},
+                        headers={metrics.PROFILE_HEADER: "1"})
+        assert r.status_code == 200 and r.headers["content-type"] == "application/json" and "plan" in r.json()
+        assert os.path.isfile(r.headers[metrics.PROFILE_FILE_HEADER])
+    assert len(os.listdir(tmp_path / "profiles")) == 2
@@ -0,0 +1,61 @@
+"""
+Parity tests for the NumPy inference backend.
+
+NumpyPlanner folds the StandardScaler into the first Dense layer and runs in
+float32; its softmax outputs must stay within NUMPY_TOLERANCE of the
+unfolded path (scale the features, then the original layers), which is what
+the Keras model computes.
+"""
+
+import numpy as np
+import pytest
+
+import mindpulse_inference as inference
+from mindpulse_inference import ACTIVATIONS, NUMPY_TOLERANCE, NumpyPlanner
+
+N_FEATURES = 2 + inference.NUM_PERSONALITIES
+# per-feature statistics, like a fitted StandardScaler (one-hot columns included)
+SCALER = (np.linspace(0.1, 4.0, N_FEATURES), np.linspace(0.3, 3.0, N_FEATURES))
+
+
+def _rows(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    inputs = list(zip(rng.uniform(0, 12, n), rng.uniform(0, 8, n), rng.choice(inference.PERSONALITY_LIST, n)))
+    return inference.features_from_inputs(inputs)
+
+
+def _unfolded(path: str, X_raw: np.ndarray) -> np.ndarray:
+    """Reference forward pass in float64 with the scaler applied to the inputs."""
+    with np.load(path) as data:
+        x = (X_raw - data["scaler_mean"]) / data["scaler_scale"]
+        for i, name in enumerate(data["activations"]):
+            x = ACTIVATIONS[str(name)](x @ data[f"W{i}"].astype(np.float64) + data[f"b{i}"])
+    return x
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_folded_scaler_matches_unfolded_forward_pass(tmp_path, seeded_weights, seed):
+    path = seeded_weights(tmp_path / "w.npz", seed, hidden=(32, 16), scaler=SCALER)
+    X_raw = _rows(2000, seed)
+    planner = NumpyPlanner.load(path)
+    expected = _unfolded(path, X_raw)
+
+    actual = planner.predict(X_raw)
+    assert actual.dtype == np.float32 and actual.shape == (2000, inference.NUM_PLANS)
+    assert np.max(np.abs(actual - expected)) < NUMPY_TOLERANCE
+    np.testing.assert_allclose(planner.predict(X_raw[0]), expected[:1], atol=NUMPY_TOLERANCE)  # single row
+
+
+def test_matches_keras_model(tmp_path, seeded_weights):
+    keras = pytest.importorskip("tensorflow").keras
+    path = seeded_weights(tmp_path / "w.npz", 4, hidden=(32, 16), scaler=SCALER)
+    model = keras.Sequential([keras.Input((N_FEATURES,)),
+                              keras.layers.Dense(32, activation="relu"),
+                              keras.layers.Dense(16, activation="relu"),
+                              keras.layers.Dense(inference.NUM_PLANS, activation="softmax")])
+    with np.load(path) as data:
+        for i, layer in enumerate(model.layers):
+            layer.set_weights([data[f"W{i}"], data[f"b{i}"]])
+        X_scaled = (_rows(2000) - data["scaler_mean"]) / data["scaler_scale"]
+    expected = model.predict(X_scaled, verbose=0)
+    assert np.max(np.abs(NumpyPlanner.load(path).predict(_rows(2000)) - expected)) < NUMPY_TOLERANCE
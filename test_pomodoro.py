@@ -0,0 +1,93 @@
+"""
+Timing tests for the pomodoro countdown engine.
+
+Each test adds render latency on every tick (what print() and terminal I/O
+cost) and checks the countdown still ends on its monotonic deadline. The old
+sleep(1)-and-decrement loop drifted by that latency once per tick.
+"""
+
+import asyncio
+import threading
+import time
+
+from pomodoro import Countdown, PomodoroSession, phase_at, pomodoro_phases
+
+# Allowed lateness of a deadline: one scheduler wakeup plus one render.
+TOLERANCE = 0.05
+RENDER_LATENCY = 0.005
+
+
+def _slow_render(*_):
+    time.sleep(RENDER_LATENCY)
+
+
+def test_countdown_does_not_accumulate_render_latency():
+    t0 = time.monotonic()
+    ticks = []
+    assert Countdown(1.0, lambda left: (ticks.append(left), _slow_render()), render_interval=0.01).run()
+    drift = time.monotonic() - t0 - 1.0
+    # a decrementing loop would be len(ticks) * RENDER_LATENCY (~0.5 s) late
+    assert len(ticks) > 50
+    assert 0 <= drift < TOLERANCE
+
+
+def test_long_session_phases_start_on_schedule():
+    # 4 cycles of work + break scaled down to 0.25 s phases, rendered every 10 ms
+    phases = [(name, 1) for name, _ in pomodoro_phases(25, cycles=4)]
+    scale = 0.25
+    t0 = time.monotonic()
+    started = []
+    session = PomodoroSession(phases, on_phase=lambda i: started.append(time.monotonic() - t0),
+                              on_tick=_slow_render, render_interval=0.01,
+                              clock=lambda: (time.monotonic() - t0) / scale)
+    assert session.run()
+    assert len(started) == len(phases)
+    for index, at in enumerate(started):
+        assert abs(at - index * scale) < TOLERANCE, (index, at)
+    assert abs(time.monotonic() - t0 - len(phases) * scale) < TOLERANCE
+
+
+def test_pause_and_resume_shift_the_deadline_exactly():
+    countdown = Countdown(0.5, render_interval=0.1)
+    thread = threading.Thread(target=countdown.run)
+    t0 = time.monotonic()
+    thread.start()
+    time.sleep(0.2)
+    countdown.pause()
+    frozen = countdown.remaining()
+    time.sleep(0.3)
+    assert countdown.remaining() == frozen
+    countdown.resume()
+    thread.join()
+    assert abs(time.monotonic() - t0 - 0.8) < TOLERANCE
+
+
+def test_stop_interrupts_a_paused_countdown():
+    countdown = Countdown(10.0)
+    countdown.pause()
+    result = []
+    thread = threading.Thread(target=lambda: result.append(countdown.run()))
+    thread.start()
+    countdown.stop()
+    thread.join(timeout=1)
+    assert result == [False]
+
+
+def test_many_async_countdowns_share_one_loop():
+    async def main():
+        t0 = time.monotonic()
+        results = await asyncio.gather(*(Countdown(0.3, render_interval=0.1).run_async() for _ in range(500)))
+        return results, time.monotonic() - t0
+
+    results, elapsed = asyncio.run(main())
+    assert all(results)
+    assert elapsed < 0.3 + TOLERANCE * 2
+
+
+def test_phase_schedule_matches_run_pomodoro_order():
+    phases = pomodoro_phases(25, cycles=2, short_break=5, long_break=15)
+    assert phases == [("work", 1500), ("short_break", 300), ("work", 1500), ("long_break", 900)]
+    assert phase_at(phases, 0) == (0, 1500)
+    assert phase_at(phases, 1500) == (1, 300)
+    assert phase_at(phases, 1799.5) == (1, 0.5)
+    assert phase_at(phases, 4200) is None
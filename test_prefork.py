@@ -0,0 +1,87 @@
+"""
+Tests for pre-fork serving (mindpulse_service.py --serve --workers N):
+the workers answer on the shared socket and SIGHUP replaces all of them.
+
+Linux only: the worker PIDs are read from /proc.
+"""
+
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="needs os.fork() and /proc")
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _children(pid: int) -> set:
+    found = set()
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        if int(stat.rsplit(")", 1)[1].split()[1]) == pid:  # field 4: ppid
+            found.add(int(entry))
+    return found
+
+
+def _wait_for(condition, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        value = condition()
+        if value:
+            return value
+        time.sleep(0.1)
+    pytest.fail("timed out")
+
+
+def _health(port: int):
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=2) as r:
+            return json.loads(r.read())
+    except OSError:
+        return None
+
+
+def _worker_pids(supervisor: int, exclude: set = frozenset()):
+    """The supervisor's two worker PIDs once both are up and none is in `exclude`."""
+    pids = _children(supervisor)
+    return pids if len(pids) == 2 and not pids & exclude else None
+
+
+def test_workers_serve_and_sighup_replaces_them(model_dir):
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "mindpulse_service.py"), "--serve", "--workers", "2",
+         "--backend", "numpy", "--host", "127.0.0.1", "--port", str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        assert _wait_for(lambda: _health(port))["status"] == "ok"
+        workers = _wait_for(lambda: _worker_pids(proc.pid))
+
+        proc.send_signal(signal.SIGHUP)
+        replaced = _wait_for(lambda: _worker_pids(proc.pid, exclude=workers))
+        assert _wait_for(lambda: _health(port))["status"] == "ok"
+        assert proc.poll() is None  # the supervisor itself survives SIGHUP
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+    # SIGTERM to the supervisor shuts the workers down too
+    _wait_for(lambda: not any(os.path.exists(f"/proc/{pid}") for pid in replaced))
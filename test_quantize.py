@@ -0,0 +1,64 @@
+"""
+Tests for the float16/int8 post-training-quantized weight variants (--quantize / --variant).
+
+The float32 model is a tiny seeded NumpyPlanner .npz with a non-trivial
+scaler, so the quantized files also carry the folded-in scaling.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pandas")
+
+import mindpulse_inference as inference
+import mindpulse_service as service
+from mindpulse_service import export_quantized
+
+# two hidden layers, so quantization error compounds across layers
+pytestmark = pytest.mark.parametrize("model_dir", [{"seed": 3, "hidden": (32, 16)}], indirect=True)
+
+
+@pytest.mark.parametrize("precision", ["float16", "int8"])
+def test_variant_is_smaller_and_agrees_with_float32(model_dir, precision):
+    agreement = export_quantized(precision, n_calib=4000)
+    path = inference.variant_path(precision)
+    assert agreement >= 0.99
+    assert os.path.getsize(path) < os.path.getsize(inference.NUMPY_PATH)
+
+    model, scaler = inference.load_serving_backend("auto", variant=precision)
+    assert scaler is None and inference.resolve_backend("keras", precision) == "numpy"
+    assert all(w.dtype == np.float32 for w in model.weights)
+    reference = inference.NumpyPlanner.load(inference.NUMPY_PATH)
+    X = inference.features_from_inputs([(2.0, 3.0, "owl"), (9.0, 0.5, "lion"), (0.0, 6.0, "snake")])
+    np.testing.assert_allclose(model.predict(X), reference.predict(X), atol=0.05)
+    with np.load(path, allow_pickle=False) as data:
+        assert data["W0"].dtype == np.dtype(precision)
+
+
+def test_export_below_min_agreement_fails_and_keeps_previous_file(model_dir):
+    export_quantized("int8", n_calib=4000)
+    path = inference.variant_path("int8")
+    before = open(path, "rb").read()
+    with pytest.raises(ValueError, match="plan agreement"):
+        export_quantized("int8", n_calib=4000, min_agreement=1.01)
+    assert open(path, "rb").read() == before
+    assert sorted(os.listdir(inference.MODEL_DIR)) == ["mindboost_planner.int8.npz", "mindboost_planner.npz"]
+
+
+def test_failed_calibration_leaves_no_temp_file(model_dir, monkeypatch):
+    def fail(*args):
+        raise RuntimeError("calibration failed")
+
+    monkeypatch.setattr(service, "_plan_agreement", fail)
+    with pytest.raises(RuntimeError, match="calibration failed"):
+        export_quantized("int8", n_calib=4000)
+    assert os.listdir(inference.MODEL_DIR) == ["mindboost_planner.npz"]
+
+
+def test_missing_variant_points_at_quantize(model_dir):
+    with pytest.raises(FileNotFoundError, match="--quantize float16"):
+        inference.load_serving_backend("numpy", variant="float16")
+    with pytest.raises(ValueError):
+        inference.variant_path("int4")
@@ -0,0 +1,130 @@
+"""
+Tests for the versioned model registry and hot reload.
+
+Versions are tiny seeded NumpyPlanner .npz files; no Keras needed.
+"""
+
+import os
+import threading
+import time
+
+import pytest
+
+import mindpulse_inference as inference
+import mindpulse_metrics as metrics
+from mindpulse_registry import ModelRegistry, RegistryWatcher, ServingModel, registry_loader, warm_up
+
+
+@pytest.fixture
+def publish(tmp_path, seeded_weights):
+    def _publish(registry, seed):
+        weights = seeded_weights(tmp_path / f"w{seed}.npz", seed, scaler=(0.0, 1.0))
+        return registry.publish("numpy", {"weights": weights}, note=f"seed {seed}")
+    return _publish
+
+
+def test_publish_pin_unpin_and_rollback(tmp_path, publish):
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    assert registry.current() is None
+    assert [publish(registry, seed) for seed in range(3)] == ["v0001", "v0002", "v0003"]
+    assert registry.current() == "v0003"
+    assert registry.manifest("v0002")["note"] == "seed 1"
+
+    assert registry.rollback() == "v0002"
+    assert registry.pinned()
+    assert publish(registry, 3) == "v0004"
+    assert registry.current() == "v0002"  # pinned: publishing doesn't advance CURRENT
+    assert registry.unpin() == "v0004"
+    registry.pin("v0001")
+    assert registry.current() == "v0001"
+    with pytest.raises(ValueError):
+        registry.pin("v0099")
+    assert not [name for name in os.listdir(registry.root) if name.startswith(".staging")]
+
+
+def test_lazy_load_runs_once_under_concurrent_first_requests():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return "v1", object(), None
+
+    serving = ServingModel(loader)
+    threads = [threading.Thread(target=serving.get) for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+
+
+def test_warm_up_stays_out_of_the_request_metrics(tmp_path, publish):
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    model, scaler = registry.load(publish(registry, 0))
+    forward = metrics.STAGE_SECONDS.labels("forward")
+    before = metrics.PREDICTED_ROWS._default.value, sum(forward.counts)
+    warm_up(model, scaler)
+    assert (metrics.PREDICTED_ROWS._default.value, sum(forward.counts)) == before
+
+
+def test_watcher_skips_corrupt_version_and_keeps_serving(tmp_path, publish):
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    publish(registry, 0)
+    serving = ServingModel(registry_loader(registry))
+    watcher = RegistryWatcher(registry, serving)
+    assert serving.get()[0] == "v0001"
+
+    version = publish(registry, 1)
+    with open(os.path.join(registry.root, version, "mindboost_planner.npz"), "ab") as f:
+        f.write(b"corrupt")
+    assert not watcher.check()
+    assert watcher.failures == 1
+    assert serving.current[0] == "v0001"
+    assert not watcher.check()  # not retried until CURRENT moves
+    assert watcher.failures == 1
+
+    publish(registry, 2)
+    assert watcher.check()
+    assert serving.current[0] == "v0003"
+
+
+def test_hot_swap_under_load_never_fails_or_mixes_versions(tmp_path, publish):
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    publish(registry, 0)
+    swapped = []
+    serving = ServingModel(registry_loader(registry), on_swap=swapped.append)
+    serving.get()
+    watcher = RegistryWatcher(registry, serving, interval=0.01).start()
+
+    models = {}  # version -> model object first seen with it
+    errors = []
+    stop = threading.Event()
+
+    def client():
+        while not stop.is_set():
+            try:
+                version, model, scaler = serving.get()
+                assert models.setdefault(version, model) is model
+                result = inference.predict_inputs([(2.0, 3.0, "owl")], model, scaler)[0]
+                assert abs(sum(result["probs"]) - 1.0) < 1e-3
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+
+    threads = [threading.Thread(target=client) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for seed in range(1, 6):
+        publish(registry, seed)
+        time.sleep(0.05)
+    deadline = time.monotonic() + 2.0
+    while serving.current[0] != "v0006" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    stop.set()
+    for t in threads:
+        t.join()
+    watcher.stop()
+
+    assert errors == []
+    assert serving.current[0] == "v0006"
+    assert swapped and swapped[-1] == "v0006"
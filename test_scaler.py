@@ -0,0 +1,55 @@
+"""
+Tests for the pickle-free scaler format (scaler.npz) and legacy scaler.pkl migration.
+"""
+
+import os
+import pickle
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from mindpulse_inference import NUM_PERSONALITIES, NumpyScaler, load_scaler, save_scaler
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _fitted_scaler():
+    sklearn_preprocessing = pytest.importorskip("sklearn.preprocessing")
+    rng = np.random.default_rng(0)
+    X = np.c_[rng.uniform(0, 8, 500), rng.uniform(0, 5, 500), np.eye(NUM_PERSONALITIES)[rng.integers(0, 7, 500)]]
+    return sklearn_preprocessing.StandardScaler().fit(X), X
+
+
+def test_saved_arrays_transform_like_sklearn(tmp_path):
+    scaler, X = _fitted_scaler()
+    path = str(tmp_path / "scaler.npz")
+    save_scaler(scaler, path)
+    loaded = load_scaler(path, legacy_path=str(tmp_path / "missing.pkl"))
+    np.testing.assert_allclose(loaded.transform(X), scaler.transform(X), rtol=0, atol=1e-12)
+    with np.load(path, allow_pickle=False) as data:
+        assert sorted(data.files) == ["mean", "scale", "schema_version"]
+
+
+def test_legacy_pickle_is_migrated_once(tmp_path):
+    scaler, X = _fitted_scaler()
+    legacy, path = str(tmp_path / "scaler.pkl"), str(tmp_path / "scaler.npz")
+    with open(legacy, "wb") as f:
+        pickle.dump(scaler, f)
+
+    migrated = load_scaler(path, legacy_path=legacy)
+    assert os.path.exists(path)
+    np.testing.assert_allclose(migrated.transform(X), scaler.transform(X), rtol=0, atol=1e-12)
+    os.remove(legacy)
+    np.testing.assert_array_equal(load_scaler(path, legacy_path=legacy).mean_, scaler.mean_)
+
+
+def test_loading_scaler_arrays_does_not_import_sklearn(tmp_path):
+    NumpyScaler(np.zeros(9), np.ones(9)).save(str(tmp_path / "scaler.npz"))
+    code = ("import sys, mindpulse_inference as m\n"
+            "m.load_scaler('scaler.npz').transform([[0.0] * 9])\n"
+            "print('sklearn' in sys.modules)\n")
+    out = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=dict(os.environ, PYTHONPATH=HERE),
+                         capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "False"
@@ -0,0 +1,77 @@
+"""
+Tests for offline bulk scoring (mindpulse_service.py --score).
+
+Scores a small CSV against seeded NumpyPlanner weights and checks the output
+columns against the online prediction path.
+"""
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+import mindpulse_inference as inference
+from mindpulse_score import PROB_COLUMNS, score_file
+
+pytestmark = pytest.mark.parametrize("model_dir", [{"seed": 1}], indirect=True)
+
+
+def _cohort(n: int) -> "pd.DataFrame":
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "user_id": np.arange(n),
+        "social_media_hours": rng.uniform(0, 10, n).round(2),
+        "texting_hours": rng.uniform(0, 6, n).round(2),
+        "personality": rng.choice(inference.PERSONALITY_LIST, n),
+    })
+    df.loc[3, "personality"] = "Owl"  # case-insensitive like /predict
+    df.loc[5, "personality"] = "unicorn"
+    df.loc[8, "texting_hours"] = np.nan
+    return df
+
+
+def test_scores_match_online_predictions_and_keep_row_order(model_dir):
+    df = _cohort(2500)
+    df.to_csv("cohort.csv", index=False)
+    summary = score_file("cohort.csv", "scores", backend="numpy", chunk_size=1000, workers=0, id_column="user_id")
+    assert summary["rows"] == 2500 and summary["invalid_rows"] == 2
+
+    parts = sorted(os.listdir("scores"))
+    assert parts == ["part-00000.npz", "part-00001.npz", "part-00002.npz"]
+    out = {k: np.concatenate([np.load(os.path.join("scores", p))[k] for p in parts])
+           for k in ["user_id", "plan_index", "confidence"] + PROB_COLUMNS}
+    np.testing.assert_array_equal(out["user_id"], df["user_id"])
+    assert out["plan_index"][5] == out["plan_index"][8] == -1
+    assert np.isnan(out["confidence"][[5, 8]]).all()
+
+    model, scaler = inference.load_serving_backend("numpy")
+    for row in (0, 3, 1234, 2499):
+        expected = inference.predict_inputs([(df.social_media_hours[row], df.texting_hours[row],
+                                              df.personality[row].lower())], model, scaler)[0]
+        probs = [out[c][row] for c in PROB_COLUMNS]
+        np.testing.assert_allclose(probs, expected["probs"], atol=1e-6)
+        assert out["plan_index"][row] == int(np.argmax(expected["probs"]))
+        assert out["confidence"][row] == pytest.approx(max(expected["probs"]), abs=1e-6)
+
+
+def test_process_pool_writes_the_same_rows_as_in_process(model_dir):
+    _cohort(3000).to_csv("cohort.csv", index=False)
+    score_file("cohort.csv", "serial.csv", backend="numpy", chunk_size=700, workers=0, id_column="user_id")
+    score_file("cohort.csv", "pooled.csv", backend="numpy", chunk_size=700, workers=2, id_column="user_id")
+    serial, pooled = pd.read_csv("serial.csv"), pd.read_csv("pooled.csv")
+    assert len(serial) == 3000
+    pd.testing.assert_frame_equal(serial, pooled)
+
+
+def test_worker_scoring_does_not_import_the_service(model_dir):
+    _cohort(100).to_csv("cohort.csv", index=False)
+    script = ("import sys; import mindpulse_score as s; s._init_worker('numpy'); "
+              "chunk = next(s.iter_input_chunks('cohort.csv', 50)); s.score_chunk(s._prepare(chunk)); "
+              "print(sorted({'mindpulse_service', 'flask', 'mindpulse_registry'} & set(sys.modules)))")
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
@@ -0,0 +1,87 @@
+"""
+Tests for response serialization (mindpulse_inference.dumps): the orjson and
+stdlib json paths must agree, and the plan templates must stay unchanged.
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+import mindpulse_inference as inference
+from mindpulse_inference import PLAN_TEMPLATES, NUM_PLANS, _result, map_probs_to_plan
+
+
+def _results(n=8, seed=0):
+    rng = np.random.default_rng(seed)
+    probs = rng.dirichlet(np.ones(NUM_PLANS), size=n).astype(np.float32)
+    return [_result((round(float(s), 2), 1.5, "owl"), p.tolist(), map_probs_to_plan(p))
+            for s, p in zip(rng.uniform(0, 12, n), probs)]
+
+
+NUMPY_VALUES = {
+    "f32": np.float32(0.1),
+    "f64": np.float64(0.1),
+    "tiny": 1e-05,
+    "i64": np.int64(7),
+    "flag": np.bool_(True),
+    "f32_array": np.array([0.25, 0.1], dtype=np.float32),
+    "f64_matrix": np.array([[0.5, 1.0], [2.0, 3.5]]),
+    "i32_array": np.arange(3, dtype=np.int32),
+    "nested": [{"x": np.float32(2.5), "y": (np.int64(1), np.float64(1e-07))}],
+}
+
+
+@pytest.fixture
+def stdlib(monkeypatch):
+    """dumps() with orjson monkeypatched away."""
+    monkeypatch.setattr(inference, "orjson", None)
+    return inference.dumps
+
+
+def test_stdlib_fallback_matches_orjson(stdlib):
+    orjson = pytest.importorskip("orjson")
+    with_orjson = lambda obj: orjson.dumps(obj, default=inference._json_default,
+                                           option=orjson.OPT_SERIALIZE_NUMPY)
+    results = _results()
+    # predict results have no tiny floats, so the bodies are byte-identical
+    assert stdlib({"results": results}) == with_orjson({"results": results})
+    assert stdlib(results[0]) == with_orjson(results[0])
+    # numpy values decode the same; only the spelling of 1e-05 differs
+    assert json.loads(stdlib(NUMPY_VALUES)) == json.loads(with_orjson(NUMPY_VALUES))
+
+
+def test_stdlib_fallback_encodes_numpy_values(stdlib):
+    decoded = json.loads(stdlib(NUMPY_VALUES))
+    assert decoded["f32"] == 0.1  # float32 as its shortest repr, not 0.10000000149011612
+    assert decoded["f32_array"] == [0.25, 0.1]
+    assert decoded["f64_matrix"] == [[0.5, 1.0], [2.0, 3.5]]
+    assert decoded["i32_array"] == [0, 1, 2]
+    assert decoded["i64"] == 7 and decoded["flag"] is True
+    assert decoded["nested"] == [{"x": 2.5, "y": [1, 1e-07]}]
+    with pytest.raises(TypeError):
+        stdlib({"x": object()})
+
+
+def test_encoded_results_decode_to_the_results(stdlib):
+    results = _results()
+    assert json.loads(inference.encode_results(results)) == {"results": json.loads(json.dumps(results))}
+
+
+def test_plan_templates_are_frozen():
+    template = PLAN_TEMPLATES[0]
+    with pytest.raises(TypeError):
+        template["structured"]["daily_mindfulness_min"] = 0
+    with pytest.raises(TypeError):
+        template["recommendations"] = []
+    assert isinstance(template["recommendations"], tuple)
+
+
+def test_editing_a_plan_leaves_the_template_alone():
+    probs = np.eye(NUM_PLANS)[0]
+    plan = map_probs_to_plan(probs)
+    plan["recommendations"].append("extra")
+    plan["structured"]["daily_mindfulness_min"] = 0
+    fresh = map_probs_to_plan(probs)
+    assert fresh["recommendations"] == list(PLAN_TEMPLATES[0]["recommendations"])
+    assert fresh["structured"]["daily_mindfulness_min"] == 10
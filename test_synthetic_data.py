@@ -0,0 +1,93 @@
+"""
+Tests for the synthetic training data generator (mindpulse_service).
+
+_reference_rows is the original row-by-row generator; the vectorized one
+draws in a different order, so it is compared on the labelling rules and on
+the distribution rather than row for row.
+"""
+
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+import mindpulse_service as service
+from mindpulse_inference import NUM_PERSONALITIES, NUM_PLANS, PERSONALITY_LIST
+
+OFFSETS = {"owl": 1.5, "dolphin": -1.0, "lion": -0.7, "snake": 0.8}
+
+
+def _label(social: float, texting: float, personality: str) -> int:
+    score = social * 0.6 + texting * 0.4 + OFFSETS.get(personality, 0.0)
+    if score >= 8.0:
+        return 3  # Sleep & Recovery
+    if score >= 5.0:
+        return 0  # Stress-Relief & Mindfulness
+    if score >= 3.0:
+        return 1  # Productivity & Focus
+    return 2  # Balanced Lifestyle
+
+
+def _reference_rows(n_samples: int, seed: int) -> "pd.DataFrame":
+    rng = np.random.default_rng(seed)
+    rows = []
+    for _ in range(n_samples):
+        social = float(np.clip(rng.normal(4.0, 2.0), 0.0, 12.0))
+        texting = float(np.clip(rng.normal(2.5, 1.5), 0.0, 10.0))
+        personality = PERSONALITY_LIST[int(rng.integers(0, NUM_PERSONALITIES))]
+        rows.append((social, texting, personality, _label(social, texting, personality)))
+    return pd.DataFrame(rows, columns=["social_media_hours", "texting_hours", "personality", "label"])
+
+
+def _label_shares(df: "pd.DataFrame") -> "pd.DataFrame":
+    """Share of each label within each personality."""
+    return pd.crosstab(df["personality"], df["label"], normalize="index").reindex(
+        index=PERSONALITY_LIST, columns=range(NUM_PLANS), fill_value=0.0)
+
+
+def _plain_strings(column: "pd.Series") -> bool:
+    """A string column, as the row-by-row generator returned, not a Categorical."""
+    return pd.api.types.is_string_dtype(column) and not isinstance(column.dtype, pd.CategoricalDtype)
+
+
+def test_rows_follow_the_documented_rules():
+    df = service.generate_synthetic_wisam_data(5000, seed=3)
+    assert list(df.columns) == ["social_media_hours", "texting_hours", "personality", "label"]
+    assert df["social_media_hours"].between(0.0, 12.0).all()
+    assert df["texting_hours"].between(0.0, 10.0).all()
+    assert _plain_strings(df["personality"])
+    assert set(df["personality"]) == set(PERSONALITY_LIST)
+    expected = [_label(s, t, p) for s, t, p in
+                zip(df["social_media_hours"], df["texting_hours"], df["personality"])]
+    assert df["label"].tolist() == expected
+
+
+def test_distribution_matches_the_row_by_row_generator():
+    df = service.generate_synthetic_wisam_data(40_000, seed=11)
+    reference = _reference_rows(40_000, seed=11)
+    assert np.max(np.abs(_label_shares(df).to_numpy() - _label_shares(reference).to_numpy())) < 0.03
+    for column in ("social_media_hours", "texting_hours"):
+        assert abs(df[column].mean() - reference[column].mean()) < 0.05
+        assert abs(df[column].std() - reference[column].std()) < 0.05
+    shares = df["personality"].value_counts(normalize=True)
+    assert np.all(np.abs(shares - 1 / NUM_PERSONALITIES) < 0.02)
+
+
+def test_chunked_mode_yields_n_rows_in_chunk_sizes():
+    chunks = list(service.iter_synthetic_wisam_data(2500, chunk_size=700, seed=5))
+    assert [len(df) for df in chunks] == [700, 700, 700, 400]
+    assert all(_plain_strings(df["personality"]) for df in chunks)
+    assert [len(df) for df in service.iter_synthetic_wisam_data(1400, chunk_size=700)] == [700, 700]
+    # one chunk is the whole dataset: same rows as the one-shot generator
+    (whole,) = service.iter_synthetic_wisam_data(2500, chunk_size=2500, seed=5)
+    pd.testing.assert_frame_equal(whole, service.generate_synthetic_wisam_data(2500, seed=5))
+
+
+def test_same_seed_same_output():
+    pd.testing.assert_frame_equal(service.generate_synthetic_wisam_data(1000, seed=9),
+                                  service.generate_synthetic_wisam_data(1000, seed=9))
+    chunked = [pd.concat(list(service.iter_synthetic_wisam_data(1000, chunk_size=300, seed=9)), ignore_index=True)
+               for _ in range(2)]
+    pd.testing.assert_frame_equal(*chunked)
+    assert not service.generate_synthetic_wisam_data(1000, seed=10).equals(
+        service.generate_synthetic_wisam_data(1000, seed=9))
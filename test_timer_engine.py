@@ -0,0 +1,66 @@
+"""
+Tests for the timer engine: the shared deadline-heap scheduler.
+
+Timers are created normally and then backdated (started_at) so their
+deadlines fall a few tens of milliseconds out; durations stay whole seconds.
+"""
+
+import asyncio
+import time
+
+import timer
+
+
+def _backdated(ends_in: float, seconds: int = 1) -> str:
+    """A created (not started) timer whose deadline is `ends_in` seconds from now."""
+    timer_id = timer.create_timer(seconds / 60)
+    timer.timers[timer_id].started_at = time.time() + ends_in - seconds
+    return timer_id
+
+
+def _deadline(timer_id: str) -> float:
+    record = timer.timers[timer_id]
+    return record.started_at + record.duration_seconds
+
+
+def test_scheduler_finishes_timers_in_deadline_order():
+    async def scenario():
+        # started in a different order than they are due
+        ids = [_backdated(ends_in) for ends_in in (0.15, 0.05, 0.25, 0.10)]
+        cancelled = _backdated(0.08)
+        for timer_id in ids + [cancelled]:
+            timer.start_background(timer_id)
+        timer.cancel_timer(cancelled)
+        await asyncio.sleep(0.4)
+        return ids, cancelled
+
+    ids, cancelled = asyncio.run(scenario())
+    states = [timer.get_timer(timer_id) for timer_id in ids]
+    assert [s["status"] for s in states] == ["finished"] * 4
+    for timer_id, state in zip(ids, states):
+        lag = state["finished_at"] - _deadline(timer_id)
+        assert 0 <= lag < 0.05, lag  # finished on its deadline, not on a 1 s poll
+    assert sorted(ids, key=lambda t: timer.timers[t].finished_at) == sorted(ids, key=_deadline)
+    assert timer.get_timer(cancelled)["status"] == "cancelled"  # its heap entry was skipped
+
+
+def test_ended_timers_are_evicted_after_retention(monkeypatch):
+    monkeypatch.setattr(timer, "TIMER_RETENTION_SECONDS", 0.2)
+
+    async def scenario():
+        finished, cancelled, running = _backdated(0.02), _backdated(5.0, seconds=10), _backdated(5.0, seconds=10)
+        for timer_id in (finished, cancelled, running):
+            timer.start_background(timer_id)
+        timer.cancel_timer(cancelled)
+        await asyncio.sleep(0.1)
+        # ended, but still inside the retention window
+        assert timer.get_timer(finished)["status"] == "finished"
+        assert timer.get_timer(cancelled)["status"] == "cancelled"
+        await asyncio.sleep(0.3)
+        return finished, cancelled, running
+
+    finished, cancelled, running = asyncio.run(scenario())
+    assert timer.get_timer(finished) is None and finished not in timer.timers
+    assert timer.get_timer(cancelled) is None
+    assert timer.get_timer(running)["status"] == "running"  # running timers are never evicted
+    timer.cancel_timer(running)
@@ -0,0 +1,99 @@
+"""
+Tests for shard-encoded timer ids and forwarding to the owning worker.
+
+The "other worker" is a stand-in Unix-socket HTTP server registered in a
+LocalDirectory, so no extra processes are needed.
+"""
+
+import asyncio
+import os
+import tempfile
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import timer
+from main import app
+from timer_shards import FORWARDED_HEADER, FileDirectory, LocalDirectory, open_directory
+
+OWNER_BODY = b'{"id": "s7-owned", "status": "running"}'
+
+
+@pytest.fixture
+def owner():
+    """Stand-in for shard 7's worker: answers every request with OWNER_BODY and records the request heads."""
+    requests = []
+    path = os.path.join(tempfile.mkdtemp(), "shard-7.sock")
+    loop = asyncio.new_event_loop()
+
+    async def handle(reader, writer):
+        head = await reader.readuntil(b"\r\n\r\n")
+        requests.append(head.decode("latin-1"))
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                     b"Content-Length: %d\r\n\r\n%s" % (len(OWNER_BODY), OWNER_BODY))
+        await writer.drain()
+        writer.close()
+
+    server = loop.run_until_complete(asyncio.start_unix_server(handle, path))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield f"unix:{path}", requests
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    server.close()
+
+
+def test_ids_encode_their_shard():
+    timer.set_shard(3)
+    try:
+        timer_id = timer.create_timer(1)
+        session_id = timer.create_session(1, cycles=1)
+    finally:
+        timer.set_shard(None)
+    assert timer.shard_of(timer_id) == timer.shard_of(session_id) == 3
+    assert timer.shard_of(timer.create_timer(1)) is None
+    assert timer.is_local(timer.create_timer(1))
+    assert not timer.is_local(timer_id)  # this process is no longer shard 3
+
+
+def test_file_directory_is_shared_between_instances(tmp_path):
+    a, b = FileDirectory(str(tmp_path)), open_directory(f"file:{tmp_path}")
+    a.register(2, "unix:/tmp/shard-2.sock")
+    assert b.lookup(2) == "unix:/tmp/shard-2.sock"
+    a.register(2, "tcp:10.0.0.2:9000")
+    assert b.lookup(2) == "unix:/tmp/shard-2.sock"  # cached until forwarding fails
+    b.forget(2)
+    assert b.lookup(2) == "tcp:10.0.0.2:9000"
+    a.unregister(2)
+    b.forget(2)
+    assert b.lookup(2) is None
+
+
+def test_requests_for_another_shards_timer_are_forwarded(owner):
+    address, requests = owner
+    with TestClient(app) as client:
+        timer.set_shard(0)
+        app.state.shards = LocalDirectory()
+        try:
+            local_id = client.post("/start", json={"minutes": 1}).json()["id"]
+            assert timer.shard_of(local_id) == 0
+            assert client.get(f"/status/{local_id}").json()["status"] == "running"
+            assert not requests
+
+            assert client.get("/status/s7-owned").status_code == 503  # shard 7 not registered yet
+            app.state.shards.register(7, address)
+            r = client.get("/status/s7-owned")
+            assert r.status_code == 200 and r.content == OWNER_BODY
+            assert client.post("/cancel/s7-owned").content == OWNER_BODY
+            assert requests[0].startswith("GET /status/s7-owned ")
+            assert requests[1].startswith("POST /cancel/s7-owned ")
+            assert all(f"{FORWARDED_HEADER}: 1" in head for head in requests)
+
+            # a forwarded request is answered locally, never forwarded again
+            r = client.get("/status/s7-owned", headers={FORWARDED_HEADER: "1"})
+            assert r.status_code == 404 and len(requests) == 2
+            assert client.get(f"/stream?ids={local_id},s7-owned").status_code == 400
+        finally:
+            timer.set_shard(None)
+            app.state.shards = None
@@ -0,0 +1,158 @@
+"""
+Tests for the persistent timer stores (MINDPULSE_TIMER_STORE).
+
+A "restart" detaches the store, drops the timers from memory and attaches a
+fresh store on the same files through timer.attach_store, as main.py does
+at startup.
+"""
+
+import asyncio
+import json
+import os
+import time
+
+import pytest
+
+import timer
+from timer_store import SqliteTimerStore, WalTimerStore, open_store
+
+
+@pytest.fixture(params=["wal", "sqlite"])
+def store_spec(request, tmp_path):
+    return f"wal:{tmp_path / 'wal'}" if request.param == "wal" else f"sqlite:{tmp_path / 'timers.db'}"
+
+
+@pytest.fixture(autouse=True)
+def detached():
+    yield
+    timer.detach_store()
+
+
+def _restart(spec: str, ids) -> int:
+    timer.detach_store()
+    for timer_id in ids:
+        timer.timers.pop(timer_id, None)
+    return timer.attach_store(open_store(spec))
+
+
+def test_timers_survive_a_restart(store_spec):
+    async def before_crash():
+        timer.attach_store(open_store(store_spec))
+        running = timer.create_timer(10)
+        session = timer.create_session(25, cycles=2)
+        cancelled = timer.create_timer(10)
+        overdue = timer.create_timer(1 / 60)
+        for timer_id in (running, session, cancelled, overdue):
+            timer.start_background(timer_id)
+        timer.cancel_timer(cancelled)
+        return running, session, cancelled, overdue
+
+    ids = asyncio.run(before_crash())
+    running, session, cancelled, overdue = ids
+    expected = {timer_id: timer.get_timer(timer_id) for timer_id in ids}
+
+    time.sleep(1.1)  # `overdue` reaches its deadline while the service is down
+
+    async def after_restart():
+        assert _restart(store_spec, ids) >= len(ids)
+        await asyncio.sleep(0.05)  # the scheduler finishes `overdue` straight away
+
+    asyncio.run(after_restart())
+    for timer_id in (running, session, cancelled):
+        state = timer.timers[timer_id].as_dict()
+        assert {k: state[k] for k in ("status", "started_at", "duration_seconds", "cancelled")} == \
+               {k: expected[timer_id][k] for k in ("status", "started_at", "duration_seconds", "cancelled")}
+    assert timer.timers[session].phases == [tuple(p) for p in expected[session]["phases"]]
+    assert timer.get_session(session)["phase"] == "work"
+    assert timer.get_timer(overdue)["status"] == "finished"
+    timer.cancel_timer(running)
+    timer.cancel_timer(session)
+
+
+def test_wal_replay_stops_at_a_torn_last_line(tmp_path):
+    store = WalTimerStore(str(tmp_path))
+    for i in range(3):
+        store.put({"id": f"t{i}", "status": "running"})
+    store.delete("t1")
+    store.close()
+    with open(store.wal_path, "a", encoding="utf-8") as f:
+        f.write('["put",{"id":"t9","status":"run')  # crash in the middle of a group commit
+
+    store = WalTimerStore(str(tmp_path))
+    assert sorted(s["id"] for s in store.load()) == ["t0", "t2"]
+    store.put({"id": "t3", "status": "running"})  # appended after recovery
+    store.close()
+
+    with open(store.wal_path, encoding="utf-8") as f:
+        assert [json.loads(line)[1]["id"] for line in f] == ["t0", "t1", "t2", "t1", "t3"]
+    assert sorted(s["id"] for s in WalTimerStore(str(tmp_path)).load()) == ["t0", "t2", "t3"]
+
+
+def test_wal_ignores_an_unterminated_last_line(tmp_path):
+    store = WalTimerStore(str(tmp_path))
+    store.put({"id": "t0", "status": "running"})
+    store.close()
+    with open(store.wal_path, "a", encoding="utf-8") as f:
+        f.write('["put",{"id":"t1","status":"running"}]')  # complete JSON, newline never written
+    assert [s["id"] for s in WalTimerStore(str(tmp_path)).load()] == ["t0"]
+
+
+def test_compaction_does_not_resurrect_deleted_or_evicted_timers(tmp_path, monkeypatch):
+    monkeypatch.setattr(timer, "TIMER_RETENTION_SECONDS", 0.05)
+    spec = f"wal:{tmp_path}"
+
+    async def scenario():
+        store = WalTimerStore(str(tmp_path), compact_every=8)
+        timer.attach_store(store)
+        kept = timer.create_timer(10)
+        evicted = timer.create_timer(1 / 60)
+        timer.timers[evicted].started_at -= 0.95  # due in 50 ms
+        for timer_id in (kept, evicted):
+            timer.start_background(timer_id)
+        await asyncio.sleep(0.3)  # finished, then evicted after retention
+        assert evicted not in timer.timers
+        extra = timer.create_timers([10] * 8)  # enough changes to compact
+        store.flush()
+        assert store._wal_entries < 8 and os.path.exists(store.snapshot_path)
+        return kept, evicted, extra
+
+    kept, evicted, extra = asyncio.run(scenario())
+    timer.detach_store()
+    with open(os.path.join(tmp_path, "timers.snapshot"), encoding="utf-8") as f:
+        snapshot_ids = {json.loads(line)[1]["id"] for line in f}
+    assert kept in snapshot_ids and evicted not in snapshot_ids
+
+    stored = {s["id"] for s in open_store(spec).load()}
+    assert kept in stored and evicted not in stored
+    _restart(spec, [kept, evicted])
+    assert kept in timer.timers and evicted not in timer.timers
+    for timer_id in [kept] + extra:
+        timer.cancel_timer(timer_id)
+
+
+def test_compaction_keeps_only_live_states(tmp_path):
+    live = {}
+    store = WalTimerStore(str(tmp_path), compact_every=4)
+    store.snapshot_source = lambda: list(live.values())
+    for i in range(3):
+        live[f"t{i}"] = {"id": f"t{i}", "status": "running"}
+        store.put(live[f"t{i}"])
+    del live["t1"]
+    store.delete("t1")
+    store.flush()  # 4 entries: compacts
+    assert os.path.getsize(store.wal_path) == 0
+    store.put({"id": "t3", "status": "running"})  # changes after compaction go to the fresh WAL
+    store.delete("t3")
+    store.close()
+    assert sorted(s["id"] for s in WalTimerStore(str(tmp_path)).load()) == ["t0", "t2"]
+
+
+def test_sqlite_group_commit_buffers_until_flush(tmp_path):
+    store = SqliteTimerStore(str(tmp_path / "timers.db"), flush_interval=60)
+    store.start()
+    for i in range(100):
+        store.put({"id": f"t{i}", "status": "running", "duration_seconds": 60, "remaining_seconds": 60,
+                   "started_at": 0.0, "finished_at": None, "cancelled": False})
+    assert SqliteTimerStore(str(tmp_path / "timers.db")).load() == []  # still buffered
+    store.close()
+    assert len(SqliteTimerStore(str(tmp_path / "timers.db")).load()) == 100
@@ -0,0 +1,60 @@
+"""
+Tests for streaming training input (mindpulse_service): chunked generation,
+.npz shards, the streaming scaler fit and the tf.data pipeline.
+"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("sklearn")
+from sklearn.preprocessing import StandardScaler
+
+import mindpulse_service as service
+from mindpulse_inference import NUM_PERSONALITIES, _raw_features_from_codes
+
+N, CHUNK = 2500, 700
+
+
+def _concat(chunks):
+    """The chunks' (social, texting, codes, labels) columns, each concatenated."""
+    return [np.concatenate(column) for column in zip(*chunks)]
+
+
+def test_streaming_scaler_matches_a_full_data_fit():
+    scaler = service.fit_scaler_streaming(service._iter_chunks(N, CHUNK))
+    social, texting, codes, _ = _concat(service._iter_chunks(N, CHUNK))
+    full = StandardScaler().fit(_raw_features_from_codes(social, texting, codes))
+    assert scaler.n_samples_seen_ == N
+    np.testing.assert_allclose(scaler.mean_, full.mean_, rtol=1e-10)
+    np.testing.assert_allclose(scaler.var_, full.var_, rtol=1e-10)
+
+
+def test_shards_round_trip_every_row_once(tmp_path):
+    paths = service.write_synthetic_shards(str(tmp_path), N, CHUNK, seed=7)
+    chunks = list(service._iter_chunks(shard_paths=paths))
+    assert [len(c[0]) for c in chunks] == [700, 700, 700, 400]
+    assert all(c[2].dtype == np.int32 and c[3].dtype == np.int32 for c in chunks)
+    for from_shards, generated in zip(_concat(chunks), _concat(service._iter_chunks(N, CHUNK, seed=7))):
+        np.testing.assert_array_equal(from_shards, generated)
+
+
+@pytest.mark.parametrize("shuffle_buffer", [0, 1000])
+def test_stream_dataset_batches(shuffle_buffer):
+    pytest.importorskip("tensorflow")
+    chunk_fn = lambda: service._iter_chunks(N, CHUNK)
+    scaler = service.fit_scaler_streaming(chunk_fn())
+    batches = list(service.make_stream_dataset(chunk_fn, scaler, batch_size=64, shuffle_buffer=shuffle_buffer))
+
+    assert [X.shape[0] for X, _ in batches] == [64] * (N // 64) + [N % 64]
+    X = np.concatenate([X.numpy() for X, _ in batches]) * scaler.scale_ + scaler.mean_
+    labels = np.concatenate([y.numpy() for _, y in batches])
+    assert X.shape == (N, 2 + NUM_PERSONALITIES)
+    onehot = X[:, 2:]
+    np.testing.assert_allclose(onehot.sum(axis=1), 1.0, atol=1e-5)
+    np.testing.assert_allclose(onehot, np.round(onehot), atol=1e-5)
+
+    social, _, codes, expected = _concat(chunk_fn())
+    assert sorted(labels) == sorted(expected)  # every row exactly once
+    in_order = np.allclose(X[:, 0], social, atol=1e-4) and np.array_equal(onehot.argmax(axis=1), codes)
+    assert in_order == (shuffle_buffer == 0)  # shuffling mixes rows across chunks
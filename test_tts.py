@@ -0,0 +1,71 @@
+"""
+SpeechCache tests against the offline engine (no network).
+"""
+
+import threading
+import time
+
+import pytest
+
+from tts import OfflineEngine, SpeechCache, cue_phrases, plan_phrases
+
+
+class CountingEngine(OfflineEngine):
+    """OfflineEngine that counts calls and takes `delay` seconds per synthesis."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def synthesize(self, text, lang, slow):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return super().synthesize(text, lang, slow)
+
+
+def test_identical_text_is_synthesized_once(tmp_path):
+    engine = CountingEngine()
+    cache = SpeechCache(engine, str(tmp_path))
+    first = cache.path("Time for a short break.")
+    assert cache.path("Time for a short break.") == first
+    assert engine.calls == 1
+    assert cache.stats()["hit_rate"] == 0.5
+    cache.close()
+
+
+def test_key_includes_lang_and_slow(tmp_path):
+    cache = SpeechCache(CountingEngine(), str(tmp_path))
+    paths = {cache.path("Hello"), cache.path("Hello", lang="fr"), cache.path("Hello", slow=True)}
+    assert len(paths) == 3
+    cache.close()
+
+
+def test_cache_survives_restart(tmp_path):
+    SpeechCache(CountingEngine(), str(tmp_path)).path("Hello")
+    engine = CountingEngine()
+    SpeechCache(engine, str(tmp_path)).path("Hello")
+    assert engine.calls == 0
+
+
+def test_concurrent_requests_share_one_synthesis(tmp_path):
+    engine = CountingEngine(delay=0.2)
+    cache = SpeechCache(engine, str(tmp_path), workers=4)
+    futures = [cache.submit("Focus time. Let's get to work.") for _ in range(20)]
+    assert len({f.result() for f in futures}) == 1
+    assert engine.calls == 1
+    assert cache.stats()["deduped"] == 19
+    cache.close()
+
+
+def test_prewarm_covers_plan_and_phase_phrases(tmp_path):
+    pytest.importorskip("numpy")
+    engine = CountingEngine()
+    cache = SpeechCache(engine, str(tmp_path))
+    phrases = plan_phrases() + cue_phrases()
+    assert len(cache.prewarm(phrases)) == len(set(phrases))
+    calls = engine.calls
+    cache.path("Use Pomodoro cycles: 25min focus / 5min break")
+    assert engine.calls == calls
+    cache.close()
@@ -1,36 +1,301 @@
 import asyncio
+import heapq
+import json
+import os
+import threading
 import time
 import uuid
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
-timers = {}
+import mindpulse_metrics as metrics
+from pomodoro import phase_at, pomodoro_phases
 
+# Finished and cancelled timers stay visible to /status for this long, then
+# the scheduler evicts them.
+TIMER_RETENTION_SECONDS = float(os.environ.get("MINDPULSE_TIMER_RETENTION", "3600"))
 
-async def _runner(timer_id: str) -> None:
-    """Background coroutine that updates timer state until finished or cancelled."""
-    timer = timers.get(timer_id)
-    if not timer:
+_json_str = json.encoder.encode_basestring  # same escaping as json.dumps(ensure_ascii=False)
+
+
+def _json_number(value) -> str:
+    return "null" if value is None else repr(value)
+
+
+class TimerRecord:
+    """State of one timer. Slotted to keep per-timer memory small."""
+
+    __slots__ = ("id", "status", "duration_seconds", "remaining_seconds",
+                 "started_at", "finished_at", "cancelled")
+
+    def __init__(self, timer_id: str, duration_seconds: int, started_at: float):
+        self.id = timer_id
+        self.status = "created"
+        self.duration_seconds = duration_seconds
+        self.remaining_seconds = duration_seconds
+        self.started_at = started_at
+        self.finished_at: Optional[float] = None
+        self.cancelled = False
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "TimerRecord":
+        if state.get("phases"):
+            timer = SessionRecord(state["id"], [tuple(p) for p in state["phases"]], state["started_at"])
+        else:
+            timer = cls(state["id"], state["duration_seconds"], state["started_at"])
+        timer.status = state["status"]
+        timer.remaining_seconds = state["remaining_seconds"]
+        timer.finished_at = state["finished_at"]
+        timer.cancelled = state["cancelled"]
+        return timer
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "duration_seconds": self.duration_seconds,
+            "remaining_seconds": self.remaining_seconds,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "cancelled": self.cancelled,
+        }
+
+    def status_json(self) -> str:
+        """
+        as_dict() as compact JSON, written straight from the slots for the
+        /status poll: ~1 us, against ~20 us for the dict plus FastAPI's
+        jsonable_encoder/JSONResponse pass. Same bytes as that pass.
+        """
+        return (f'{{"id":{_json_str(self.id)},"status":{_json_str(self.status)},'
+                f'"duration_seconds":{_json_number(self.duration_seconds)},'
+                f'"remaining_seconds":{_json_number(self.remaining_seconds)},'
+                f'"started_at":{_json_number(self.started_at)},'
+                f'"finished_at":{_json_number(self.finished_at)},'
+                f'"cancelled":{"true" if self.cancelled else "false"}}}')
+
+
+class SessionRecord(TimerRecord):
+    """
+    A whole Pomodoro session scheduled as one timer spanning all of its
+    phases. Only the session end sits on the deadline heap; the current
+    phase is derived from elapsed time (see session_state).
+    """
+
+    __slots__ = ("phases",)
+
+    def __init__(self, timer_id: str, phases: List[Tuple[str, int]], started_at: float):
+        super().__init__(timer_id, sum(seconds for _, seconds in phases), started_at)
+        self.phases = phases
+
+    def as_dict(self) -> dict:
+        state = super().as_dict()
+        state["phases"] = [list(p) for p in self.phases]
+        return state
+
+    def status_json(self) -> str:
+        phases = json.dumps(self.phases, ensure_ascii=False, separators=(",", ":"))
+        return f'{super().status_json()[:-1]},"phases":{phases}}}'
+
+
+timers: Dict[str, TimerRecord] = {}
+
+# Deadline heap shared by every running timer: (finish_at, timer_id). A single
+# scheduler task sleeps until the earliest deadline instead of one task per
+# timer waking every second. Cancelled timers are dropped lazily when they
+# reach the top, or all at once by _compact() when they dominate the heap.
+# A second heap holds (evict_at, timer_id) for ended timers.
+#
+# Sync FastAPI endpoints call get_timer/cancel_timer from worker threads, so
+# both heaps and `timers` are only mutated under _lock.
+_deadlines: List[Tuple[float, str]] = []
+_evictions: List[Tuple[float, str]] = []
+_stale = 0  # heap entries whose timer is no longer running
+_shard: Optional[int] = None  # see set_shard()
+_lock = threading.Lock()
+_store = None  # optional timer_store.TimerStore, see attach_store()
+_scheduler_task: Optional[asyncio.Task] = None
+_scheduler_loop: Optional[asyncio.AbstractEventLoop] = None
+_wakeup: Optional[asyncio.Event] = None
+
+
+class TimerWatch:
+    """
+    Subscription to state changes of a set of timers. The engine pushes
+    (timer_id, state dict) onto `queue` whenever a watched timer starts,
+    finishes or is cancelled; get() awaits the next one.
+    """
+
+    __slots__ = ("timer_ids", "queue", "loop")
+
+    def __init__(self, timer_ids: Iterable[str]):
+        self.timer_ids = list(dict.fromkeys(timer_ids))
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.loop = asyncio.get_running_loop()
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Tuple[str, dict]]:
+        """Next (timer_id, state) change, or None if `timeout` passes first."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        with _lock:
+            for timer_id in self.timer_ids:
+                watches = _watches.get(timer_id)
+                if watches is not None:
+                    watches.discard(self)
+                    if not watches:
+                        del _watches[timer_id]
+
+
+_watches: Dict[str, Set[TimerWatch]] = {}
+
+
+def watch_timers(timer_ids: Iterable[str]) -> TimerWatch:
+    """Subscribe to state changes of `timer_ids` (call from async context; close() when done)."""
+    watch = TimerWatch(timer_ids)
+    with _lock:
+        for timer_id in watch.timer_ids:
+            _watches.setdefault(timer_id, set()).add(watch)
+    return watch
+
+
+# Scheduler metrics (see mindpulse_metrics); gauges are computed at scrape time.
+_WAKEUPS = metrics.Counter("mindpulse_timer_scheduler_wakeups_total", "Scheduler loop wakeups.")
+_LAG = metrics.Histogram("mindpulse_timer_scheduler_lag_seconds",
+                         "How long after its deadline each timer was finished by the scheduler.",
+                         buckets=(1e-4, 5e-4, 1e-3, 5e-3, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0))
+metrics.Gauge("mindpulse_timers", "Timer records held (running plus ended within retention).",
+              lambda: len(timers))
+metrics.Gauge("mindpulse_timers_running", "Deadline heap entries of running timers.",
+              lambda: max(0, len(_deadlines) - _stale))
+metrics.Gauge("mindpulse_timer_watched", "Timers with at least one stream subscriber.",
+              lambda: len(_watches))
+
+
+def _publish(timer: "TimerRecord") -> None:
+    """Push a timer's new state to its watchers (safe from any thread). Caller holds _lock."""
+    watches = _watches.get(timer.id)
+    if not watches:
         return
+    item = (timer.id, timer.as_dict())
+    for watch in watches:
+        if not watch.loop.is_closed():
+            watch.loop.call_soon_threadsafe(watch.queue.put_nowait, item)
+
+
+def _wake() -> None:
+    """Re-arm the scheduler's sleep (safe from any thread)."""
+    loop = _scheduler_loop
+    if loop is not None and not loop.is_closed():
+        loop.call_soon_threadsafe(_wakeup.set)
+
+
+def _end(timer: TimerRecord, status: str, now: float) -> None:
+    """Move a timer to a final status and queue it for eviction. Caller holds _lock."""
+    timer.status = status
+    if status == "finished":
+        timer.remaining_seconds = 0
+        timer.finished_at = now
+    _publish(timer)
+    if _store is not None:
+        _store.put(timer.as_dict())
+    evict_at = now + TIMER_RETENTION_SECONDS
+    if not _evictions or evict_at < _evictions[0][0]:
+        _wake()
+    heapq.heappush(_evictions, (evict_at, timer.id))
+
+
+def _expire_due(now: float) -> None:
+    """Pop every deadline <= now and mark its timer finished."""
+    global _stale
+    while _deadlines and _deadlines[0][0] <= now:
+        deadline, timer_id = heapq.heappop(_deadlines)
+        timer = timers.get(timer_id)
+        if timer is None or timer.status != "running":
+            if timer is None or timer.status == "cancelled":
+                _stale = max(0, _stale - 1)
+            continue
+        _LAG.observe(now - deadline)
+        _end(timer, "finished", now)
 
-    duration = timer["duration_seconds"]
-    start_at = timer["started_at"]
-    end_at = start_at + duration
 
+def _evict_due(now: float) -> None:
+    """Drop ended timers whose retention period has passed."""
+    while _evictions and _evictions[0][0] <= now:
+        _, timer_id = heapq.heappop(_evictions)
+        timer = timers.get(timer_id)
+        if timer is not None and timer.status not in ("running", "created"):
+            del timers[timer_id]
+            if _store is not None:
+                _store.delete(timer_id)
+
+
+def _compact() -> None:
+    """Rebuild the heap without stale entries once they outnumber live ones."""
+    global _deadlines, _stale
+    if _stale > 64 and _stale * 2 > len(_deadlines):
+        _deadlines = [entry for entry in _deadlines
+                      if entry[1] in timers and timers[entry[1]].status == "running"]
+        heapq.heapify(_deadlines)
+        _stale = 0
+
+
+async def _scheduler() -> None:
+    """Background coroutine that finishes timers as their deadlines pass and evicts old ones."""
     while True:
-        now = time.time()
-        if timer.get("cancelled"):
-            timer["status"] = "cancelled"
-            break
+        _wakeup.clear()
+        _WAKEUPS.inc()
+        with _lock:
+            now = time.time()
+            _expire_due(now)
+            _evict_due(now)
+            heads = [heap[0][0] for heap in (_deadlines, _evictions) if heap]
+        timeout = max(0.0, min(heads) - time.time()) if heads else None
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+def _ensure_scheduler() -> asyncio.Task:
+    """Start the scheduler on the running loop if it is not already running there."""
+    global _scheduler_task, _scheduler_loop, _wakeup
+    loop = asyncio.get_running_loop()
+    if _scheduler_task is None or _scheduler_task.done() or _scheduler_loop is not loop:
+        _wakeup = asyncio.Event()
+        _scheduler_loop = loop
+        _scheduler_task = loop.create_task(_scheduler())
+    return _scheduler_task
+
+
+def set_shard(shard: Optional[int]) -> None:
+    """
+    Mint ids as "s<shard>-<uuid4>" from now on, so any worker can tell which
+    shard owns a timer (shard_of). None goes back to plain uuid4 ids.
+    """
+    global _shard
+    _shard = shard
 
-        remaining = int(max(0, end_at - now))
-        timer["remaining_seconds"] = remaining
 
-        if remaining <= 0:
-            timer["status"] = "finished"
-            timer["finished_at"] = time.time()
-            break
+def shard_of(timer_id: str) -> Optional[int]:
+    """Shard number encoded in a timer id, or None for unsharded ids."""
+    head, sep, _ = timer_id.partition("-")
+    if sep and head[:1] == "s" and head[1:].isdigit():
+        return int(head[1:])
+    return None
 
-        await asyncio.sleep(min(1, remaining))
+
+def is_local(timer_id: str) -> bool:
+    """True if this process owns `timer_id` (unsharded ids are always local)."""
+    shard = shard_of(timer_id)
+    return shard is None or shard == _shard
+
+
+def _new_id() -> str:
+    if _shard is None:
+        return str(uuid.uuid4())
+    return f"s{_shard}-{uuid.uuid4()}"
 
 
 def create_timer(minutes: float) -> str:
@@ -38,50 +303,180 @@ def create_timer(minutes: float) -> str:
 
     Use `start_background` from an async context to begin the background runner.
     """
-    timer_id = str(uuid.uuid4())
+    timer_id = _new_id()
     duration_seconds = int(max(0, minutes) * 60)
-    now = time.time()
-    timers[timer_id] = {
-        "id": timer_id,
-        "status": "created",
-        "duration_seconds": duration_seconds,
-        "remaining_seconds": duration_seconds,
-        "started_at": now,
-        "finished_at": None,
-        "cancelled": False,
-    }
+    timer = TimerRecord(timer_id, duration_seconds, time.time())
+    timers[timer_id] = timer
+    if _store is not None:
+        _store.put(timer.as_dict())
     return timer_id
 
 
-def get_timer(timer_id: str) -> Optional[dict]:
+def create_timers(minutes: Iterable[float]) -> List[str]:
+    """create_timer for many durations at once; returns ids in the same order."""
+    now = time.time()
+    created = [TimerRecord(_new_id(), int(max(0, m) * 60), now) for m in minutes]
+    timers.update((timer.id, timer) for timer in created)
+    if _store is not None:
+        for timer in created:
+            _store.put(timer.as_dict())
+    return [timer.id for timer in created]
+
+
+def create_session(work_minutes: float, cycles: int = 4, short_break: float = 5,
+                   long_break: float = 15) -> str:
+    """Create a Pomodoro session (phases as in pomodoro.run_pomodoro); start it with start_background."""
+    timer = SessionRecord(_new_id(), pomodoro_phases(work_minutes, cycles, short_break, long_break),
+                          time.time())
+    timers[timer.id] = timer
+    if _store is not None:
+        _store.put(timer.as_dict())
+    return timer.id
+
+
+def session_state(state: dict) -> dict:
+    """Add the current phase to a session's state dict (phase is None once the session has ended)."""
+    phases = state["phases"]
+    elapsed = state["duration_seconds"] - state["remaining_seconds"]
+    located = phase_at(phases, elapsed) if state["status"] in ("running", "created") else None
+    if located is None:
+        state.update(phase=None, phase_index=None, cycle=None, phase_remaining_seconds=0)
+    else:
+        index, left = located
+        state.update(phase=phases[index][0], phase_index=index, cycle=index // 2 + 1,
+                     phase_remaining_seconds=int(left))
+    return state
+
+
+def get_session(session_id: str) -> Optional[dict]:
+    timer = timers.get(session_id)
+    if not isinstance(timer, SessionRecord):
+        return None
+    return session_state(get_timer(session_id))
+
+
+def _refresh(timer_id: str) -> Optional[TimerRecord]:
+    """The timer with remaining_seconds brought up to date (and ended if due)."""
     timer = timers.get(timer_id)
     if not timer:
         return None
 
-    if timer["status"] in ("running", "created"):
+    if timer.status in ("running", "created"):
         now = time.time()
-        elapsed = int(now - timer["started_at"])
-        remaining = max(0, timer["duration_seconds"] - elapsed)
-        timer["remaining_seconds"] = remaining
+        elapsed = int(now - timer.started_at)
+        remaining = max(0, timer.duration_seconds - elapsed)
+        timer.remaining_seconds = remaining
         if remaining == 0:
-            timer["status"] = "finished"
-            timer["finished_at"] = time.time()
+            with _lock:
+                if timer.status in ("running", "created"):
+                    _end(timer, "finished", now)
+
+    return timer
 
-    return dict(timer)
+
+def get_timer(timer_id: str) -> Optional[dict]:
+    timer = _refresh(timer_id)
+    return timer.as_dict() if timer else None
+
+
+def get_timer_json(timer_id: str) -> Optional[str]:
+    """get_timer() serialized as JSON, without the intermediate dict (the /status path)."""
+    timer = _refresh(timer_id)
+    return timer.status_json() if timer else None
 
 
 def cancel_timer(timer_id: str) -> bool:
+    global _stale
     timer = timers.get(timer_id)
     if not timer:
         return False
-    timer["cancelled"] = True
+    with _lock:
+        timer.cancelled = True
+        if timer.status in ("running", "created"):
+            was_running = timer.status == "running"
+            now = time.time()
+            timer.remaining_seconds = max(0, timer.duration_seconds - int(now - timer.started_at))
+            _end(timer, "cancelled", now)
+            if was_running:
+                _stale += 1
+                _compact()
     return True
 
 
+def _schedule(timer: TimerRecord) -> None:
+    """Mark a timer running and push its deadline. Caller holds _lock."""
+    timer.status = "running"
+    deadline = timer.started_at + timer.duration_seconds
+    if not _deadlines or deadline < _deadlines[0][0]:
+        _wakeup.set()  # new earliest deadline: re-arm the scheduler's sleep
+    heapq.heappush(_deadlines, (deadline, timer.id))
+    _publish(timer)
+    if _store is not None:
+        _store.put(timer.as_dict())
+
+
 def start_background(timer_id: str):
-    """Schedule the background runner for an existing timer (call from async context)."""
+    """Put an existing timer on the shared scheduler (call from async context)."""
     timer = timers.get(timer_id)
     if not timer:
         return None
-    timer["status"] = "running"
-    return asyncio.create_task(_runner(timer_id))
+    task = _ensure_scheduler()
+    with _lock:
+        _schedule(timer)
+    return task
+
+
+def start_many(timer_ids: Iterable[str]):
+    """start_background for many timers under one lock acquisition (call from async context)."""
+    task = _ensure_scheduler()
+    with _lock:
+        for timer_id in timer_ids:
+            timer = timers.get(timer_id)
+            if timer is not None:
+                _schedule(timer)
+    return task
+
+
+def _live_states() -> List[dict]:
+    # create_timer inserts without _lock; list() copies the values atomically
+    with _lock:
+        return [timer.as_dict() for timer in list(timers.values())]
+
+
+def attach_store(store) -> int:
+    """
+    Persist all further timer changes to `store` (a timer_store.TimerStore)
+    after restoring the timers it holds. Running timers get their deadlines
+    back (ones that passed while down finish at their deadline); ended ones
+    keep their remaining retention. Returns the number of timers restored.
+    Call before serving requests; from async context it also starts the scheduler.
+    """
+    global _store
+    now = time.time()
+    restored = [TimerRecord.from_dict(state) for state in store.load()]
+    with _lock:
+        for timer in restored:
+            timers[timer.id] = timer
+            if timer.status == "running":
+                heapq.heappush(_deadlines, (timer.started_at + timer.duration_seconds, timer.id))
+            elif timer.status in ("finished", "cancelled"):
+                ended_at = timer.finished_at or now
+                heapq.heappush(_evictions, (max(now, ended_at + TIMER_RETENTION_SECONDS), timer.id))
+    if hasattr(store, "snapshot_source"):
+        store.snapshot_source = _live_states
+    store.start()
+    _store = store
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return len(restored)
+    _ensure_scheduler()
+    return len(restored)
+
+
+def detach_store() -> None:
+    """Stop persisting, flushing anything buffered."""
+    global _store
+    store, _store = _store, None
+    if store is not None:
+        store.close()
@@ -0,0 +1,201 @@
+"""
+Routing timer requests to the worker (shard) that owns the timer.
+
+Timers live in the memory of the worker that created them. A sharded worker
+mints ids that carry its shard number (timer.set_shard / timer.shard_of), so
+a /status, /cancel or /stream request that lands on another worker is
+forwarded to the owner instead of answering 404.
+
+A ShardDirectory maps shard numbers to the address the owning worker accepts
+forwarded requests on:
+  "unix:<path>"        same host, over a Unix domain socket
+  "tcp:<host>:<port>"  another host (or a worker that can't share a filesystem)
+
+Directories are pluggable; open_directory() builds one from a spec:
+  "local:"             LocalDirectory, in-process dict (tests, single process)
+  "file:<directory>"   FileDirectory, one small file per shard (what
+                       `python main.py --workers N` uses; put it on shared
+                       storage to span nodes)
+Another coordination service (etcd, Consul, Redis) only needs register,
+unregister and lookup.
+
+Forwarded requests carry FORWARDED_HEADER and are never forwarded again.
+"""
+
+import asyncio
+import os
+import threading
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+FORWARDED_HEADER = "X-Mindpulse-Forwarded"
+FORWARD_TIMEOUT = 5.0  # seconds to connect and get the response headers
+
+
+# ---------------------------
+# Shard directories
+# ---------------------------
+class ShardDirectory:
+    """shard number -> forwarding address."""
+
+    def register(self, shard: int, address: str) -> None:
+        raise NotImplementedError
+
+    def unregister(self, shard: int) -> None:
+        raise NotImplementedError
+
+    def lookup(self, shard: int) -> Optional[str]:
+        raise NotImplementedError
+
+    def forget(self, shard: int) -> None:
+        """Drop any cached address for `shard` (called after forwarding to it failed)."""
+
+
+class LocalDirectory(ShardDirectory):
+    def __init__(self):
+        self._addresses: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def register(self, shard: int, address: str) -> None:
+        with self._lock:
+            self._addresses[shard] = address
+
+    def unregister(self, shard: int) -> None:
+        with self._lock:
+            self._addresses.pop(shard, None)
+
+    def lookup(self, shard: int) -> Optional[str]:
+        return self._addresses.get(shard)
+
+
+class FileDirectory(ShardDirectory):
+    """
+    <root>/shard-<n> holds shard n's address. Lookups are cached per process;
+    a failed forward calls forget() so the next lookup re-reads the file
+    (a restarted worker may have a new address).
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._cache: Dict[int, str] = {}
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, shard: int) -> str:
+        return os.path.join(self.root, f"shard-{shard}")
+
+    def register(self, shard: int, address: str) -> None:
+        path = self._path(shard)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(address)
+        os.replace(tmp_path, path)
+        self._cache[shard] = address
+
+    def unregister(self, shard: int) -> None:
+        self._cache.pop(shard, None)
+        try:
+            os.remove(self._path(shard))
+        except FileNotFoundError:
+            pass
+
+    def lookup(self, shard: int) -> Optional[str]:
+        address = self._cache.get(shard)
+        if address is None:
+            try:
+                with open(self._path(shard)) as f:
+                    address = f.read().strip() or None
+            except FileNotFoundError:
+                return None
+            if address is not None:
+                self._cache[shard] = address
+        return address
+
+    def forget(self, shard: int) -> None:
+        self._cache.pop(shard, None)
+
+
+def open_directory(spec: str) -> ShardDirectory:
+    """Build a directory from "local:" or "file:<directory>"."""
+    kind, _, path = spec.partition(":")
+    if kind == "local":
+        return LocalDirectory()
+    if kind == "file" and path:
+        return FileDirectory(path)
+    raise ValueError(f"Unknown shard directory '{spec}'. Use local: or file:<directory>")
+
+
+# ---------------------------
+# Forwarding
+# ---------------------------
+class Upstream:
+    """Response from the owning worker: status, headers, then the body via read() or chunks()."""
+
+    def __init__(self, status: int, headers: Dict[str, str], reader: asyncio.StreamReader,
+                 writer: asyncio.StreamWriter):
+        self.status = status
+        self.headers = headers
+        self.content_type = headers.get("content-type", "application/json")
+        self._reader = reader
+        self._writer = writer
+
+    async def read(self) -> bytes:
+        return b"".join([chunk async for chunk in self.chunks()])
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        """Body as it arrives (event streams); closing the iterator closes the connection."""
+        chunked = self.headers.get("transfer-encoding", "").lower() == "chunked"
+        try:
+            while True:
+                if chunked:
+                    # uvicorn's httptools protocol chunks streamed bodies even for HTTP/1.0 clients
+                    size = int((await self._reader.readline()).split(b";")[0].strip() or b"0", 16)
+                    if size == 0:
+                        return
+                    chunk = await self._reader.readexactly(size + 2)  # data + CRLF
+                    yield chunk[:-2]
+                else:
+                    chunk = await self._reader.read(65536)
+                    if not chunk:
+                        return
+                    yield chunk
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+async def _connect(address: str) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    kind, _, rest = address.partition(":")
+    if kind == "unix":
+        return await asyncio.open_unix_connection(rest)
+    if kind == "tcp":
+        host, _, port = rest.rpartition(":")
+        return await asyncio.open_connection(host, int(port))
+    raise ValueError(f"Unknown shard address '{address}'")
+
+
+async def _request(address: str, method: str, target: str, body: bytes) -> Upstream:
+    reader, writer = await _connect(address)
+    # HTTP/1.0: the owner closes the connection after the body.
+    head = (f"{method} {target} HTTP/1.0\r\nHost: shard\r\n{FORWARDED_HEADER}: 1\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n")
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+    status_line = await reader.readline()
+    parts = status_line.split(None, 2)
+    if len(parts) < 2 or not parts[1].isdigit():
+        writer.close()
+        raise ConnectionError(f"bad response from {address}: {status_line!r}")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return Upstream(int(parts[1]), headers, reader, writer)
+
+
+async def forward(address: str, method: str, target: str, body: bytes = b"") -> Upstream:
+    """Send `method target` (path + query) to the worker at `address`; raises OSError/TimeoutError if unreachable."""
+    return await asyncio.wait_for(_request(address, method, target, body), FORWARD_TIMEOUT)
@@ -0,0 +1,231 @@
+"""
+Persistent storage backends for timer.py.
+
+A store receives every timer state change (`put`) and eviction (`delete`)
+from the engine and can replay them on startup (`load`) so running timers
+and their deadlines survive a restart. Writes are buffered and committed in
+groups by a background thread (one fsync / transaction per batch rather than
+per timer); a crash loses at most `flush_interval` seconds of changes.
+
+Backends:
+  - WalTimerStore: append-only JSON-lines write-ahead log, periodically
+    compacted into a snapshot file
+  - SqliteTimerStore: one row per timer in SQLite running in WAL mode
+
+open_store("wal:/var/lib/mindpulse/timers") / open_store("sqlite:timers.db")
+builds one from a spec string (MINDPULSE_TIMER_STORE in main.py).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+FLUSH_INTERVAL = 0.01  # seconds between group commits
+COMPACT_EVERY = 100_000  # WAL entries before compacting into a snapshot
+
+
+class TimerStore:
+    """
+    Base class: buffers operations and commits them in batches from a
+    background thread. Subclasses implement load() and _commit(ops).
+    """
+
+    def __init__(self, flush_interval: float = FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self._pending: List[Tuple[str, dict]] = []
+        self._cond = threading.Condition()
+        self._commit_lock = threading.Lock()
+        self._closed = False
+        self._flusher: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._flusher = threading.Thread(target=self._run, name="timer-store", daemon=True)
+        self._flusher.start()
+
+    def load(self) -> Iterable[dict]:
+        """Return the latest state of every stored timer."""
+        raise NotImplementedError
+
+    def _commit(self, ops: List[Tuple[str, dict]]) -> None:
+        raise NotImplementedError
+
+    def put(self, state: dict) -> None:
+        with self._cond:
+            self._pending.append(("put", state))
+
+    def delete(self, timer_id: str) -> None:
+        with self._cond:
+            self._pending.append(("del", {"id": timer_id}))
+
+    def flush(self) -> None:
+        """Commit everything buffered so far (blocking)."""
+        with self._commit_lock:
+            with self._cond:
+                ops, self._pending = self._pending, []
+            if ops:
+                self._commit(ops)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if self._closed:
+                    return
+                self._cond.wait(self.flush_interval)
+            self.flush()
+
+
+class WalTimerStore(TimerStore):
+    """
+    JSON-lines write-ahead log in `directory`/timers.wal plus a snapshot in
+    `directory`/timers.snapshot. Once the WAL holds `compact_every` entries,
+    the live timers (from `snapshot_source`, set by timer.attach_store) are
+    written to a new snapshot and the WAL is truncated. Replaying is
+    idempotent, so changes racing with compaction are safe to apply twice.
+    """
+
+    def __init__(self, directory: str, flush_interval: float = FLUSH_INTERVAL,
+                 compact_every: int = COMPACT_EVERY):
+        super().__init__(flush_interval)
+        os.makedirs(directory, exist_ok=True)
+        self.wal_path = os.path.join(directory, "timers.wal")
+        self.snapshot_path = os.path.join(directory, "timers.snapshot")
+        self.compact_every = compact_every
+        self.snapshot_source: Optional[Callable[[], List[dict]]] = None
+        self._wal = open(self.wal_path, "a", encoding="utf-8")
+        self._wal_entries = 0
+
+    @staticmethod
+    def _replay(path: str, states: Dict[str, dict]) -> Tuple[int, int]:
+        """Apply the complete lines of `path` to `states`; returns (entries, bytes) replayed."""
+        if not os.path.exists(path):
+            return 0, 0
+        count = size = 0
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("unterminated line")
+                    op, state = json.loads(line)
+                except ValueError:
+                    break  # torn write at the tail of the log
+                if op == "put":
+                    states[state["id"]] = state
+                else:
+                    states.pop(state["id"], None)
+                count += 1
+                size += len(line)
+        return count, size
+
+    def load(self) -> Iterable[dict]:
+        states: Dict[str, dict] = {}
+        self._replay(self.snapshot_path, states)
+        self._wal_entries, size = self._replay(self.wal_path, states)
+        if size < os.path.getsize(self.wal_path):
+            # drop the torn tail, or the next commit would be appended to it and lost on replay
+            self._wal.flush()
+            os.truncate(self.wal_path, size)
+        return list(states.values())
+
+    def _commit(self, ops: List[Tuple[str, dict]]) -> None:
+        self._wal.write("".join(json.dumps(op, separators=(",", ":")) + "\n" for op in ops))
+        self._wal.flush()
+        os.fsync(self._wal.fileno())
+        self._wal_entries += len(ops)
+        if self._wal_entries >= self.compact_every and self.snapshot_source is not None:
+            self.compact()
+
+    def compact(self) -> None:
+        """Write live timers to a fresh snapshot and truncate the WAL."""
+        states = self.snapshot_source()
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for state in states:
+                f.write(json.dumps(("put", state), separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        self._wal.close()
+        self._wal = open(self.wal_path, "w", encoding="utf-8")
+        self._wal_entries = 0
+
+    def close(self) -> None:
+        super().close()
+        self._wal.close()
+
+
+class SqliteTimerStore(TimerStore):
+    """
+    Timers as rows of one SQLite table, journal_mode=WAL, one transaction per
+    batch. Pomodoro sessions keep their phase list as JSON in `phases`.
+    """
+
+    COLUMNS = ("id", "status", "duration_seconds", "remaining_seconds",
+               "started_at", "finished_at", "cancelled", "phases")
+
+    def __init__(self, path: str, flush_interval: float = FLUSH_INTERVAL):
+        super().__init__(flush_interval)
+        self.path = path
+        # used by the caller's thread for load(), then only by the flusher thread
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS timers ("
+            "id TEXT PRIMARY KEY, status TEXT, duration_seconds INTEGER, remaining_seconds INTEGER, "
+            "started_at REAL, finished_at REAL, cancelled INTEGER, phases TEXT)"
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(timers)")}
+        if "phases" not in columns:  # database written before sessions existed
+            self._db.execute("ALTER TABLE timers ADD COLUMN phases TEXT")
+        self._db.commit()
+
+    def load(self) -> Iterable[dict]:
+        rows = self._db.execute(f"SELECT {', '.join(self.COLUMNS)} FROM timers")
+        states = []
+        for row in rows:
+            state = dict(zip(self.COLUMNS, row))
+            state["cancelled"] = bool(state["cancelled"])
+            state["phases"] = json.loads(state["phases"]) if state["phases"] else None
+            states.append(state)
+        return states
+
+    @staticmethod
+    def _row(state: dict) -> tuple:
+        phases = state.get("phases")
+        return (state["id"], state["status"], state["duration_seconds"], state["remaining_seconds"],
+                state["started_at"], state["finished_at"], state["cancelled"],
+                json.dumps(phases) if phases else None)
+
+    def _commit(self, ops: List[Tuple[str, dict]]) -> None:
+        placeholders = ", ".join("?" for _ in self.COLUMNS)
+        with self._db:
+            for op, state in ops:
+                if op == "put":
+                    self._db.execute(f"INSERT OR REPLACE INTO timers ({', '.join(self.COLUMNS)}) "
+                                     f"VALUES ({placeholders})", self._row(state))
+                else:
+                    self._db.execute("DELETE FROM timers WHERE id = ?", (state["id"],))
+
+    def close(self) -> None:
+        super().close()
+        self._db.close()
+
+
+def open_store(spec: str) -> TimerStore:
+    """Build a store from "wal:<directory>" or "sqlite:<path>"."""
+    kind, _, path = spec.partition(":")
+    if kind == "wal" and path:
+        return WalTimerStore(path)
+    if kind == "sqlite" and path:
+        return SqliteTimerStore(path)
+    raise ValueError(f"Unknown timer store '{spec}'. Use wal:<directory> or sqlite:<path>")
@@ -1,19 +1,255 @@
+"""
+Spoken cues for timers and plans.
+
+SpeechCache turns (text, lang, slow) into an audio file path:
+  - files are content-addressed (sha256 of the key) under cache_dir, so
+    identical text is synthesized once and survives restarts
+  - misses are synthesized on a worker pool; concurrent requests for the
+    same key share one in-flight synthesis
+  - prewarm() synthesizes the fixed phrases ahead of time: plan names and
+    recommendations from mindpulse_inference.map_probs_to_plan and the
+    Pomodoro phase cues
+
+Engines are swappable: GTTSEngine (network, needs the `gTTS` package) or
+OfflineEngine (local tone WAVs, deterministic; for tests and air-gapped use).
+
+Usage:
+  python tts.py "Time for a short break"
+  python tts.py "Bonjour" --lang fr --play
+  python tts.py --prewarm --offline --stats
+"""
+
 import argparse
+import hashlib
+import io
+import json
+import math
 import os
 import platform
+import struct
 import subprocess
-import sys
-from typing import Optional
+import threading
+import time
+import wave
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List
+
+CACHE_DIR = os.environ.get("MINDPULSE_TTS_CACHE", "./tts_cache")
+TTS_WORKERS = 4
+
+# Spoken when a Pomodoro phase begins (keys as in pomodoro.PHASE_LABELS).
+PHASE_CUES = {
+    "work": "Focus time. Let's get to work.",
+    "short_break": "Time for a short break.",
+    "long_break": "Time for a long break.",
+}
+SESSION_DONE_CUE = "All cycles complete. Nice work!"
+
+
+# ---------------------------
+# Engines
+# ---------------------------
+class GTTSEngine:
+    """Google Translate TTS via the `gTTS` package (network). Produces MP3."""
+
+    name = "gtts"
+    extension = "mp3"
+
+    def synthesize(self, text: str, lang: str, slow: bool) -> bytes:
+        from gtts import gTTS  # optional dependency, only needed when synthesizing
+        buf = io.BytesIO()
+        gTTS(text, lang=lang, slow=slow).write_to_fp(buf)
+        return buf.getvalue()
+
+
+class OfflineEngine:
+    """
+    Local stand-in: a short mono WAV whose pitch and length are derived from
+    the text, so different keys give different audio. No network, no deps.
+    """
+
+    name = "offline"
+    extension = "wav"
+    RATE = 8000
+
+    def synthesize(self, text: str, lang: str, slow: bool) -> bytes:
+        digest = hashlib.sha256(f"{lang}:{text}".encode("utf-8")).digest()
+        freq = 300 + digest[0] * 2
+        seconds = min(2.0, 0.2 + 0.02 * len(text)) * (1.5 if slow else 1.0)
+        frames = int(self.RATE * seconds)
+        samples = (int(8000 * math.sin(2 * math.pi * freq * i / self.RATE)) for i in range(frames))
+        buf = io.BytesIO()
+        with wave.open(buf, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(self.RATE)
+            w.writeframes(struct.pack(f"<{frames}h", *samples))
+        return buf.getvalue()
+
+
+# ---------------------------
+# Cache + worker pool
+# ---------------------------
+class SpeechCache:
+    """
+    Content-addressed speech files with pooled, deduplicated synthesis.
+
+    path(text) blocks until the file exists; submit(text) returns a Future of
+    the path. Engine name is part of the key so switching engines never
+    serves audio from the other one.
+    """
+
+    def __init__(self, engine=None, cache_dir: str = CACHE_DIR, workers: int = TTS_WORKERS):
+        self.engine = engine if engine is not None else GTTSEngine()
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self.deduped = 0
+        self.failures = 0
+        self._latencies: List[float] = []
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts")
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, text: str, lang: str = "en", slow: bool = False) -> str:
+        raw = json.dumps([self.engine.name, text, lang, bool(slow)], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.{self.engine.extension}")
+
+    def _synthesize(self, key: str, text: str, lang: str, slow: bool) -> str:
+        path = self._path_for(key)
+        try:
+            t0 = time.perf_counter()
+            audio = self.engine.synthesize(text, lang, slow)
+            elapsed = time.perf_counter() - t0
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)  # readers never see a partial file
+            with self._lock:
+                self._latencies.append(elapsed)
+            return path
+        except Exception:
+            with self._lock:
+                self.failures += 1
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def submit(self, text: str, lang: str = "en", slow: bool = False) -> "Future[str]":
+        key = self.key(text, lang, slow)
+        path = self._path_for(key)
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.deduped += 1
+                return future
+            if os.path.exists(path):
+                self.hits += 1
+                future = Future()
+                future.set_result(path)
+                return future
+            self.misses += 1
+            # registered before _synthesize can pop it: its finally needs _lock
+            future = self._pool.submit(self._synthesize, key, text, lang, slow)
+            self._inflight[key] = future
+            return future
+
+    def path(self, text: str, lang: str = "en", slow: bool = False) -> str:
+        return self.submit(text, lang, slow).result()
+
+    def prewarm(self, phrases: Iterable[str], lang: str = "en") -> List[str]:
+        """Synthesize every phrase not yet cached (in parallel); returns their paths."""
+        futures = [self.submit(text, lang) for text in dict.fromkeys(phrases)]
+        return [f.result() for f in futures]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses + self.deduped
+            latencies = sorted(self._latencies)
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "deduped": self.deduped,
+                "failures": self.failures,
+                "hit_rate": round((self.hits + self.deduped) / lookups, 4) if lookups else 0.0,
+                "synth_count": len(latencies),
+                "synth_mean_ms": 1000.0 * sum(latencies) / len(latencies) if latencies else 0.0,
+                "synth_p95_ms": 1000.0 * latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0,
+            }
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+
+
+# ---------------------------
+# Fixed phrases
+# ---------------------------
+def plan_phrases() -> List[str]:
+    """Plan names and recommendations map_probs_to_plan can return."""
+    import numpy as np
+    from mindpulse_inference import NUM_PLANS, map_probs_to_plan
+
+    phrases = []
+    for idx in range(NUM_PLANS):
+        plan = map_probs_to_plan(np.eye(NUM_PLANS)[idx])
+        phrases.append(plan["plan_name"])
+        phrases.extend(plan["recommendations"])
+    return phrases
+
+
+def cue_phrases() -> List[str]:
+    return list(PHASE_CUES.values()) + [SESSION_DONE_CUE]
+
+
+def play(path: str) -> None:
+    """Play an audio file with the platform's command-line player."""
+    system = platform.system()
+    if system == "Darwin":
+        cmd = ["afplay", path]
+    elif system == "Windows":
+        cmd = ["cmd", "/c", "start", "", path]
+    elif path.endswith(".wav"):
+        cmd = ["aplay", "-q", path]
+    else:
+        cmd = ["mpg123", "-q", path]
+    subprocess.run(cmd, check=False)
+
 
-import gTTS
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Synthesize (cached) speech for MindPulse cues")
+    parser.add_argument("text", nargs="?")
+    parser.add_argument("--lang", default="en")
+    parser.add_argument("--slow", action="store_true")
+    parser.add_argument("--offline", action="store_true", help="Use the local stand-in engine")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--prewarm", action="store_true", help="Synthesize plan and Pomodoro phrases")
+    parser.add_argument("--play", action="store_true")
+    parser.add_argument("--stats", action="store_true")
+    args = parser.parse_args()
 
-tts = gTTS("Hello this is a normal text and i am a python package. lol")
-tts.save("speech.mp3")
-tts = gTTS("Bonjour, ceci est un texte normal et je suis un paquet python. lol", lang='fr')
-tts.save("speech.mp3")
+    if not args.text and not args.prewarm:
+        parser.error("give TEXT and/or --prewarm")
+    cache = SpeechCache(OfflineEngine() if args.offline else None, args.cache_dir)
+    try:
+        if args.prewarm:
+            paths = cache.prewarm(plan_phrases() + cue_phrases(), args.lang)
+            print(f"Prewarmed {len(paths)} phrase(s) in {args.cache_dir}")
+        if args.text:
+            path = cache.path(args.text, args.lang, args.slow)
+            print(path)
+            if args.play:
+                play(path)
+        if args.stats:
+            print(json.dumps(cache.stats(), indent=2))
+    finally:
+        cache.close()
 
-tts = gTTS("Hello this is a normal text and i am a python package. lol", slow=True)
-tts.save("speech.mp3")
 
-tts = gTTS("Hello this is a normal text and i am a python package. lol")
-tts.save("speech.mp3")
\ No newline at end of file
+if __name__ == "__main__":
+    main()